@@ -1,6 +1,8 @@
 from django.contrib import admin
 from applications.models.models import Application, ApplicationDocument
-from .models.models import ActivityLog, Deadline,Message
+from django.utils import timezone
+from .models.models import ActivityLog, Conversation, Deadline, EmailOutbox, Mailing, Message
+from .services import outbox
 
 @admin.register(ActivityLog)
 class ActivityLogAdmin(admin.ModelAdmin):
@@ -63,3 +65,44 @@ class MessageAdmin(admin.ModelAdmin):
     )
     ordering = ['timestamp']
     list_per_page = 20
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ['id', 'user_a', 'user_b', 'application', 'last_message_at', 'unread_a', 'unread_b']
+    list_select_related = ['user_a', 'user_b']
+    search_fields = ['user_a__username', 'user_b__username']
+    readonly_fields = ['last_message_at', 'last_message_preview', 'last_sender', 'unread_a', 'unread_b']
+    raw_id_fields = ['user_a', 'user_b', 'application']
+    ordering = ['-last_message_at']
+    list_per_page = 20
+
+
+@admin.register(Mailing)
+class MailingAdmin(admin.ModelAdmin):
+    list_display = ['id', 'subject', 'actor', 'recipients', 'created_at']
+    search_fields = ['subject']
+    readonly_fields = ['recipients', 'created_at']
+    ordering = ['-created_at']
+    list_per_page = 20
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ['id', 'to', 'subject', 'mailing', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_select_related = ['mailing']
+    search_fields = ['to', 'subject']
+    list_filter = ['status', 'created_at']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    ordering = ['-id']
+    list_per_page = 50
+    actions = ['retry_now']
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {**(extra_context or {}), 'queue_depth': outbox.queue_depth()}
+        return super().changelist_view(request, extra_context=extra_context)
+
+    @admin.action(description='Retry selected emails now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status__in=['SENT', 'SENDING']).update(status='PENDING', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f'{updated} emails queued for delivery')
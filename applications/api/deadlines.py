@@ -5,6 +5,7 @@ from rest_framework.permissions import IsAuthenticated
 from applications.models.models import Deadline
 from applications.api.serializers.serializers import DeadlineSerializer
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 
 User = get_user_model()
@@ -45,16 +46,20 @@ class DeadlineViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         try:
-            deadline = serializer.save(
-                institution=request.user.assigned_institution
-            )
-            
             from applications.services.notifications import notify_students_of_deadline
             from applications.services.emails import send_deadline_event
-            notify_students_of_deadline(deadline)
-            send_deadline_event(request, deadline)
+            with transaction.atomic():
+                deadline = serializer.save(
+                    institution=request.user.assigned_institution
+                )
+                # Both written after commit, in chunks and from the outbox
+                fanout = notify_students_of_deadline(deadline, created_by=request.user)
+                send_deadline_event(deadline, request.user)
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(
+                {**serializer.data, 'notification_fanout': fanout.id},
+                status=status.HTTP_201_CREATED
+            )
         except Exception as e:
             print(f"Error creating deadline: {e}")
             return Response(
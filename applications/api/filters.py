@@ -0,0 +1,35 @@
+# applications/api/filters.py
+import django_filters
+from django.db.models import Q
+from applications.models.models import ApplicationReadModel
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    pass
+
+
+class ApplicationReadModelFilter(django_filters.FilterSet):
+    """
+    Application list filters answered from the read model. Parameter names
+    match the ones the list endpoint accepted on the Application queryset.
+    """
+    status = django_filters.CharFilter(field_name='status')
+    status__in = CharInFilter(field_name='status', lookup_expr='in')
+    program__department__faculty__institution = django_filters.NumberFilter(field_name='institution_id')
+    program = django_filters.NumberFilter(field_name='program_id')
+    date_applied__gte = django_filters.IsoDateTimeFilter(field_name='date_applied', lookup_expr='gte')
+    date_applied__lte = django_filters.IsoDateTimeFilter(field_name='date_applied', lookup_expr='lte')
+    search = django_filters.CharFilter(method='filter_search')
+
+    class Meta:
+        model = ApplicationReadModel
+        fields = []
+
+    def filter_search(self, queryset, name, value):
+        for term in value.replace(',', ' ').split():
+            queryset = queryset.filter(
+                Q(program_name__icontains=term) |
+                Q(institution_name__icontains=term) |
+                Q(student_username__icontains=term)
+            )
+        return queryset
@@ -3,16 +3,34 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from applications.api.serializers.serializers import MessageSerializer
+from applications.api.serializers.serializers import ConversationSerializer, MessageSerializer
+from applications.api.pagination import KeysetPagination
 from django.contrib.auth import get_user_model
 from django.db.models import Q, Max
-from applications.models.models import Message, Application
+from applications.models.models import Application, Conversation, Message
+from applications.services import conversations, read_state
+from university_platform.metrics import SerializerMetricsMixin, timed
+import uuid
 
 User = get_user_model()
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Message.objects.all()
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    query_budgets = {'list': 3, 'inbox': 2, 'unread_count': 1, 'mark_read': 3}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve', 'by_application'):
+            context['read_watermarks'] = read_state.message_watermarks(self.request.user.pk)
+        return context
+
+    def _peer_id(self, value):
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            return None
 
     def get_queryset(self):
         # Get messages for a specific application if application_id is provided
@@ -28,8 +46,7 @@ class MessageViewSet(viewsets.ModelViewSet):
                     return Message.objects.none()
                 
                 return Message.objects.filter(
-                    Q(sender=self.request.user, recipient=application.student) |
-                    Q(sender=application.student, recipient=self.request.user)
+                    conversation__in=conversations.thread(self.request.user.pk, application.student_id, application)
                 ).order_by('-timestamp')
             except Application.DoesNotExist:
                 return Message.objects.none()
@@ -38,9 +55,9 @@ class MessageViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_enroller:
             return Message.objects.filter(
-                Q(sender=user) | Q(recipient=user),
+                conversation__in=conversations.for_user(user.pk).values('id'),
                 is_system=False
-            ).distinct().order_by('-timestamp')
+            ).order_by('-timestamp')
         return Message.objects.filter(recipient=user).order_by('-timestamp')
 
     def create(self, request, *args, **kwargs):
@@ -57,6 +74,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         print('serializer errors:', serializer.errors)
         
+        application = None
         application_id = request.data.get('application_id')
         if application_id:
             try:
@@ -81,7 +99,8 @@ class MessageViewSet(viewsets.ModelViewSet):
 
         message = serializer.save(
             sender=request.user,
-            recipient=recipient
+            recipient=recipient,
+            conversation=conversations.for_pair(request.user.pk, recipient.pk, application)
         )
 
         # Send notification to recipient
@@ -118,8 +137,7 @@ class MessageViewSet(viewsets.ModelViewSet):
                 )
 
             messages = Message.objects.filter(
-                Q(sender=request.user, recipient=application.student) |
-                Q(sender=application.student, recipient=request.user)
+                conversation__in=conversations.thread(request.user.pk, application.student_id, application)
             ).order_by('-timestamp')
 
             serializer = self.get_serializer(messages, many=True)
@@ -129,4 +147,41 @@ class MessageViewSet(viewsets.ModelViewSet):
             return Response(
                 {"error": "Application not found"},
                 status=status.HTTP_404_NOT_FOUND
-            )
\ No newline at end of file
+            )
+
+    @action(detail=False, methods=['get'])
+    def inbox(self, request):
+        """The current user's conversations, most recent first, from the Conversation table alone"""
+        fields = [field.name for field in Conversation._meta.concrete_fields]
+        querysets = [
+            side.select_related('user_a', 'user_b').only(*fields, 'user_a__name', 'user_b__name')
+            for side in conversations.sides(request.user.pk)
+        ]
+        page = self.paginator.paginate_querysets(querysets, request, view=self)
+        serializer = timed(ConversationSerializer)(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Unread messages to the current user, from ?peer=<user id> or from everyone"""
+        peer = request.query_params.get('peer')
+        peer_id = self._peer_id(peer) if peer else None
+        if peer and peer_id is None:
+            return Response({"error": "peer must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'unread': read_state.unread_messages(request.user.pk, peer_id)})
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        """Mark the messages from `peer` (up to `up_to`, default all) as read by moving the read watermark"""
+        peer_id = self._peer_id(request.data.get('peer'))
+        if peer_id is None:
+            return Response({"error": "peer must be a user id"}, status=status.HTTP_400_BAD_REQUEST)
+        up_to = request.data.get('up_to')
+        try:
+            up_to = int(up_to) if up_to is not None else None
+        except (TypeError, ValueError):
+            return Response({"error": "up_to must be a message id"}, status=status.HTTP_400_BAD_REQUEST)
+        last_read_id = read_state.mark_messages_read(request.user.pk, peer_id, up_to)
+        if last_read_id is None:
+            return Response({"status": "No messages from this user"}, status=status.HTTP_204_NO_CONTENT)
+        return Response({"status": "Messages marked as read", "last_read_id": last_read_id})
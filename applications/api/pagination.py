@@ -0,0 +1,154 @@
+# applications/api/pagination.py
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a (timestamp, id) pair.
+
+    The timestamp field and direction come from the queryset's first
+    ordering term when that is a date/time field (so `?ordering=` from
+    OrderingFilter is kept), and otherwise from `ordering_field` or the
+    model's Meta.ordering, newest first. Each page is fetched with
+    `ts <= cursor_ts AND NOT (ts = cursor_ts AND id >= cursor_id)` (mirrored
+    for ascending order) and LIMIT page_size + 1. The range bound on `ts`
+    lets the database start the index walk at the cursor, so a deep page
+    reads no more rows than the first one, with no OFFSET scan and no
+    COUNT(*). NULL timestamps of nullable fields sort last.
+    """
+    ordering_field = None
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_querysets([queryset], request, view)
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        Page over the union of disjoint querysets, such as the two sides of
+        an OR. Each one is paged with its own indexed walk and the results
+        are merged, where one queryset with an OR would sort all its rows.
+        """
+        self.request = request
+        self.field, self.descending = self.get_ordering(querysets[0])
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        results = []
+        for queryset in querysets:
+            results.extend(self._page(queryset, position))
+        if len(querysets) > 1:
+            results.sort(key=self._sort_key, reverse=self.descending)
+        self.has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_position = self._position(results[-1]) if self.has_next else None
+        return results
+
+    def _page(self, queryset, position):
+        model_field = queryset.model._meta.get_field(self.field)
+        if model_field.null:
+            column = F(self.field).desc(nulls_last=True) if self.descending else F(self.field).asc(nulls_last=True)
+        else:
+            column = f'-{self.field}' if self.descending else self.field
+        queryset = queryset.order_by(column, '-pk' if self.descending else 'pk')
+        if position is not None:
+            queryset = queryset.filter(self.after(position, model_field.null))
+        return list(queryset[:self.page_size + 1])
+
+    def _sort_key(self, row):
+        value, pk = self._position(row)
+        # NULLs last in either direction
+        return (value is not None, value, pk) if self.descending else (value is None, value, pk)
+
+    def after(self, position, nullable):
+        """Rows after `position` in page order"""
+        value, pk = position
+        before, after = ('lt', 'gt') if self.descending else ('gt', 'lt')
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True, f'pk__{before}': pk})
+        # A range on the field plus an exclusion of the rows already seen at
+        # its boundary: unlike (ts < v OR (ts = v AND id < pk)), the database
+        # can seek the index to the cursor
+        condition = Q(**{f'{self.field}__{before}e': value}) & ~Q(**{self.field: value, f'pk__{after}e': pk})
+        if nullable:
+            condition |= Q(**{f'{self.field}__isnull': True})
+        return condition
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, queryset):
+        """(field, descending) to page on"""
+        ordering = queryset.query.order_by
+        if ordering and isinstance(ordering[0], str):
+            name = ordering[0].lstrip('-')
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+            if isinstance(field, models.DateTimeField):
+                return name, ordering[0].startswith('-')
+        return self.ordering_field or queryset.model._meta.ordering[0].lstrip('-'), True
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def _position(self, row):
+        if isinstance(row, dict):
+            return row[self.field], row['id']
+        return getattr(row, self.field), row.pk
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = f'{value.isoformat() if value is not None else ""}|{pk}'
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw, pk = urlsafe_b64decode(encoded.encode()).decode().rsplit('|', 1)
+            value = parse_datetime(raw) if raw else None
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if raw and value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from applications.models.models import Application, ApplicationDocument, ActivityLog, Deadline, Message, Notification
+from django.db.models import Prefetch
+from applications.models.models import Application, ApplicationDocument, ActivityLog, Conversation, Deadline, Message, Notification, NotificationFanout
 from institutions.models import Institution, Program, Department
+from applications.services import conversations, read_state
 from django.contrib.auth import get_user_model 
 User = get_user_model()
 
@@ -33,12 +35,32 @@ class ApplicationDocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'file', 'uploaded_at']
         read_only_fields = ['uploaded_at']
 
-class NotificationSerializer(serializers.ModelSerializer):
+class ReadWatermarkMixin:
+    """`is_read` also covers rows at or below the reader's watermark, passed as context['read_watermarks']"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        watermarks = self.context.get('read_watermarks')
+        if watermarks:
+            data['is_read'] = read_state.is_read(instance, watermarks)
+        return data
+
+class NotificationSerializer(ReadWatermarkMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'user', 'title', 'message', 'is_read','created_at', 'notification_type', 'read_at']
         read_only_fields = ['user', 'created_at', 'is_read']
 
+class NotificationFanoutSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NotificationFanout
+        fields = ['id', 'title', 'notification_type', 'status', 'total', 'sent', 'progress', 'error', 'created_at', 'updated_at', 'finished_at']
+
+    def get_progress(self, obj):
+        return round(100 * obj.sent / obj.total, 1) if obj.total else 100.0
+
 class ApplicationSerializer(serializers.ModelSerializer):
     student = UserBasicSerializer(read_only=True)
     documents = ApplicationDocumentSerializer(many=True, read_only=True)
@@ -121,6 +143,31 @@ class ApplicationSerializer(serializers.ModelSerializer):
             return {"id": institution.id, "name": institution.name} if institution else None
         return None
 
+class ApplicationListSerializer(ApplicationSerializer):
+    """
+    Read-only list representation with the same fields as ApplicationSerializer.
+    Use setup_eager_loading on the queryset so a page costs a constant number
+    of queries: department and institution come from the selected program
+    path and documents from one prefetch.
+    """
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related(
+            'student',
+            'program__department__faculty__institution',
+        ).prefetch_related(
+            Prefetch('documents', queryset=ApplicationDocument.objects.order_by('uploaded_at'))
+        )
+
+    def get_department(self, obj):
+        department = obj.program.department
+        return {'id': department.id, 'name': department.name, 'faculty': department.faculty_id}
+
+    def get_institution(self, obj):
+        institution = obj.program.department.faculty.institution
+        return {'id': institution.id, 'name': institution.name}
+
 class ApplicationStatusSerializer(serializers.ModelSerializer):
     admin_notes = serializers.CharField(required=False, allow_blank=True)
 
@@ -128,6 +175,11 @@ class ApplicationStatusSerializer(serializers.ModelSerializer):
         model = Application
         fields = ['status', 'admin_notes']
         
+class BulkTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=5000)
+    status = serializers.ChoiceField(choices=Application.STATUS_CHOICES)
+    admin_notes = serializers.CharField(required=False, allow_blank=True)
+
 class ActivityLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = ActivityLog
@@ -152,11 +204,28 @@ class DeadlineSerializer(serializers.ModelSerializer):
             'institution'
         ]
         read_only_fields = ['institution']
-class MessageSerializer(serializers.ModelSerializer):
+class MessageSerializer(ReadWatermarkMixin, serializers.ModelSerializer):
     class Meta:
         model = Message
-        fields = ['id', 'sender', 'recipient', 'text', 'timestamp', 'is_read']
-        read_only_fields = ['sender', 'recipient', 'timestamp', 'is_read']
+        fields = ['id', 'conversation', 'sender', 'recipient', 'text', 'timestamp', 'is_read']
+        read_only_fields = ['conversation', 'sender', 'recipient', 'timestamp', 'is_read']
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """A conversation as seen by the requesting user: the other participant and their own unread count"""
+    peer = serializers.SerializerMethodField()
+    unread = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = ['id', 'peer', 'application', 'last_message_at', 'last_message_preview', 'last_sender', 'unread']
+        read_only_fields = fields
+
+    def get_peer(self, obj):
+        peer = obj.user_b if obj.user_a_id == self.context['request'].user.pk else obj.user_a
+        return {'id': peer.id, 'name': peer.name}
+
+    def get_unread(self, obj):
+        return conversations.unread_for(obj, self.context['request'].user.pk)
 
 class DocumentRequestSerializer(serializers.Serializer):
     documents_requested = serializers.CharField(
@@ -0,0 +1,116 @@
+# applications/api/stream.py
+"""
+Server-Sent Events stream of the current user's notifications and messages.
+
+GET notifications/stream/?token=<JWT access token> (EventSource cannot set
+headers; an Authorization header also works). The view authenticates once;
+the stream subscribes to the user's pubsub channel when it starts and
+unsubscribes when it ends, so a client that disconnects before the first
+byte leaves no subscriber behind. It then only awaits events, so an idle
+client costs no queries. A `Last-Event-ID` header (sent by EventSource
+on reconnect) or `?since=<notification id>` replays missed notifications
+first, up to REPLAY_LIMIT of them. `resync` tells the client it fell behind
+(the replay was cut short or the subscription lagged) and should catch up
+with notifications/since/ from its `since`. This needs an ASGI server;
+under WSGI it answers 503 so clients fall back to polling.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from applications.models.models import Notification
+from applications.services import live
+from university_platform.pubsub import broker
+
+# Notifications replayed on connect
+REPLAY_LIMIT = 100
+
+
+def _format(event):
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], cls=JSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def _authenticate(request):
+    raw = request.GET.get('token')
+    if not raw:
+        header = request.headers.get('Authorization', '')
+        raw = header[7:] if header.startswith('Bearer ') else None
+    if not raw:
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _missed_notifications(user, since):
+    notifications = Notification.objects.filter(user=user, id__gt=since).order_by('id')[:REPLAY_LIMIT]
+    return [live.notification_event(notification) for notification in notifications]
+
+
+async def _events(user, since):
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    last_id = since or 0
+    # Subscribed before replaying so nothing created in between is lost
+    subscription = broker.subscribe(live.user_channel(user.pk))
+    try:
+        yield 'retry: 5000\n\n'
+        if since is not None:
+            missed = await sync_to_async(_missed_notifications)(user, since)
+            for event in missed:
+                last_id = event['id']
+                yield _format(event)
+            if len(missed) == REPLAY_LIMIT:
+                # More were missed than one replay holds
+                yield _format({'event': 'resync', 'data': {'since': last_id}})
+        while True:
+            if subscription.lagged:
+                yield _format({'event': 'resync', 'data': {'since': last_id}})
+                subscription.lagged = False
+            try:
+                event = await subscription.get(timeout=heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if event.get('id') is not None:
+                # Already replayed from the database
+                if event['event'] == 'notification' and event['id'] <= last_id:
+                    continue
+                last_id = max(last_id, event['id'])
+            yield _format(event)
+    finally:
+        subscription.close()
+
+
+async def notification_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"error": "Streaming needs an ASGI server; poll notifications/since/ instead"},
+            status=503
+        )
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({"error": "Authentication credentials were not provided or are invalid"}, status=401)
+
+    since = request.headers.get('Last-Event-ID') or request.GET.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return JsonResponse({"error": "since must be a notification id"}, status=400)
+
+    response = StreamingHttpResponse(_events(user, since), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 from .views import ApplicationViewSet, analyze_application, EnrollmentViewSet, check_application, EnrollerActionsViewSet, NotificationViewSet
 from applications.api.messages import MessageViewSet
 from applications.api.deadlines import DeadlineViewSet
+from applications.api.stream import notification_stream
 router = DefaultRouter()
 router.register(r'applications', ApplicationViewSet, basename='application')
 router.register(r'enrollment', EnrollmentViewSet, basename='enrollment')
@@ -11,6 +12,7 @@ router.register(r'deadlines', DeadlineViewSet, basename='deadline')
 router.register(r'enroller-actions', EnrollerActionsViewSet, basename='enroller-actions')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 urlpatterns = [
+    path('notifications/stream/', notification_stream, name='notification-stream'),
     path('', include(router.urls)),
     path('analyze-application/',analyze_application, name='analyze_application'),
     path('application/check/', check_application, name='check-application'),
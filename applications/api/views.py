@@ -3,34 +3,52 @@ from rest_framework.response import Response
 
 from rest_framework import viewsets, filters, status, permissions
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from applications.models.models import Application, ApplicationDocument, Deadline, ActivityLog, Message, Notification
+from applications.models.models import (
+    Application, ApplicationDocument, ApplicationReadModel, Deadline, ActivityLog, Message, Notification,
+    NotificationFanout
+)
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
+from django_filters.utils import translate_validation
 
 from .serializers.serializers import (
     ApplicationSerializer, 
+    ApplicationListSerializer,
     ApplicationStatusSerializer, 
+    BulkTransitionSerializer,
     ActivityLogSerializer, 
     DocumentRequestSerializer, 
     MessageSerializer,
     ProgramAlternativeSerializer,
-    NotificationSerializer
+    NotificationSerializer,
+    NotificationFanoutSerializer
 )
+from .filters import ApplicationReadModelFilter
+from .pagination import KeysetPagination
 from ..services.permissions import IsStudentOwnerOrAdmin, IsAdminForStatusChange
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Count, F, Q, Avg
-from datetime import datetime, timedelta
+from datetime import datetime
 from institutions.models import Institution, Program, Department
 from applications.services.emails import (
+    send_application_confirmation,
     send_document_request_email,
     send_program_alternative_email,
-    send_status_email
+    send_status_email,
+    send_status_emails
 )
 from applications.services.notifications import send_notification
+from applications.services import daily_stats, public_stats
+from applications.services import admission_rules, conversations, read_state, transitions
+from recommendations.services.engine import recommend_alternatives
+from university_platform.metrics import SerializerMetricsMixin, timed
 from django.http import Http404
+import logging
 import time  
 from django.utils import timezone
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 @api_view(['POST'])
 def analyze_application(request):
@@ -73,7 +91,7 @@ def _log_activity(self, user, action, description, metadata=None):
         metadata=metadata or {}
     )
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Application.objects.all().select_related(
         'student', 'program__department__faculty__institution', 'program', 'program__department'
     ).order_by('-date_applied')
@@ -88,6 +106,17 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     search_fields = ['program__name', 'program__department__faculty__institution', 'student__username']
     ordering_fields = ['date_applied', 'date_updated', 'date_status_changed']
     ordering = ['-date_applied']
+    # Keyset pages on (ordering field, id), newest first unless ?ordering= says otherwise
+    pagination_class = KeysetPagination
+    read_model_actions = ('list', 'my_applications')
+    # Maximum queries per action, including the JWT user lookup
+    query_budgets = {
+        'list': 4,
+        'my_applications': 4,
+        'retrieve': 4,
+        'my_activities': 2,
+        'status_options': 1,
+    }
 
     def _log_activity(self, user, action, description, metadata=None):
         """Helper method to create activity logs"""
@@ -101,26 +130,49 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     def get_permissions(self):
         if self.action in ['create', 'my_applications', 'my_activities']:
             permission_classes = [permissions.IsAuthenticated]
-        elif self.action in ['approve', 'reject', 'defer', 'waitlist']:
+        elif self.action in ['approve', 'reject', 'defer', 'waitlist', 'bulk_transition']:
             permission_classes = [permissions.IsAuthenticated, IsAdminForStatusChange]
         else:
             permission_classes = [permissions.IsAuthenticated, IsStudentOwnerOrAdmin]
         return [permission() for permission in permission_classes]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # Lists filter and paginate the flat read model, other actions load applications
+        if self.action in self.read_model_actions:
+            queryset = ApplicationReadModel.objects.all()
+        else:
+            queryset = super().get_queryset()
         
         # Students can only see their own applications
         if not self.request.user.is_staff:
-            queryset = queryset.filter(student=self.request.user)
+            queryset = queryset.filter(student_id=self.request.user.pk)
         
         # Additional filtering for admins
         if self.request.user.is_staff and 'student_id' in self.request.query_params:
             queryset = queryset.filter(student_id=self.request.query_params['student_id'])
-        print(f"Queryset filtered for user {self.request.user.username}: {queryset}")
-            
         return queryset
 
+    def filter_queryset(self, queryset):
+        if queryset.model is not ApplicationReadModel:
+            return super().filter_queryset(queryset)
+        filterset = ApplicationReadModelFilter(self.request.query_params, queryset=queryset, request=self.request)
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+        # The read model has the same date columns, so ?ordering= applies to it unchanged
+        return filters.OrderingFilter().filter_queryset(self.request, filterset.qs, self)
+
+    def _read_model_response(self, queryset):
+        """Paginate read-model rows, then load just that page of applications for serialization"""
+        rows = self.paginate_queryset(queryset)
+        ids = [row.application_id for row in rows]
+        applications = ApplicationListSerializer.setup_eager_loading(Application.objects.all()).in_bulk(ids)
+        page = [applications[pk] for pk in ids if pk in applications]
+        serializer = timed(ApplicationListSerializer)(page, many=True, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+
+    def list(self, request, *args, **kwargs):
+        return self._read_model_response(self.filter_queryset(self.get_queryset()))
+
     def perform_create(self, serializer):
         application = serializer.save(student=self.request.user)
         files = self.request.FILES.getlist('documents')
@@ -144,6 +196,17 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 file=file
             )
 
+        send_application_confirmation(application, self.request)
+
+        # Enroller rules may decide the application straight away
+        decided = admission_rules.apply_rules(
+            Application.objects.filter(pk=application.pk),
+            institution_id=application.program.department.faculty.institution_id,
+            base_url=self.request.build_absolute_uri('/'),
+        )
+        if decided:
+            application.refresh_from_db(fields=['status', 'date_status_changed', 'date_updated'])
+
     def perform_update(self, serializer):
         old_status = self.get_object().status
         application = serializer.save()
@@ -201,22 +264,26 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         super().perform_destroy(instance)
 
     def _change_status(self, request, pk, new_status):
-        print(f"Received status change request: {request.data}")
+        logger.debug("Received status change request: %s", request.data)
         application = self.get_object()
         old_status = application.status
         serializer = self.get_serializer(application, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         
         try:
-            # Update the status
-            application.status = new_status
-            application.admin_notes = serializer.validated_data.get('admin_notes', '')
-            application.save()
-            
-            # Log the status change
-            self._log_status_change(application, old_status)
-            
-            return Response(ApplicationSerializer(application).data)
+            with transaction.atomic():
+                # Update the status
+                application.status = new_status
+                application.admin_notes = serializer.validated_data.get('admin_notes', '')
+                application.save()
+
+                # Log the status change
+                self._log_status_change(application, old_status)
+
+                # Queued in the outbox, delivered after commit
+                send_status_email(application, request)
+
+            return Response(timed(ApplicationSerializer)(application).data)
         except Exception as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -231,50 +298,64 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], serializer_class=ApplicationStatusSerializer)
     def approved(self, request, pk=None):
         """Approve an application"""
-        response = self._change_status(request, pk, 'Approved')
-        if response.status_code == 200:
-            application = self.get_object()
-            send_status_email(application, request)
-        return response
+        return self._change_status(request, pk, 'Approved')
 
     @action(detail=True, methods=['post'], serializer_class=ApplicationStatusSerializer)
     def rejected(self, request, pk=None):
         """Reject an application"""
-        response = self._change_status(request, pk, 'Rejected')
-        if response.status_code == 200:
-            application = self.get_object()
-            send_status_email(application, request)
-        return response
+        return self._change_status(request, pk, 'Rejected')
 
     @action(detail=True, methods=['post'], serializer_class=ApplicationStatusSerializer)
     def deferred(self, request, pk=None):
         """Defer an application"""
-        response = self._change_status(request, pk, 'Deferred')
-        if response.status_code == 200:
-            application = self.get_object()
-            send_status_email(application, request)
-        return response
+        return self._change_status(request, pk, 'Deferred')
 
     @action(detail=True, methods=['post'], serializer_class=ApplicationStatusSerializer)
     def waitlisted(self, request, pk=None):
         """Waitlist an application"""
-        response = self._change_status(request, pk, 'Waitlisted')
-        if response.status_code == 200:
-            application = self.get_object()
-            send_status_email(application, request)
-        return response
+        return self._change_status(request, pk, 'Waitlisted')
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition', serializer_class=BulkTransitionSerializer)
+    def bulk_transition(self, request):
+        """Move many applications to one status; invalid transitions are skipped and reported"""
+        serializer = BulkTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        applications = Application.objects.all()
+        if not request.user.is_system_admin:
+            if not request.user.assigned_institution_id:
+                return Response(
+                    {"error": "You are not assigned to an institution"},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            applications = applications.filter(
+                program__department__faculty__institution_id=request.user.assigned_institution_id
+            )
+        try:
+            with transaction.atomic():
+                updated_ids, skipped = transitions.bulk_transition(
+                    applications,
+                    serializer.validated_data['ids'],
+                    serializer.validated_data['status'],
+                    request.user,
+                    serializer.validated_data.get('admin_notes'),
+                )
+                send_status_emails(updated_ids, request.user, request.build_absolute_uri('/'))
+        except transitions.TransitionConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        return Response({
+            'status': serializer.validated_data['status'],
+            'updated': len(updated_ids),
+            'updated_ids': updated_ids,
+            'skipped': skipped,
+        })
 
     @action(detail=False, methods=['get'])
     def my_applications(self, request):
         """Get current user's applications"""
-        queryset = self.filter_queryset(self.get_queryset().filter(student=request.user))
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = self.filter_queryset(self.get_queryset().filter(student_id=request.user.pk))
+        return self._read_model_response(queryset)
 
     @action(detail=False, methods=['get'])
     def my_activities(self, request):
@@ -282,10 +363,10 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         activities = ActivityLog.objects.filter(user=request.user).order_by('-timestamp')
         page = self.paginate_queryset(activities)
         if page is not None:
-            serializer = ActivityLogSerializer(page, many=True)
+            serializer = timed(ActivityLogSerializer)(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = ActivityLogSerializer(activities, many=True)
+        serializer = timed(ActivityLogSerializer)(activities, many=True)
         return Response(serializer.data)
     
 @api_view(['GET'])
@@ -314,6 +395,7 @@ def check_application(request):
 
 class EnrollmentViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    query_budgets = {'dashboard': 5, 'stats': 8}
 
     @action(
         detail=False,
@@ -331,9 +413,13 @@ class EnrollmentViewSet(viewsets.ViewSet):
             )
         
         # Determine the institution for filtering
-        institution_filter = {}
+        applications = ApplicationReadModel.objects.all()
+        institution_id = None
+        deadlines_filter = {}
         if user.is_enroller and user.assigned_institution:
-            institution_filter['program__department__faculty__institution'] = user.assigned_institution
+            institution_id = user.assigned_institution_id
+            applications = applications.filter(institution_id=institution_id)
+            deadlines_filter['institution_id'] = institution_id
             # For displaying institution name on the dashboard
             institution_name = user.assigned_institution.name
         elif user.is_system_admin:
@@ -346,84 +432,32 @@ class EnrollmentViewSet(viewsets.ViewSet):
             )
 
         try:
-            # --- Stats Overview ---
-            total_applications = Application.objects.filter(**institution_filter).count()
-            pending_review = Application.objects.filter(status='Pending', **institution_filter).count()
-            approved = Application.objects.filter(status='Approved', **institution_filter).count()
-            rejected = Application.objects.filter(status='Rejected', **institution_filter).count()
+            # --- Stats Overview, from the daily rollup ---
+            status_counts = daily_stats.status_counts(institution_id)
+            total_applications = sum(status_counts.values())
+            pending_review = status_counts.get('Pending', 0)
+            approved = status_counts.get('Approved', 0)
+            rejected = status_counts.get('Rejected', 0)
 
             # --- Pending Applications for Enroller's review ---
-            pending_applications_qs = Application.objects.filter(status='Pending', **institution_filter).select_related('student__user', 'program').order_by('-date_applied')[:5]
+            pending_applications_qs = applications.filter(status='Pending').values(
+                'application_id', 'student_name', 'program_name', 'date_applied'
+            )[:5]
             pending_applications_data = []
             for app in pending_applications_qs:
                 pending_applications_data.append({
-                    'id': app.id,
-                    'student_name': app.student.user.name if app.student and app.student.user else 'N/A',
-                    'program_name': app.program.name if app.program else 'N/A',
-                    'date_applied': app.date_applied.isoformat()
+                    'id': app['application_id'],
+                    'student_name': app['student_name'] or 'N/A',
+                    'program_name': app['program_name'] or 'N/A',
+                    'date_applied': app['date_applied'].isoformat()
                 })
 
-            # --- Upcoming Deadlines (filtered by institution's programs if applicable) ---
+            # --- Upcoming Deadlines, for the enroller's institution or all of them ---
             today = datetime.now().date()
-            
-            # Fetch programs related to the enroller's institution
-            if user.is_enroller and user.assigned_institution:
-                # Get all programs under the assigned institution
-                institution_programs_ids = Program.objects.filter(
-                    department__faculty__institution=user.assigned_institution
-                ).values_list('id', flat=True)
-                
-                # Filter deadlines associated with these programs. This assumes Deadlines are linked to Programs.
-                # If Deadlines are global, this logic needs adjustment.
-                # Assuming Deadline has a ManyToMany or ForeignKey to Program. If not, you'll need to adapt.
-                # For now, let's assume Deadlines might be generally applicable or linked to Institution directly.
-                # If Deadline is not linked to Program/Institution:
-                upcoming_deadlines_qs = [] # Default to empty if no specific institution link
-                # If Deadline can be linked to an institution: (add institution FK to Deadline model)
-                # upcoming_deadlines_qs = Deadline.objects.filter(
-                #     date__gte=today,
-                #     is_active=True,
-                #     institution=user.assigned_institution # Requires 'institution' FK on Deadline model
-                # ).order_by('date')[:5]
-                # If no direct link, it might be a general deadline for all applications
-                upcoming_deadlines_qs = [] # You need to define how deadlines relate to institutions.
-                # For this example, let's assume general deadlines or implement a placeholder:
-                upcoming_deadlines_qs = [] # Placeholder: You need to define how deadlines relate to programs/institutions.
-                                           # If Deadlines are global, remove this filter.
-                                           # If Deadlines are per Program, you'd filter:
-                                           # Deadline.objects.filter(date__gte=today, is_active=True, program__in=institution_programs_ids).order_by('date')[:5]
-            else: # System admin or no assigned institution (show all global deadlines if they exist)
-                upcoming_deadlines_qs = [] # Placeholder: You need to define how deadlines relate to programs/institutions.
-            
-            # Let's use a simpler approach for deadlines for now, assuming they are either global
-            # or you will link them to Institution in your `Deadline` model.
-            # For demonstration, I'll fetch general deadlines. If you have `institution` FK on Deadline, filter by that.
-            upcoming_deadlines = [] # Initialize
-            # Example if Deadline had an 'institution' FK:
-            # deadlines_filter = {}
-            # if user.is_enroller and user.assigned_institution:
-            #     deadlines_filter['institution'] = user.assigned_institution
-            # upcoming_deadlines_qs = Deadline.objects.filter(
-            #     date__gte=today,
-            #     is_active=True,
-            #     **deadlines_filter
-            # ).order_by('date')[:5]
-            # for deadline in upcoming_deadlines_qs:
-            #     upcoming_deadlines.append({
-            #         'title': f"Application Deadline for {deadline.semester}",
-            #         'date': deadline.date.isoformat(),
-            #         'semester': deadline.semester
-            #     })
-
-            # Placeholder for upcoming_deadlines if you don't have a concrete implementation yet
-            deadlines = Deadline.objects.filter(
-                institution=user.institution
+            deadlines = list(
+                Deadline.objects.filter(date__gte=today, is_active=True, **deadlines_filter)
+                .values('title', 'date', 'semester')[:5]
             )
-            upcoming_deadlines_data = [
-                {'title': 'General Application Period Closes', 'date': (today + timedelta(days=30)).isoformat(), 'semester': 'Fall'},
-                {'title': 'Early Bird Deadline', 'date': (today + timedelta(days=60)).isoformat(), 'semester': 'Spring'}
-            ]
-
 
             # This is where you would generate your chart. For now, it's a placeholder.
             metrics_chart_base64 = "" # This would come from your chart generation logic (e.g., matplotlib)
@@ -461,101 +495,9 @@ class EnrollmentViewSet(viewsets.ViewSet):
         authentication_classes=[]
     )
     def stats(self, request):
-        today = datetime.now().date()
-        current_year_start = datetime(today.year, 1, 1).date()
-        last_year_start = datetime(today.year - 1, 1, 1).date()
-
         try:
-            # 1. Most popular programs (top 6)
-            popular_programs = Program.objects.annotate(
-                applicant_count=Count('applications')
-            ).order_by('-applicant_count')[:6].values('name', 'applicant_count')
-
-            # Assign colors to programs for consistent chart display
-            colors = ['#0d9488', '#1a365d', '#0f766e', '#0d9488', '#1a365d', '#0f766e']
-            for i, program in enumerate(popular_programs):
-                program['fill'] = colors[i % len(colors)]
-
-            # 2. Total applicants count
-            total_applicants = Application.objects.count()
-
-            # 3. Applicant growth compared to last year
-            current_year_applicants = Application.objects.filter(
-                date_applied__gte=current_year_start
-            ).count()
-
-            last_year_applicants = Application.objects.filter(
-                date_applied__gte=last_year_start,
-                date_applied__lt=current_year_start
-            ).count()
-
-            applicant_growth = 0
-            if last_year_applicants > 0:
-                applicant_growth = round(
-                    ((current_year_applicants - last_year_applicants) / last_year_applicants) * 100,
-                    1
-                )
-
-            # 4. Total programs and universities
-            total_programs = Program.objects.count()
-            total_universities = Institution.objects.count()
-
-            avg_processing_time = Application.objects.filter(
-                status__in=['Approved', 'Rejected']
-            ).aggregate(
-                avg_days=Avg(
-                    F('date_status_changed') - F('date_applied')
-                )
-            )['avg_days'] or timedelta(days=0)
-
-            if isinstance(avg_processing_time, timedelta):
-                avg_processing_time = avg_processing_time.days
-
-            last_year_processing = Application.objects.filter(
-                status__in=['Approved', 'Rejected'],
-                date_status_changed__gte=last_year_start,
-                date_status_changed__lt=current_year_start
-            ).aggregate(
-                avg_days=Avg(
-                    F('date_status_changed') - F('date_applied')
-                )
-            )['avg_days'] or timedelta(days=0)
-
-            if isinstance(last_year_processing, timedelta):
-                last_year_processing = last_year_processing.days
-
-            processing_improvement = 0
-            if last_year_processing > 0:
-                processing_improvement = round(last_year_processing - avg_processing_time)
-
-            # 7. Application deadline
-            # If Deadline model is linked to Institution, you might want to filter here too.
-            # Assuming Deadlines are global or a different endpoint serves institution-specific ones
-            next_deadline = None # Placeholder. Implement actual deadline logic here.
-            
-            # Example if Deadline had an 'institution' FK:
-            # next_deadline = Deadline.objects.filter(
-            #     date__gte=today,
-            #     is_active=True
-            # ).order_by('date').first()
-            
-            deadline_data = {
-                'deadline': next_deadline.date if next_deadline else None,
-                'semester': next_deadline.semester if next_deadline else 'Fall Semester'
-            }
-            return Response({
-                'popular_programs': popular_programs,
-                'total_applicants': total_applicants,
-                'applicant_growth': applicant_growth,
-                'total_programs': total_programs,
-                'total_universities': total_universities,
-                'avg_processing_time': avg_processing_time,
-                'processing_improvement': processing_improvement,
-                'deadline': deadline_data['deadline'],
-                'semester': deadline_data['semester'],
-                'last_updated': datetime.now().isoformat()
-            })
-
+            # Served from cache, refreshed off the request path once stale
+            return Response(public_stats.get_stats())
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -564,6 +506,7 @@ class EnrollmentViewSet(viewsets.ViewSet):
             
 class EnrollerActionsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    query_budgets = {'recommendations': 7, 'messages': 5}
 
     @action(detail=True, methods=['post'])
     def request_documents(self, request, pk=None):
@@ -575,27 +518,28 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
         serializer.is_valid(raise_exception=True)
 
         try:
-            # Save the document request to application
-            application.admin_notes = (
-                f"DOCUMENT REQUESTED: {serializer.validated_data['documents_requested']}\n"
-                f"{application.admin_notes or ''}"
-            )
-            application.save()
-
-            # Log activity
-            self._log_activity(
-                user=request.user,
-                application=application,
-                action='DOCUMENT_REQUEST',
-                description=f"Requested documents: {serializer.validated_data['documents_requested']}"
-            )
+            with transaction.atomic():
+                # Save the document request to application
+                application.admin_notes = (
+                    f"DOCUMENT REQUESTED: {serializer.validated_data['documents_requested']}\n"
+                    f"{application.admin_notes or ''}"
+                )
+                application.save()
+
+                # Log activity
+                self._log_activity(
+                    user=request.user,
+                    application=application,
+                    action='DOCUMENT_REQUEST',
+                    description=f"Requested documents: {serializer.validated_data['documents_requested']}"
+                )
 
-            # Send email notification to student
-            send_document_request_email(
-                application=application,
-                documents_requested=serializer.validated_data['documents_requested'],
-                request=request
-            )
+                # Queue the email to the student, delivered after commit
+                send_document_request_email(
+                    application=application,
+                    documents_requested=serializer.validated_data['documents_requested'],
+                    request=request
+                )
 
             # Create notification for student
             send_notification(
@@ -627,27 +571,28 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
         try:
             alternative_program = Program.objects.get(id=serializer.validated_data['alternative_program_id'])
 
-            # Save the alternative offer to application notes
-            application.admin_notes = (
-                f"ALTERNATIVE PROGRAM OFFERED: {alternative_program.name}\n"
-                f"{application.admin_notes or ''}"
-            )
-            application.save()
-
-            # Log activity
-            self._log_activity(
-                user=request.user,
-                application=application,
-                action='ALTERNATIVE_OFFER',
-                description=f"Offered alternative program: {alternative_program.name}"
-            )
+            with transaction.atomic():
+                # Save the alternative offer to application notes
+                application.admin_notes = (
+                    f"ALTERNATIVE PROGRAM OFFERED: {alternative_program.name}\n"
+                    f"{application.admin_notes or ''}"
+                )
+                application.save()
+
+                # Log activity
+                self._log_activity(
+                    user=request.user,
+                    application=application,
+                    action='ALTERNATIVE_OFFER',
+                    description=f"Offered alternative program: {alternative_program.name}"
+                )
 
-            # Send email notification to student
-            send_program_alternative_email(
-                application=application,
-                alternative_program=alternative_program,
-                request=request
-            )
+                # Queue the email to the student, delivered after commit
+                send_program_alternative_email(
+                    application=application,
+                    alternative_program=alternative_program,
+                    request=request
+                )
 
             # Create notification for student
             send_notification(
@@ -685,28 +630,8 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
             # Get student's A-Level points or default to 0
             student_points = application.student.a_level_points or 0
             
-            # Get current program stats
-            current_program = application.program
-            current_stats = self._calculate_program_stats(current_program, student_points)
-
-            # Get alternative programs in the same faculty
-            alternatives = Program.objects.filter(
-                department__faculty=current_program.department.faculty
-            ).exclude(id=current_program.id)
-
-            # Calculate stats for alternatives
-            alternative_stats = []
-            for program in alternatives:
-                stats = self._calculate_program_stats(program, student_points)
-                alternative_stats.append(stats)
-
-            # Sort by acceptance probability (highest first)
-            alternative_stats.sort(key=lambda x: x['acceptance_probability'], reverse=True)
-
-            return Response({
-                'current_program': current_stats,
-                'alternatives': alternative_stats[:5]  # Return top 5 alternatives
-            })
+            # Score the current program and its faculty siblings in one pass
+            return Response(recommend_alternatives(application.program, student_points))
 
         except Exception as e:
             return Response(
@@ -723,11 +648,13 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
         
         try:
             messages = Message.objects.filter(
-                Q(sender=request.user, recipient=application.student) |
-                Q(sender=application.student, recipient=request.user)
+                conversation__in=conversations.thread(request.user.pk, application.student_id, application)
             ).order_by('-timestamp')
 
-            serializer = MessageSerializer(messages, many=True)
+            serializer = timed(MessageSerializer)(
+                messages, many=True,
+                context={'read_watermarks': read_state.message_watermarks(request.user.pk)}
+            )
             return Response(serializer.data)
 
         except Exception as e:
@@ -749,6 +676,7 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
             message = serializer.save(
                 sender=request.user,
                 recipient=application.student,
+                conversation=conversations.for_pair(request.user.pk, application.student_id, application),
                 text=serializer.validated_data['text']
             )
 
@@ -776,37 +704,6 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def _calculate_program_stats(self, program, student_points):
-        """
-        Calculate statistics and suitability for a program
-        """
-        applications = program.applications.exclude(student__a_level_points__isnull=True)
-        total_applicants = applications.count()
-
-        # Calculate acceptance probability
-        if total_applicants == 0:
-            acceptance_prob = 0.7 if student_points >= program.min_points_required else 0.3
-        else:
-            if student_points > program.min_points_required:
-                acceptance_prob = 0.8 - (0.3 * (applications.filter(student__a_level_points__gt=student_points).count() / total_applicants))
-            elif student_points == program.min_points_required:
-                acceptance_prob = 0.5
-            else:
-                acceptance_prob = 0.3 * (1 - (applications.filter(student__a_level_points__gt=student_points).count() / total_applicants))
-            
-            acceptance_prob = max(0.1, min(0.9, acceptance_prob))
-
-        return {
-            'program_id': program.id,
-            'program_name': program.name,
-            'program_code': program.code,
-            'institution': program.department.faculty.institution.name,
-            'min_points_required': program.min_points_required,
-            'student_points': student_points,
-            'acceptance_probability': round(acceptance_prob, 2),
-            'required_subjects': program.requirements
-        }
-
     def _log_activity(self, user, application, action, description):
         """Helper method to log activities"""
         ActivityLog.objects.create(
@@ -823,11 +720,14 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
     def get_application(self, pk):
         """Helper method to get and validate application"""
         try:
-            application = Application.objects.get(pk=pk)
+            application = Application.objects.select_related('student', 'program').get(pk=pk)
             # Verify enroller has access to this application
             if not (self.request.user.is_system_admin or 
                     (self.request.user.is_enroller and 
-                    self.request.user.assigned_institution == application.program.department.faculty.institution)):
+                    ApplicationReadModel.objects.filter(
+                        application_id=application.pk,
+                        institution_id=self.request.user.assigned_institution_id
+                    ).exists())):
                 raise PermissionError("You don't have permission to access this application")
             return application
         except Application.DoesNotExist:
@@ -835,17 +735,44 @@ class EnrollerActionsViewSet(viewsets.ViewSet):
 
 class NotificationViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
+    query_budgets = {'my_notifications': 3, 'since': 2, 'unread_count': 1, 'mark_all_as_read': 2}
+
+    def _read_context(self, request):
+        return {'read_watermarks': {request.user.pk: read_state.notification_watermark(request.user.pk)}}
 
     @action(detail=False, methods=['get'])
     def my_notifications(self, request):
         """Get notifications for the current user"""
-        notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        notifications = Notification.objects.filter(user=request.user)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(notifications, request, view=self)
+        serializer = timed(NotificationSerializer)(page, many=True, context=self._read_context(request))
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Unread notifications above the read watermark"""
+        return Response({'unread': read_state.unread_notifications(request.user.pk)})
+
+    @action(detail=False, methods=['get'])
+    def since(self, request):
+        """Notifications newer than ?id=, oldest first: the polling fallback of notifications/stream/"""
+        try:
+            since = int(request.query_params.get('id', 0))
+        except ValueError:
+            return Response({"error": "id must be a notification id"}, status=status.HTTP_400_BAD_REQUEST)
+        notifications = list(
+            Notification.objects.filter(user=request.user, id__gt=since).order_by('id')[:100]
+        )
+        return Response({
+            'results': timed(NotificationSerializer)(notifications, many=True, context=self._read_context(request)).data,
+            'last_id': notifications[-1].id if notifications else since,
+        })
 
     @action(detail=False, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """Mark a specific notification as read"""
+        pk = pk or request.data.get('id') or request.query_params.get('id')
         try:    
             notification = Notification.objects.get(id=pk, user=request.user)
             notification.mark_as_read()
@@ -854,10 +781,28 @@ class NotificationViewSet(viewsets.ViewSet):
             return Response({"error": "Notification not found"}, status=status.HTTP_404_NOT_FOUND)
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
-        """Mark all notifications as read"""
-        notifications = Notification.objects.filter(user=request.user, is_read=False)
-        if not notifications.exists():
+        """Mark all notifications (or those up to ?up_to=<id>) as read by moving the read watermark"""
+        up_to = request.data.get('up_to') or request.query_params.get('up_to')
+        try:
+            up_to = int(up_to) if up_to is not None else None
+        except (TypeError, ValueError):
+            return Response({"error": "up_to must be a notification id"}, status=status.HTTP_400_BAD_REQUEST)
+        last_read_id = read_state.mark_notifications_read(request.user.pk, up_to)
+        if last_read_id is None:
             return Response({"status": "No unread notifications"}, status=status.HTTP_204_NO_CONTENT)
-        
-        notifications.update(is_read=True, read_at=timezone.now())
-        return Response({"status": "All notifications marked as read"}, status=status.HTTP_200_OK)
+        return Response(
+            {"status": "All notifications marked as read", "last_read_id": last_read_id},
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'], url_path=r'fanouts/(?P<fanout_id>\d+)')
+    def fanout(self, request, fanout_id=None):
+        """Progress of a notification fan-out started by the current user"""
+        fanouts = NotificationFanout.objects.all()
+        if not request.user.is_system_admin:
+            fanouts = fanouts.filter(created_by=request.user)
+        try:
+            job = fanouts.get(pk=fanout_id)
+        except NotificationFanout.DoesNotExist:
+            return Response({"error": "Notification fan-out not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(timed(NotificationFanoutSerializer)(job).data)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from applications.services.admission_rules import apply_rules
+
+
+class Command(BaseCommand):
+    help = "Apply every enroller's auto-accept, auto-review and auto-reject rules to pending applications"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--institution', type=int, help='Only apply the rules of this institution')
+
+    def handle(self, *args, **options):
+        results = apply_rules(institution_id=options['institution'])
+        summary = ', '.join(f'{count} {status.lower()}' for status, count in results.items()) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(f'Admission rules decided {summary}'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from applications.services.outbox import deliver, queue_depth
+
+
+class Command(BaseCommand):
+    help = 'Send the due emails in the outbox over one connection of the configured EMAIL_BACKEND'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows read and updated per batch')
+        parser.add_argument('--limit', type=int, help='Stop after attempting this many emails')
+
+    def handle(self, *args, **options):
+        sent, failed = deliver(batch_size=options['batch_size'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} emails, {failed} failed attempts; queue {queue_depth()}'))
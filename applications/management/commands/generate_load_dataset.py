@@ -0,0 +1,272 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from applications.models.models import Application, ActivityLog, Message, Notification
+from applications.services.conversations import rebuild_conversations
+from applications.services.daily_stats import rebuild_daily_stats
+from applications.services.histogram import rebuild_histogram
+from applications.services.read_model import rebuild_read_model
+from institutions.models import Institution, Program
+
+User = get_user_model()
+
+FIRST_NAMES = ['Tendai', 'Rudo', 'Tatenda', 'Farai', 'Nyasha', 'Kudzai', 'Tafadzwa', 'Chipo', 'Tinashe', 'Rumbi',
+               'Blessing', 'Takunda', 'Vimbai', 'Simba', 'Ruvimbo', 'Kuda', 'Anesu', 'Panashe', 'Munashe', 'Tanaka']
+LAST_NAMES = ['Moyo', 'Ncube', 'Dube', 'Sibanda', 'Mpofu', 'Chikwanha', 'Mutasa', 'Banda', 'Nyathi', 'Gumbo',
+              'Mlambo', 'Chirwa', 'Marufu', 'Zulu', 'Makoni', 'Shumba', 'Mhlanga', 'Hove', 'Ndlovu', 'Murwira']
+PROVINCES = ['Harare', 'Bulawayo', 'Manicaland', 'Mashonaland East', 'Masvingo', 'Midlands', 'Matabeleland North']
+STATUS_WEIGHTS = {'Pending': 50, 'Approved': 15, 'Rejected': 15, 'Deferred': 5, 'Waitlisted': 10, 'Withdrawn': 5}
+MESSAGE_TEXTS = [
+    'Please upload a certified copy of your A-Level results.',
+    'Your application is under review by the faculty.',
+    'Thank you, I have uploaded the documents.',
+    'When can I expect a decision on my application?',
+    'We have offered you an alternative program, please check your notifications.',
+]
+
+# Prefix of every generated username, used to find the load-test users again
+USERNAME_PREFIX = 'load'
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep the dates we generate instead of auto_now(_add)"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create realistic students, applications, messages, notifications and activity '
+        'logs for load testing, then rebuild the derived tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=10000)
+        parser.add_argument('--applications', type=int, default=30000)
+        parser.add_argument('--messages', type=int, help='Defaults to half the applications')
+        parser.add_argument('--notifications', type=int, help='Defaults to the number of applications')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--days', type=int, default=730, help='Spread dates over this many past days')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+
+        program_ids = list(Program.objects.values_list('id', flat=True))
+        if not program_ids:
+            raise CommandError('No programs found, run seed_data first')
+        institution_ids = list(Institution.objects.values_list('id', flat=True))
+
+        self.run = f'{USERNAME_PREFIX}{self.now:%y%m%d%H%M%S}'
+        self.password = make_password('loadtest')
+
+        with transaction.atomic():
+            staff = self.create_staff(institution_ids)
+            student_ids = self.create_students(options['students'])
+            applications = self.create_applications(student_ids, program_ids, options['applications'])
+            messages = options['messages'] if options['messages'] is not None else len(applications) // 2
+            notifications = options['notifications'] if options['notifications'] is not None else len(applications)
+            self.create_messages(applications, staff, messages)
+            self.create_notifications(student_ids, notifications)
+
+            # bulk_create skips the signals that maintain these tables
+            self.stdout.write('Rebuilding derived tables...')
+            rebuild_histogram()
+            rebuild_read_model()
+            rebuild_daily_stats()
+            rebuild_conversations()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(student_ids)} students, {len(applications)} applications, '
+            f'{messages} messages and {notifications} notifications (run "{self.run}", password "loadtest")'
+        ))
+
+    def past(self, after=None):
+        start = after or self.now - timedelta(days=self.days)
+        span = max((self.now - start).total_seconds(), 1)
+        return start + timedelta(seconds=self.random.uniform(0, span))
+
+    def bulk(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_staff(self, institution_ids):
+        """One enroller per institution plus a system admin; returns {institution_id: enroller_id}"""
+        users = [
+            User(
+                username=f'{self.run}-enroller-{institution_id}',
+                email=f'{self.run}-enroller-{institution_id}@example.com',
+                name=f'Enroller {institution_id}',
+                password=self.password,
+                is_enroller=True,
+                assigned_institution_id=institution_id,
+            )
+            for institution_id in institution_ids
+        ]
+        users.append(User(
+            username=f'{self.run}-admin',
+            email=f'{self.run}-admin@example.com',
+            name='Load Test Admin',
+            password=self.password,
+            is_system_admin=True,
+            is_staff=True,
+        ))
+        self.bulk(User, users)
+        return {user.assigned_institution_id: user.pk for user in users if user.is_enroller}
+
+    def create_students(self, count):
+        student_ids = []
+        batch = []
+        for i in range(count):
+            first, last = self.random.choice(FIRST_NAMES), self.random.choice(LAST_NAMES)
+            user = User(
+                username=f'{self.run}-student-{i}',
+                email=f'{self.run}-student-{i}@example.com',
+                name=f'{first} {last}',
+                first_name=first,
+                last_name=last,
+                password=self.password,
+                is_student=True,
+                a_level_points=self.random.randint(2, 15),
+                o_level_subjects=self.random.randint(5, 11),
+                province=self.random.choice(PROVINCES),
+                country='Zimbabwe',
+                date_joined=self.past(),
+            )
+            batch.append(user)
+            student_ids.append(user.pk)
+            if len(batch) == self.batch_size:
+                self.bulk(User, batch)
+                batch = []
+        self.bulk(User, batch)
+        self.stdout.write(f'  {len(student_ids)} students')
+        return student_ids
+
+    def create_applications(self, student_ids, program_ids, count):
+        """Returns [(application_id, student_id, program_id)] for the rows created"""
+        if not student_ids:
+            return []
+        per_student = min(max(count // len(student_ids), 1), len(program_ids))
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        fields = [Application._meta.get_field(name) for name in ('date_applied', 'date_updated')]
+
+        created, batch = [], []
+        with explicit_timestamps(*fields):
+            for student_id in student_ids:
+                remaining = count - len(created) - len(batch)
+                if remaining <= 0:
+                    break
+                for program_id in self.random.sample(program_ids, min(per_student, remaining)):
+                    status = self.random.choices(statuses, weights)[0]
+                    applied = self.past()
+                    changed = None if status == 'Pending' else self.past(applied)
+                    batch.append(Application(
+                        student_id=student_id,
+                        program_id=program_id,
+                        status=status,
+                        personal_statement='I am passionate about this field and eager to learn.',
+                        date_applied=applied,
+                        date_updated=changed or applied,
+                        date_status_changed=changed,
+                    ))
+                if len(batch) >= self.batch_size:
+                    created += self.flush_applications(batch)
+                    batch = []
+            created += self.flush_applications(batch)
+        self.stdout.write(f'  {len(created)} applications')
+        return created
+
+    def flush_applications(self, batch):
+        if not batch:
+            return []
+        self.bulk(Application, batch)
+        # SQLite and PostgreSQL return the new ids from bulk_create
+        logs = [
+            ActivityLog(
+                user_id=application.student_id,
+                action='CREATED',
+                description='Created application',
+                timestamp=application.date_applied,
+                metadata={'application_id': application.pk, 'program_id': application.program_id},
+            )
+            for application in batch
+        ]
+        with explicit_timestamps(ActivityLog._meta.get_field('timestamp')):
+            self.bulk(ActivityLog, logs)
+        return [(application.pk, application.student_id, application.program_id) for application in batch]
+
+    def create_messages(self, applications, staff, count):
+        if not applications or not staff or not count:
+            return
+        institution_of = dict(
+            Program.objects.values_list('id', 'department__faculty__institution_id')
+        )
+        batch, logs = [], []
+        with explicit_timestamps(Message._meta.get_field('timestamp'), ActivityLog._meta.get_field('timestamp')):
+            for i in range(count):
+                application_id, student_id, program_id = self.random.choice(applications)
+                enroller_id = staff.get(institution_of[program_id])
+                if enroller_id is None:
+                    continue
+                sender, recipient = (enroller_id, student_id) if i % 2 == 0 else (student_id, enroller_id)
+                timestamp = self.past()
+                batch.append(Message(
+                    sender_id=sender,
+                    recipient_id=recipient,
+                    text=self.random.choice(MESSAGE_TEXTS),
+                    timestamp=timestamp,
+                    is_read=self.random.random() < 0.6,
+                ))
+                logs.append(ActivityLog(
+                    user_id=sender,
+                    action='MESSAGE',
+                    description='Sent message',
+                    timestamp=timestamp,
+                    metadata={'application_id': application_id},
+                ))
+                if len(batch) == self.batch_size:
+                    self.bulk(Message, batch)
+                    self.bulk(ActivityLog, logs)
+                    batch, logs = [], []
+            self.bulk(Message, batch)
+            self.bulk(ActivityLog, logs)
+        self.stdout.write(f'  {count} messages')
+
+    def create_notifications(self, student_ids, count):
+        if not student_ids or not count:
+            return
+        types = [choice for choice, _ in Notification.NOTIFICATION_TYPES]
+        batch = []
+        with explicit_timestamps(Notification._meta.get_field('created_at')):
+            for _ in range(count):
+                created = self.past()
+                is_read = self.random.random() < 0.5
+                batch.append(Notification(
+                    user_id=self.random.choice(student_ids),
+                    title='Application update',
+                    message='There is an update on one of your applications.',
+                    notification_type=self.random.choice(types),
+                    is_read=is_read,
+                    created_at=created,
+                    read_at=self.past(created) if is_read else None,
+                ))
+                if len(batch) == self.batch_size:
+                    self.bulk(Notification, batch)
+                    batch = []
+            self.bulk(Notification, batch)
+        self.stdout.write(f'  {count} notifications')
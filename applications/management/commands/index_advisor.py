@@ -0,0 +1,308 @@
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, migrations, models, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse, NoReverseMatch, URLPattern, URLResolver
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from institutions.models import Institution
+
+User = get_user_model()
+
+# Plan details that mean SQLite reads the whole table or sorts in a temp b-tree
+FULL_SCAN = re.compile(r'^SCAN (?P<table>\w+)(?: AS \w+)?$')
+TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (?P<purpose>.+)$')
+
+COLUMN = r'"(?P<table>\w+)"\."(?P<column>\w+)"'
+EQUALITY = re.compile(COLUMN + r' (?:= |IN \(|IS (?!NOT))')
+RANGE = re.compile(COLUMN + r' (?:<|>|<=|>=|BETWEEN) ')
+# Django renders boolean filters as a bare (optionally negated) column
+BOOLEAN = re.compile(r'(?P<negated>NOT )?' + COLUMN + r'(?=\s*(?:AND |OR |\)|$))')
+# Literals replaced to group queries that only differ by their parameters
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+ORDER_BY = re.compile(r'ORDER BY (?P<columns>.+?)(?: LIMIT| OFFSET|$)')
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay every GET route registered on the DRF routers through the test client, '
+        'run EXPLAIN QUERY PLAN on the captured SQL and emit AddIndex migrations with the '
+        'recommended composite and partial indexes, one per app that owns the tables'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print the report and migrations without writing files')
+        parser.add_argument('--skip', action='append', default=[],
+                            help='Skip URL paths containing this text (repeatable)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('index_advisor relies on SQLite EXPLAIN QUERY PLAN')
+
+        # Replay inside a transaction that is always rolled back, so the
+        # throwaway users and anything the endpoints write never persist
+        with transaction.atomic():
+            workload = self.capture_workload(options['skip'])
+            findings = self.explain(workload)
+            transaction.set_rollback(True)
+
+        recommendations = self.recommend(findings)
+        self.report(workload, findings, recommendations)
+        if not recommendations:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found'))
+            return
+
+        for migration_source, path in self.render_migrations(recommendations):
+            if options['dry_run']:
+                self.stdout.write(migration_source)
+                continue
+            path.write_text(migration_source)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path}'))
+
+    # Workload capture
+
+    def capture_workload(self, skip):
+        """Return {query shape: (sample sql, endpoint paths)} for every SELECT the GET routes issue"""
+        workload = OrderedDict()
+        clients = self.role_clients()
+        for path in self.router_paths():
+            if any(fragment in path for fragment in skip):
+                continue
+            for role, client in clients.items():
+                with CaptureQueriesContext(connection) as queries:
+                    try:
+                        with transaction.atomic():
+                            client.get(path)
+                    except Exception as e:
+                        self.stderr.write(f'{role} GET {path} failed: {e}')
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if sql.startswith(('SELECT', 'WITH')):
+                        shape = LITERAL.sub('?', sql)
+                        workload.setdefault(shape, (sql, set()))[1].add(path)
+        return workload
+
+    def role_clients(self):
+        institution = Institution.objects.first()
+        suffix = uuid.uuid4().hex[:8]
+        roles = {
+            'student': {'is_student': True},
+            'enroller': {'is_enroller': True, 'assigned_institution': institution},
+            'university_admin': {'is_university_admin': True, 'assigned_institution': institution},
+            'system_admin': {'is_system_admin': True, 'is_staff': True},
+        }
+        clients = {}
+        for role, flags in roles.items():
+            user = User.objects.create_user(
+                email=f'index-advisor-{role}-{suffix}@example.com',
+                username=f'index-advisor-{role}-{suffix}',
+                name=f'Index Advisor {role}',
+                password=uuid.uuid4().hex,
+                **flags
+            )
+            client = APIClient()
+            client.force_authenticate(user)
+            clients[role] = client
+        return clients
+
+    def router_paths(self):
+        """Resolve every router-generated GET route, filling detail routes with a real pk"""
+        paths = []
+        for pattern in self._walk(get_resolver().url_patterns):
+            callback = pattern.callback
+            actions = getattr(callback, 'actions', None) or {}
+            if 'get' not in actions or not pattern.name:
+                continue
+            kwargs = {}
+            converters = pattern.pattern.regex.groupindex
+            if 'format' in converters:
+                continue
+            if converters:
+                pk = self._sample_pk(callback.cls)
+                if pk is None:
+                    continue
+                kwargs = {name: pk for name in converters}
+            try:
+                path = reverse(pattern.name, kwargs=kwargs)
+            except NoReverseMatch:
+                continue
+            if path not in paths:
+                paths.append(path)
+        return paths
+
+    def _walk(self, patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self._walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern):
+                yield pattern
+
+    def _sample_pk(self, view_class):
+        queryset = getattr(view_class, 'queryset', None)
+        if queryset is None:
+            return None
+        return queryset.model._default_manager.order_by().values_list('pk', flat=True).first()
+
+    # Plan analysis
+
+    def explain(self, workload):
+        """Return a list of (sql, paths, plan problems) for the queries with a bad plan"""
+        findings = []
+        with connection.cursor() as cursor:
+            for sql, paths in workload.values():
+                try:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                except Exception:
+                    continue
+                problems = []
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    scan = FULL_SCAN.match(detail)
+                    if scan:
+                        problems.append(('scan', scan.group('table')))
+                    elif TEMP_BTREE.search(detail):
+                        problems.append(('temp-btree', detail))
+                if problems:
+                    findings.append((sql, sorted(paths), problems))
+        return findings
+
+    def recommend(self, findings):
+        """Derive composite (and partial, for boolean filters) indexes from the flagged queries"""
+        existing = self._existing_index_columns()
+        recommendations = OrderedDict()
+        for sql, paths, problems in findings:
+            tables = {table for kind, table in problems if kind == 'scan'}
+            if any(kind == 'temp-btree' for kind, _ in problems):
+                tables |= self._ordered_tables(sql)
+            for table in tables:
+                index = self._index_for(sql, table)
+                if not index:
+                    continue
+                columns, condition = index
+                if any(cols[:len(columns)] == columns for cols in existing.get(table, [])):
+                    continue
+                key = (table, tuple(columns), condition)
+                recommendations.setdefault(key, set()).update(paths)
+        return recommendations
+
+    def _index_for(self, sql, table):
+        where, _, order = sql.partition(' ORDER BY ')
+        where = where.split(' WHERE ', 1)[1] if ' WHERE ' in where else ''
+
+        # A boolean filter makes the index partial: (column, value)
+        columns, condition, condition_column = [], None, None
+        for match in BOOLEAN.finditer(where):
+            if match.group('table') == table and condition is None:
+                condition_column = match.group('column')
+                condition = (condition_column, not match.group('negated'))
+        for pattern in (EQUALITY, RANGE):
+            for match in pattern.finditer(where):
+                column = match.group('column')
+                if match.group('table') != table or column in columns:
+                    continue
+                if column == condition_column:
+                    continue
+                columns.append(column)
+        order_match = ORDER_BY.search(f'ORDER BY {order}') if order else None
+        if order_match:
+            for match in re.finditer(COLUMN, order_match.group('columns')):
+                if match.group('table') == table and match.group('column') not in columns:
+                    columns.append(match.group('column'))
+        return (columns, condition) if columns else None
+
+    def _ordered_tables(self, sql):
+        _, _, order = sql.partition(' ORDER BY ')
+        return {match.group('table') for match in re.finditer(COLUMN, order)}
+
+    def _existing_index_columns(self):
+        existing = {}
+        with connection.cursor() as cursor:
+            for table in connection.introspection.table_names(cursor):
+                constraints = connection.introspection.get_constraints(cursor, table)
+                existing[table] = [
+                    list(info['columns']) for info in constraints.values()
+                    if (info['index'] or info['unique'] or info['primary_key']) and info['columns']
+                ]
+        return existing
+
+    # Output
+
+    def report(self, workload, findings, recommendations):
+        self.stdout.write(f'Captured {len(workload)} distinct SELECT query shapes')
+        for sql, paths, problems in findings:
+            summary = ', '.join(f'{kind} {detail}' for kind, detail in problems)
+            self.stdout.write(self.style.WARNING(f'[{summary}] from {", ".join(paths)}'))
+            self.stdout.write(f'    {sql[:300]}')
+        for (table, columns, condition), paths in recommendations.items():
+            partial = f' WHERE {condition[0]} = {condition[1]}' if condition else ''
+            self.stdout.write(self.style.SUCCESS(
+                f'Recommend index on {table}({", ".join(columns)}){partial} for {len(paths)} endpoint(s)'
+            ))
+
+    def build_index(self, model, columns, condition):
+        """
+        models.Index over the fields behind `columns`, named the way
+        Index.set_name_with_model names indexes: a hash of the table, the
+        columns and the suffix keeps long names apart. Partial indexes get
+        their own suffix, so they never share a name with the full index.
+        """
+        field_names = {field.column: field.name for field in model._meta.concrete_fields}
+        fields = [field_names[column] for column in columns]
+        named = models.Index(fields=fields)
+        if condition:
+            named.suffix = 'pt1' if condition[1] else 'pt0'
+        named.set_name_with_model(model)
+        if not condition:
+            return models.Index(fields=fields, name=named.name)
+        return models.Index(
+            fields=fields,
+            name=named.name,
+            condition=models.Q(**{field_names[condition[0]]: condition[1]})
+        )
+
+    def owning_model(self, table):
+        """The project model stored in `table`, or None for other apps' and unmodelled tables"""
+        for model in apps.get_models():
+            if model._meta.db_table != table:
+                continue
+            app_path = Path(model._meta.app_config.path).resolve()
+            if model._meta.managed and Path(settings.BASE_DIR).resolve() in app_path.parents:
+                return model
+        return None
+
+    def render_migrations(self, recommendations):
+        """[(source, path)] of one AddIndex migration per app owning a recommended table"""
+        operations = OrderedDict()
+        for (table, columns, condition), paths in recommendations.items():
+            model = self.owning_model(table)
+            if model is None:
+                self.stderr.write(f'Skipping {table}({", ".join(columns)}): not a model of this project')
+                continue
+            operations.setdefault(model._meta.app_label, []).append(migrations.AddIndex(
+                model_name=model._meta.model_name,
+                index=self.build_index(model, columns, condition),
+            ))
+
+        loader = MigrationLoader(connection, ignore_no_migrations=True)
+        rendered = []
+        for app_label, app_operations in operations.items():
+            leaves = loader.graph.leaf_nodes(app_label)
+            if len(leaves) != 1:
+                raise CommandError(f'{app_label} needs exactly one leaf migration to depend on, found {len(leaves)}')
+            leaf = leaves[0][1]
+            number = int(leaf.split('_', 1)[0]) + 1
+            migration = migrations.Migration(f'{number:04d}_index_advisor', app_label)
+            migration.dependencies = [(app_label, leaf)]
+            migration.operations = app_operations
+            writer = MigrationWriter(migration)
+            rendered.append((writer.as_string(), Path(writer.path)))
+        return rendered
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from applications.services.daily_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily application counts per program and status from the applications table'
+
+    def handle(self, *args, **kwargs):
+        buckets = rebuild_daily_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt application daily stats with {buckets} buckets'))
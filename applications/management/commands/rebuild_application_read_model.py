@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from applications.services.read_model import rebuild_read_model
+
+
+class Command(BaseCommand):
+    help = 'Backfill the flattened application read model from the applications table'
+
+    def handle(self, *args, **kwargs):
+        rows = rebuild_read_model()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt application read model with {rows} rows'))
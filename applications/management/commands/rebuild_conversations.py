@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from applications.services.conversations import rebuild_conversations
+
+
+class Command(BaseCommand):
+    help = 'Attach messages to conversations and recompute each conversation\'s last message and unread counters'
+
+    def handle(self, *args, **kwargs):
+        conversations = rebuild_conversations()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {conversations} conversations'))
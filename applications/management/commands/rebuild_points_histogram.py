@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from applications.services.histogram import rebuild_histogram
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-program applicant points histogram from the applications table'
+
+    def handle(self, *args, **kwargs):
+        buckets = rebuild_histogram()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt points histogram with {buckets} buckets'))
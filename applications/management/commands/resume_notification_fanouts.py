@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from applications.services.fanout import resume, resume_notification_fanouts
+
+
+class Command(BaseCommand):
+    help = 'Run pending and stalled notification fan-outs, or retry one failed fan-out from where it stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, help='Id of a failed fan-out to retry')
+
+    def handle(self, *args, **options):
+        if options['job']:
+            job = resume(options['job'])
+            if job is None:
+                self.stdout.write(self.style.WARNING(f"Fan-out {options['job']} is running or already done"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'Fan-out {job.id}: {job.sent}/{job.total} sent, {job.status}'))
+            return
+        job_ids = resume_notification_fanouts()
+        self.stdout.write(self.style.SUCCESS(f'Ran {len(job_ids)} notification fan-outs'))
@@ -0,0 +1,186 @@
+import json
+import queue
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from applications.models.models import ApplicationReadModel
+from applications.management.commands.generate_load_dataset import USERNAME_PREFIX
+
+User = get_user_model()
+
+# (name, role, url name, url kwargs, query string)
+SCENARIOS = [
+    ('enrollment-stats', 'anonymous', 'enrollment-stats', None, ''),
+    ('public-programs', 'anonymous', 'all-program-details', None, ''),
+    ('institutions', 'anonymous', 'institution-list', None, ''),
+    ('my-applications', 'student', 'application-my-applications', None, ''),
+    ('my-notifications', 'student', 'notification-my-notifications', None, ''),
+    ('messages', 'student', 'message-list', None, ''),
+    ('applications', 'enroller', 'application-list', None, ''),
+    ('applications-pending', 'enroller', 'application-list', None, '?status=Pending'),
+    ('enrollment-dashboard', 'enroller', 'enrollment-dashboard', None, ''),
+    ('application-recommendations', 'enroller', 'enroller-actions-recommendations', 'application', ''),
+    ('program-recommendations', 'enroller', 'programs-recommendations', 'program', '?points=10'),
+    ('system-admin-dashboard', 'system_admin', 'system-admin-dashboard-stats', None, ''),
+]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def fixed(value, width=8):
+    """`value` to one decimal, right-aligned; '-' when no request completed"""
+    return f'{value:>{width}.1f}' if value is not None else f'{"-":>{width}}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive the main API routes through the Django test client from a thread pool with a '
+        'JWT per role, and write p50/p95/p99 latency and throughput per endpoint to a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed requests per endpoint')
+        parser.add_argument('--only', action='append', default=[], help='Run only these scenario names')
+        parser.add_argument('--output', default='load_baseline.json')
+        parser.add_argument('--compare', help='Previous baseline to report p95 changes against')
+        parser.add_argument('--users', type=int, default=50, help='Students to spread requests over')
+
+    def handle(self, *args, **options):
+        scenarios = [s for s in SCENARIOS if not options['only'] or s[0] in options['only']]
+        if not scenarios:
+            raise CommandError(f'No scenario matches {options["only"]}')
+
+        self.identities = self.build_identities(options['users'])
+        results = {}
+        for scenario in scenarios:
+            results[scenario[0]] = self.run_scenario(scenario, options)
+            row = results[scenario[0]]
+            self.stdout.write(
+                f'{scenario[0]:<30} p50 {fixed(row["p50_ms"])}ms  p95 {fixed(row["p95_ms"])}ms  '
+                f'p99 {fixed(row["p99_ms"])}ms  {fixed(row["throughput_rps"], 7)} req/s  errors {row["errors"]}'
+            )
+
+        baseline = {
+            'generated_at': datetime.now().isoformat(),
+            'requests_per_endpoint': options['requests'],
+            'concurrency': options['concurrency'],
+            'endpoints': results,
+        }
+        Path(options['output']).write_text(json.dumps(baseline, indent=2))
+        self.stdout.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+
+        if options['compare']:
+            self.compare(json.loads(Path(options['compare']).read_text()), baseline)
+
+    def build_identities(self, student_count):
+        """Authorization headers per role, from the users made by generate_load_dataset"""
+        def header(user):
+            return f'Bearer {AccessToken.for_user(user)}'
+
+        load_users = User.objects.filter(username__startswith=USERNAME_PREFIX)
+        students = list(load_users.filter(is_student=True, applications__isnull=False).distinct()[:student_count])
+        enroller = load_users.filter(is_enroller=True, assigned_institution__isnull=False).order_by('-date_joined').first()
+        admin = load_users.filter(is_system_admin=True).order_by('-date_joined').first()
+        if not students or enroller is None or admin is None:
+            raise CommandError('No load-test users found, run generate_load_dataset first')
+
+        application_id = (
+            ApplicationReadModel.objects
+            .filter(institution_id=enroller.assigned_institution_id)
+            .values_list('application_id', flat=True)
+            .first()
+        )
+        program_id = (
+            ApplicationReadModel.objects
+            .filter(institution_id=enroller.assigned_institution_id)
+            .values_list('program_id', flat=True)
+            .first()
+        )
+        return {
+            'anonymous': [None],
+            'student': [header(student) for student in students],
+            'enroller': [header(enroller)],
+            'system_admin': [header(admin)],
+            'kwargs': {'application': application_id, 'program': program_id},
+        }
+
+    def run_scenario(self, scenario, options):
+        name, role, url_name, kwarg, query = scenario
+        kwargs = {'pk': self.identities['kwargs'][kwarg]} if kwarg else {}
+        path = reverse(url_name, kwargs=kwargs) + query
+        headers = self.identities[role]
+
+        jobs = queue.Queue()
+        for i in range(options['warmup'] + options['requests']):
+            jobs.put((i < options['warmup'], headers[i % len(headers)]))
+
+        latencies, statuses = [], Counter()
+        lock = threading.Lock()
+
+        def worker():
+            client = Client()
+            try:
+                while True:
+                    try:
+                        warmup, authorization = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    extra = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+                    start = time.perf_counter()
+                    response = client.get(path, **extra)
+                    elapsed = time.perf_counter() - start
+                    if not warmup:
+                        with lock:
+                            latencies.append(elapsed)
+                            statuses[response.status_code] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+        return {
+            'path': path,
+            'role': role,
+            'requests': len(latencies),
+            'errors': sum(count for code, count in statuses.items() if code >= 400),
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            'mean_ms': to_ms(statistics.fmean(latencies)) if latencies else None,
+            'p50_ms': to_ms(percentile(latencies, 0.50)),
+            'p95_ms': to_ms(percentile(latencies, 0.95)),
+            'p99_ms': to_ms(percentile(latencies, 0.99)),
+            'throughput_rps': round(len(latencies) / wall, 2) if wall else None,
+        }
+
+    def compare(self, previous, current):
+        self.stdout.write('p95 against previous baseline:')
+        for name, row in current['endpoints'].items():
+            before = previous.get('endpoints', {}).get(name)
+            if not before or not before.get('p95_ms') or row['p95_ms'] is None:
+                continue
+            change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            style = self.style.ERROR if change > 10 else self.style.SUCCESS
+            self.stdout.write(style(f'  {name:<30} {before["p95_ms"]:>8.1f} -> {row["p95_ms"]:>8.1f}ms ({change:+.0f}%)'))
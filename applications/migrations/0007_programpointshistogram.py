@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_histogram(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    ProgramPointsHistogram = apps.get_model('applications', 'ProgramPointsHistogram')
+    rows = (
+        Application.objects
+        .filter(student__a_level_points__isnull=False)
+        .exclude(status='Withdrawn')
+        .values('program_id', 'student__a_level_points')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    ProgramPointsHistogram.objects.bulk_create([
+        ProgramPointsHistogram(
+            program_id=row['program_id'],
+            points=row['student__a_level_points'],
+            count=row['count']
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0006_remove_message_subject'),
+        ('institutions', '0005_institution_date_established_institution_mission_and_more'),
+        ('users', '0007_usersettings_advanced_preferences_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgramPointsHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('points', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points_histogram', to='institutions.program')),
+            ],
+            options={
+                'verbose_name': 'Program Points Histogram',
+                'verbose_name_plural': 'Program Points Histograms',
+                'unique_together': {('program', 'points')},
+            },
+        ),
+        migrations.RunPython(backfill_histogram, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_read_model(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    ApplicationReadModel = apps.get_model('applications', 'ApplicationReadModel')
+    rows = Application.objects.order_by().values(
+        'id', 'program_id', 'program__name', 'program__code',
+        'program__department_id', 'program__department__name',
+        'program__department__faculty_id', 'program__department__faculty__name',
+        'program__department__faculty__institution_id', 'program__department__faculty__institution__name',
+        'student_id', 'student__name', 'student__username', 'student__email', 'student__a_level_points',
+        'status', 'date_applied', 'date_updated', 'date_status_changed',
+    )
+    ApplicationReadModel.objects.bulk_create([
+        ApplicationReadModel(
+            application_id=row['id'],
+            institution_id=row['program__department__faculty__institution_id'],
+            institution_name=row['program__department__faculty__institution__name'],
+            faculty_id=row['program__department__faculty_id'],
+            faculty_name=row['program__department__faculty__name'],
+            department_id=row['program__department_id'],
+            department_name=row['program__department__name'],
+            program_id=row['program_id'],
+            program_name=row['program__name'],
+            program_code=row['program__code'],
+            student_id=row['student_id'],
+            student_name=row['student__name'],
+            student_username=row['student__username'],
+            student_email=row['student__email'],
+            student_points=row['student__a_level_points'],
+            status=row['status'],
+            date_applied=row['date_applied'],
+            date_updated=row['date_updated'],
+            date_status_changed=row['date_status_changed'],
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0009_hot_filter_indexes'),
+        ('institutions', '0006_program_search_index'),
+        ('users', '0007_usersettings_advanced_preferences_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationReadModel',
+            fields=[
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='read_model', serialize=False, to='applications.application')),
+                ('institution_id', models.IntegerField()),
+                ('institution_name', models.CharField(max_length=255)),
+                ('faculty_id', models.IntegerField()),
+                ('faculty_name', models.CharField(max_length=255)),
+                ('department_id', models.IntegerField()),
+                ('department_name', models.CharField(max_length=255)),
+                ('program_id', models.IntegerField()),
+                ('program_name', models.CharField(max_length=255)),
+                ('program_code', models.CharField(max_length=50)),
+                ('student_id', models.UUIDField()),
+                ('student_name', models.CharField(max_length=255)),
+                ('student_username', models.CharField(max_length=150)),
+                ('student_email', models.EmailField(max_length=254)),
+                ('student_points', models.IntegerField(blank=True, null=True)),
+                ('status', models.CharField(max_length=50)),
+                ('date_applied', models.DateTimeField()),
+                ('date_updated', models.DateTimeField()),
+                ('date_status_changed', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Application Read Model',
+                'verbose_name_plural': 'Application Read Model',
+                'ordering': ['-date_applied'],
+                'indexes': [models.Index(fields=['date_applied', 'application'], name='readmodel_date_idx'), models.Index(fields=['institution_id', 'status', 'date_applied'], name='readmodel_inst_status_idx'), models.Index(fields=['student_id', 'date_applied'], name='readmodel_student_date_idx'), models.Index(fields=['program_id', 'status'], name='readmodel_program_status_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_read_model, migrations.RunPython.noop),
+    ]
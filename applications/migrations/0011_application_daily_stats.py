@@ -0,0 +1,57 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    ApplicationDailyStats = apps.get_model('applications', 'ApplicationDailyStats')
+    rows = (
+        Application.objects
+        .annotate(day=TruncDate('date_applied'))
+        .values('day', 'program_id', 'program__department__faculty__institution_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    ApplicationDailyStats.objects.bulk_create([
+        ApplicationDailyStats(
+            date=row['day'],
+            program_id=row['program_id'],
+            institution_id=row['program__department__faculty__institution_id'],
+            status=row['status'],
+            count=row['count'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0010_application_read_model'),
+        ('institutions', '0006_program_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('institution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='institutions.institution')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='institutions.program')),
+            ],
+            options={
+                'verbose_name': 'Application Daily Stats',
+                'verbose_name_plural': 'Application Daily Stats',
+                'indexes': [models.Index(fields=['institution', 'date'], name='dailystats_inst_date_idx')],
+                'unique_together': {('date', 'program', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.7 on 2026-10-17 09:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+
+
+def backfill_conversations(apps, schema_editor):
+    Conversation = apps.get_model('applications', 'Conversation')
+    Message = apps.get_model('applications', 'Message')
+    MessageWatermark = apps.get_model('applications', 'MessageWatermark')
+
+    pairs = {
+        tuple(sorted((sender, recipient), key=str))
+        for sender, recipient in Message.objects.values_list('sender_id', 'recipient_id').distinct()
+    }
+    Conversation.objects.bulk_create(
+        [Conversation(user_a_id=user_a, user_b_id=user_b) for user_a, user_b in pairs],
+        batch_size=1000
+    )
+    for sender, recipient in (('sender', 'recipient'), ('recipient', 'sender')):
+        Message.objects.filter(conversation__isnull=True).update(conversation=Subquery(
+            Conversation.objects.filter(user_a_id=OuterRef(sender), user_b_id=OuterRef(recipient)).values('id')[:1]
+        ))
+
+    def unread(reader, sender):
+        watermark = MessageWatermark.objects.filter(
+            user_id=OuterRef(OuterRef(reader)),
+            peer_id=OuterRef(OuterRef(sender))
+        ).values('last_read_id')
+        count = (
+            Message.objects
+            .filter(conversation=OuterRef('pk'), recipient_id=OuterRef(reader), is_read=False)
+            .filter(id__gt=Coalesce(Subquery(watermark), 0))
+            .order_by()
+            .values('conversation')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Coalesce(Subquery(count), 0)
+
+    last = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+    Conversation.objects.update(
+        last_message_at=Subquery(last.values('timestamp')[:1]),
+        last_message_preview=Subquery(last.annotate(preview=Substr('text', 1, 140)).values('preview')[:1]),
+        last_sender_id=Subquery(last.values('sender_id')[:1]),
+        unread_a=unread('user_a_id', 'user_b_id'),
+        unread_b=unread('user_b_id', 'user_a_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0015_read_watermarks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_message_preview', models.CharField(blank=True, max_length=140)),
+                ('unread_a', models.PositiveIntegerField(default=0)),
+                ('unread_b', models.PositiveIntegerField(default=0)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to='applications.application')),
+                ('last_sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_message_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='applications.conversation'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('user_a', 'user_b', 'application'), name='conversation_pair_application_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('application__isnull', True)), fields=('user_a', 'user_b'), name='conversation_pair_uniq'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
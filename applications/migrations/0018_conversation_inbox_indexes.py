@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-17 09:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0017_outbox_claims'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_a', 'last_message_at', 'id'], name='conversation_a_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['user_b', 'last_message_at', 'id'], name='conversation_b_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0018_conversation_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationfanout',
+            name='lease',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
 from users.models.models import User
 from django.contrib.auth import get_user_model
@@ -6,6 +6,7 @@ from django.utils import timezone
 import os
 import uuid
 from datetime import datetime
+from university_platform.dirty_fields import DirtyFieldsMixin
 User = get_user_model()
 
 def unique_file_path(instance, filename):
@@ -26,7 +27,7 @@ class ApplicationDocument(models.Model):
     def __str__(self):
         return f"{self.application.student.username} - {os.path.basename(self.file.name)}"
 
-class Application(models.Model):
+class Application(DirtyFieldsMixin, models.Model):
     # Application Status Choices
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
@@ -73,6 +74,12 @@ class Application(models.Model):
     class Meta:
         ordering = ['-date_applied']
         unique_together = ['student', 'program']  # Prevent duplicate applications
+        indexes = [
+            # Keyset pagination on (date_applied, id)
+            models.Index(fields=['date_applied', 'id'], name='application_date_id_idx'),
+            models.Index(fields=['student', 'date_applied', 'id'], name='application_student_date_idx'),
+            models.Index(fields=['status', 'program'], name='application_status_program_idx'),
+        ]
         verbose_name = 'University Application'
         verbose_name_plural = 'University Applications'
 
@@ -85,26 +92,27 @@ class Application(models.Model):
         # if not self.student.is_student or :
         #     raise ValidationError("Only students can submit applications")
         
-        # Validate status transitions
-        if self.pk: 
-            original = Application.objects.get(pk=self.pk)
-            if original.status != self.status:
-                if self.status not in self.STATUS_TRANSITIONS.get(original.status, []):
-                    ...
-                    # raise ValidationError(
-                    #     f"Invalid status transition from {original.status} to {self.status}"
-                    # )
+        # Validate status transitions against the status as loaded, no refetch
+        if self.pk and self.has_changed('status'):
+            original_status = self.original_value('status')
+            if self.status not in self.STATUS_TRANSITIONS.get(original_status, []):
+                ...
+                # raise ValidationError(
+                #     f"Invalid status transition from {original_status} to {self.status}"
+                # )
 
     def save(self, *args, **kwargs):
         """Override save to handle status change dates"""
         # Update status change date if status is being modified
-        if self.pk:
-            original = Application.objects.get(pk=self.pk)
-            if original.status != self.status:
-                self.date_status_changed = timezone.now()
-        
-        self.full_clean() 
-        super().save(*args, **kwargs)
+        if self.pk and self.has_changed('status'):
+            self.date_status_changed = timezone.now()
+
+        # Unchanged fields were validated when stored, skip their FK and unique checks
+        self.full_clean(exclude=None if self._state.adding else self.unchanged_fields())
+        # Keep derived tables maintained by signals in the same transaction;
+        # DirtyFieldsMixin writes only the changed columns
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     # Status Management Methods
     def approve(self, notes=None):
@@ -188,6 +196,103 @@ class Application(models.Model):
     def get_by_program(cls, program_id):
         return cls.objects.filter(program_id=program_id)
     
+class ProgramPointsHistogram(models.Model):
+    """
+    Number of active applications per program and applicant A-Level points.
+    Maintained by signals in applications/signals.py.
+    """
+    program = models.ForeignKey(
+        'institutions.Program',
+        on_delete=models.CASCADE,
+        related_name='points_histogram'
+    )
+    points = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['program', 'points']
+        verbose_name = 'Program Points Histogram'
+        verbose_name_plural = 'Program Points Histograms'
+
+    def __str__(self):
+        return f"{self.program_id} - {self.points} points: {self.count}"
+
+class ApplicationDailyStats(models.Model):
+    """
+    Number of applications per day applied, program and current status, with
+    the program's institution copied on for filtering. Maintained by signals in
+    applications/signals.py, rebuilt with `manage.py rebuild_application_daily_stats`.
+    """
+    date = models.DateField()
+    institution = models.ForeignKey(
+        'institutions.Institution',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    program = models.ForeignKey(
+        'institutions.Program',
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    status = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['date', 'program', 'status']
+        indexes = [
+            models.Index(fields=['institution', 'date'], name='dailystats_inst_date_idx'),
+        ]
+        verbose_name = 'Application Daily Stats'
+        verbose_name_plural = 'Application Daily Stats'
+
+    def __str__(self):
+        return f"{self.date} {self.program_id} {self.status}: {self.count}"
+
+class ApplicationReadModel(models.Model):
+    """
+    Flat copy of an application with its catalog path and student, so lists
+    and dashboards filter without joins. Maintained by signals in
+    applications/signals.py, rebuilt with `manage.py rebuild_application_read_model`.
+    """
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='read_model'
+    )
+    institution_id = models.IntegerField()
+    institution_name = models.CharField(max_length=255)
+    faculty_id = models.IntegerField()
+    faculty_name = models.CharField(max_length=255)
+    department_id = models.IntegerField()
+    department_name = models.CharField(max_length=255)
+    program_id = models.IntegerField()
+    program_name = models.CharField(max_length=255)
+    program_code = models.CharField(max_length=50)
+    student_id = models.UUIDField()
+    student_name = models.CharField(max_length=255)
+    student_username = models.CharField(max_length=150)
+    student_email = models.EmailField()
+    student_points = models.IntegerField(null=True, blank=True)
+    status = models.CharField(max_length=50)
+    date_applied = models.DateTimeField()
+    date_updated = models.DateTimeField()
+    date_status_changed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date_applied']
+        indexes = [
+            models.Index(fields=['date_applied', 'application'], name='readmodel_date_idx'),
+            models.Index(fields=['institution_id', 'status', 'date_applied'], name='readmodel_inst_status_idx'),
+            models.Index(fields=['student_id', 'date_applied'], name='readmodel_student_date_idx'),
+            models.Index(fields=['program_id', 'status'], name='readmodel_program_status_idx'),
+        ]
+        verbose_name = 'Application Read Model'
+        verbose_name_plural = 'Application Read Model'
+
+    def __str__(self):
+        return f"{self.student_name} - {self.program_name} ({self.status})"
+
 class ActivityLog(models.Model):
     ACTION_CHOICES = [
         ('APPROVED', 'Application Approved'),
@@ -206,6 +311,9 @@ class ActivityLog(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['user', 'timestamp', 'id'], name='activitylog_user_ts_idx'),
+        ]
         verbose_name = 'Activity Log'
         verbose_name_plural = 'Activity Logs'
 
@@ -243,7 +351,62 @@ class Deadline(models.Model):
     def __str__(self):
         return f"{self.title} - {self.date}"
 
+
+class Conversation(models.Model):
+    """
+    The thread between two users, optionally about one application.
+    `user_a` is the participant with the lower id, so each unordered pair
+    has one row per application scope. The last message and each side's
+    unread count are kept here by applications/services/conversations.py
+    as messages are sent and read, so the inbox reads one page from each
+    side's (user, last_message_at, id) index and merges the two.
+    """
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_a')
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_b')
+    application = models.ForeignKey(
+        Application,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='conversations'
+    )
+    last_message_at = models.DateTimeField(default=timezone.now)
+    last_message_preview = models.CharField(max_length=140, blank=True)
+    last_sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    unread_a = models.PositiveIntegerField(default=0)
+    unread_b = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-last_message_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_a', 'user_b', 'application'],
+                name='conversation_pair_application_uniq'
+            ),
+            # NULLs are distinct in the constraint above
+            models.UniqueConstraint(
+                fields=['user_a', 'user_b'],
+                condition=models.Q(application__isnull=True),
+                name='conversation_pair_uniq'
+            ),
+        ]
+        indexes = [
+            # Each side's inbox in page order; the two walks are merged by the inbox query
+            models.Index(fields=['user_a', 'last_message_at', 'id'], name='conversation_a_inbox_idx'),
+            models.Index(fields=['user_b', 'last_message_at', 'id'], name='conversation_b_inbox_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_a} and {self.user_b}"
+
 class Message(models.Model):
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='messages'
+    )
     sender = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -261,6 +424,17 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp', 'id'], name='message_ts_id_idx'),
+            models.Index(fields=['recipient', 'timestamp', 'id'], name='message_recipient_ts_idx'),
+            models.Index(fields=['sender', 'recipient', 'timestamp'], name='message_thread_ts_idx'),
+            # Unread counts per conversation above the read watermark
+            models.Index(
+                fields=['recipient', 'sender', 'id'],
+                condition=models.Q(is_read=False),
+                name='message_unread_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.sender} to {self.recipient} at {self.timestamp}"
@@ -284,11 +458,155 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_user_created_idx'),
+            # Unread counts above the read watermark; read rows stay out of the index
+            models.Index(
+                fields=['user', 'id'],
+                condition=models.Q(is_read=False),
+                name='notification_user_unread_idx'
+            ),
+        ]
 
     def mark_as_read(self):
         self.is_read = True
         self.read_at = timezone.now()
-        self.save()
+        self.save(update_fields=['is_read', 'read_at'])
+
+    def __str__(self):
+        return f"{self.title} - {self.user}"
+
+
+class NotificationWatermark(models.Model):
+    """
+    The user's notifications up to `last_read_id` count as read, so
+    "mark all read" writes this row instead of every notification.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_watermark')
+    last_read_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} read notifications up to {self.last_read_id}"
+
+class MessageWatermark(models.Model):
+    """Messages from `peer` to `user` up to `last_read_id` count as read"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='message_watermarks')
+    peer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    last_read_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['user', 'peer']
+        indexes = [
+            models.Index(fields=['peer', 'user'], name='msgwatermark_peer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} read messages from {self.peer_id} up to {self.last_read_id}"
+
+class NotificationFanout(models.Model):
+    """
+    One notification sent to an audience of users, written in chunks by
+    applications/services/fanout.py. `cursor` is the last user id written,
+    so an interrupted job resumes after it.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    audience = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=50)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    total = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    cursor = models.CharField(max_length=64, blank=True)
+    # Token of the run that holds a RUNNING job, written when it is claimed
+    lease = models.CharField(max_length=32, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Touched by every chunk, a RUNNING job not updated for a while has stalled
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at'], name='fanout_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} to {self.audience}: {self.sent}/{self.total} ({self.status})"
+
+class Mailing(models.Model):
+    """
+    One email sent to many recipients, rendered once. Its EmailOutbox rows
+    carry only the recipient; RECIPIENT_NAME in the bodies is replaced with
+    each recipient's name on delivery.
+    """
+    RECIPIENT_NAME = '[[recipient_name]]'
+
+    subject = models.CharField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    metadata = models.JSONField(default=dict, blank=True)
+    recipients = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.subject} to {self.recipients} recipients"
+
+class EmailOutbox(models.Model):
+    """
+    Email waiting to be sent. Rows are written in the same transaction as the
+    change they announce and delivered by applications/services/outbox.py.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    ]
+
+    to = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    # Empty for rows of a mailing, which holds the bodies
+    body = models.TextField(blank=True)
+    html_body = models.TextField(blank=True)
+    mailing = models.ForeignKey(Mailing, on_delete=models.CASCADE, null=True, blank=True, related_name='emails')
+    recipient_name = models.CharField(max_length=255, blank=True)
+    # Logged against this user once delivered or given up on
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    metadata = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    # For a SENDING row, when the lease of the drain in `claimed_by` runs out
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at', 'id'], name='outbox_due_idx'),
+        ]
+        verbose_name = 'Email Outbox'
+        verbose_name_plural = 'Email Outbox'
 
     def __str__(self):
-        return f"{self.title} - {self.user}"
\ No newline at end of file
+        return f"{self.subject} to {self.to} ({self.status})"
@@ -0,0 +1,172 @@
+# applications/services/admission_rules.py
+"""
+Enroller admission rules from UserSettings, evaluated in bulk.
+
+Each enroller's settings compile to up to three queryset conditions:
+`auto_reject_criteria` rejects, `enable_auto_accept` with
+`auto_accept_min_points` and `auto_accept_programs` approves, and
+`enable_auto_review` with `auto_review_criteria` defers for review.
+Criteria are `{lookup: value}` dicts over RULE_FIELDS, such as
+`{'a_level_points__lt': 5}`.
+
+Rules only touch Pending applications in the enroller's institution and are
+applied in that order. Each decision is one SELECT of matching ids plus
+transitions.bulk_transition, with the status emails queued in the same
+transaction, so rejection takes precedence over acceptance and acceptance
+over review. They run on each new submission and
+periodically through the `sweep_pending_applications` task.
+"""
+import logging
+from collections import Counter
+from celery import shared_task
+from django.conf import settings
+from django.core.exceptions import FieldError, ValidationError
+from django.db import transaction
+from django.db.models import Q
+from applications.models.models import Application
+from applications.services import transitions
+from applications.services.emails import send_status_emails
+from users.models.models import UserSettings
+
+logger = logging.getLogger(__name__)
+
+# Criteria field name -> path from Application
+RULE_FIELDS = {
+    'a_level_points': 'student__a_level_points',
+    'o_level_subjects': 'student__o_level_subjects',
+    'gender': 'student__gender',
+    'province': 'student__province',
+    'country': 'student__country',
+    'program': 'program',
+    'date_applied': 'date_applied',
+}
+
+RULE_LOOKUPS = {
+    'exact', 'iexact', 'lt', 'lte', 'gt', 'gte', 'in', 'range', 'isnull',
+    'contains', 'icontains', 'startswith', 'istartswith',
+}
+
+# ids per bulk_transition call
+CHUNK_SIZE = 5000
+
+# Invalid rules already logged by this process
+_reported = set()
+
+
+class InvalidCriteria(ValueError):
+    pass
+
+
+def compile_criteria(criteria):
+    """Q for a criteria dict, ANDing every lookup; InvalidCriteria if any is unsupported"""
+    if not isinstance(criteria, dict):
+        raise InvalidCriteria('Criteria must be an object of field lookups')
+    condition = Q()
+    for key, value in criteria.items():
+        name, *lookups = key.removeprefix('student__').split('__')
+        if name not in RULE_FIELDS:
+            raise InvalidCriteria(f'Unsupported field {name!r}, expected one of {", ".join(RULE_FIELDS)}')
+        if len(lookups) > 1 or (lookups and lookups[0] not in RULE_LOOKUPS):
+            raise InvalidCriteria(f'Unsupported lookup {key!r}')
+        condition &= Q(**{'__'.join([RULE_FIELDS[name], *lookups]): value})
+    try:
+        # Building the query resolves every lookup and prepares its value
+        Application.objects.filter(condition).query
+    except (FieldError, ValidationError, ValueError, TypeError) as e:
+        raise InvalidCriteria(f'Invalid criteria: {e}')
+    return condition
+
+
+class EnrollerRules:
+    """The compiled decisions of one enroller's settings"""
+
+    def __init__(self, user_settings):
+        self.enroller = user_settings.user
+        self.institution_id = self.enroller.assigned_institution_id
+        self.decisions = []
+
+        if user_settings.auto_reject_criteria:
+            self._add('Rejected', lambda: compile_criteria(user_settings.auto_reject_criteria))
+        if user_settings.enable_auto_accept:
+            self._add('Approved', lambda: self._accept_condition(user_settings))
+        if user_settings.enable_auto_review and user_settings.auto_review_criteria:
+            self._add('Deferred', lambda: compile_criteria(user_settings.auto_review_criteria))
+
+    def _add(self, new_status, build):
+        try:
+            self.decisions.append((new_status, build()))
+        except InvalidCriteria as e:
+            # Criteria saved before validation existed; skip the rule. Rules
+            # load on every submission and sweep, so each one is logged once
+            warning = (self.enroller.pk, new_status, str(e))
+            if warning not in _reported:
+                _reported.add(warning)
+                logger.warning('Skipping %s rule of %s: %s', new_status, self.enroller.email, e)
+
+    @staticmethod
+    def _accept_condition(user_settings):
+        condition = Q(student__a_level_points__gte=user_settings.auto_accept_min_points)
+        # Prefetched by load_rules; no programs means every program of the institution
+        programs = [program.pk for program in user_settings.auto_accept_programs.all()]
+        if programs:
+            condition &= Q(program_id__in=programs)
+        return condition
+
+
+def load_rules(institution_id=None):
+    """EnrollerRules of every active enroller with at least one rule, oldest account first"""
+    user_settings = (
+        UserSettings.objects
+        .filter(user__is_enroller=True, user__is_active=True, user__assigned_institution__isnull=False)
+        .select_related('user')
+        .prefetch_related('auto_accept_programs')
+        .order_by('user__date_joined')
+    )
+    if institution_id is not None:
+        user_settings = user_settings.filter(user__assigned_institution_id=institution_id)
+    rules = [
+        EnrollerRules(row) for row in user_settings
+        if row.auto_reject_criteria or row.enable_auto_accept or row.enable_auto_review
+    ]
+    return [rule for rule in rules if rule.decisions]
+
+
+def apply_rules(applications=None, institution_id=None, base_url=None):
+    """
+    Apply the rules to the Pending applications in `applications` (default all),
+    optionally only those of one institution. Returns {status: count}.
+    """
+    pending = (Application.objects.all() if applications is None else applications).filter(status='Pending')
+    base_url = base_url or settings.SITE_URL
+    results = Counter()
+
+    for rules in load_rules(institution_id):
+        scope = pending.filter(program__department__faculty__institution_id=rules.institution_id)
+        for new_status, condition in rules.decisions:
+            ids = list(scope.filter(condition).order_by().values_list('id', flat=True))
+            for start in range(0, len(ids), CHUNK_SIZE):
+                try:
+                    with transaction.atomic():
+                        updated_ids, _ = transitions.bulk_transition(
+                            Application.objects.all(),
+                            ids[start:start + CHUNK_SIZE],
+                            new_status,
+                            rules.enroller,
+                            log_metadata={'rule': f'auto_{new_status.lower()}'},
+                        )
+                        send_status_emails(updated_ids, rules.enroller, base_url)
+                except transitions.TransitionConflict as e:
+                    # Picked up again by the next sweep
+                    logger.info('Admission rules skipped a chunk: %s', e)
+                    continue
+                results[new_status] += len(updated_ids)
+    return dict(results)
+
+
+@shared_task
+def sweep_pending_applications():
+    """Periodic pass of every enroller's rules over all pending applications"""
+    results = apply_rules()
+    if results:
+        logger.info('Admission rules decided %s', results)
+    return results
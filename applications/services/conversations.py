@@ -0,0 +1,167 @@
+# applications/services/conversations.py
+"""
+Conversation rows: one per unordered pair of users, optionally per
+application.
+
+Every Message belongs to a Conversation. A message saved without one gets
+the pair's unscoped conversation in the pre_save signal. The post_save
+signal calls `record()`, which moves the last message fields and bumps the
+recipient's unread counter with one UPDATE. Threads are then read by
+conversation id instead of OR-ing the two sender/recipient directions, and
+the inbox lists Conversation rows alone: one page from each side's
+(user, last_message_at, id) index, merged.
+
+Unread counters agree with the read watermarks in read_state: moving a
+watermark recounts the reader's side with `recount_unread()`.
+"""
+import uuid
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Substr
+from applications.models.models import Conversation, Message, MessageWatermark
+
+PREVIEW_LENGTH = Conversation._meta.get_field('last_message_preview').max_length
+
+
+def _uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def participants(user_id, other_id):
+    """The pair as (user_a, user_b): lower id first"""
+    return tuple(sorted((_uuid(user_id), _uuid(other_id)), key=str))
+
+
+def _side(reader_id, other_id):
+    """'a' if the reader is the conversation's user_a, else 'b'"""
+    return 'a' if participants(reader_id, other_id)[0] == _uuid(reader_id) else 'b'
+
+
+def for_pair(user_id, other_id, application=None):
+    """The pair's conversation about `application`, or their unscoped one, created on first use"""
+    user_a, user_b = participants(user_id, other_id)
+    lookup = {'user_a_id': user_a, 'user_b_id': user_b, 'application': application}
+    conversation = Conversation.objects.filter(**lookup).first()
+    if conversation is not None:
+        return conversation
+    try:
+        with transaction.atomic():
+            return Conversation.objects.create(**lookup)
+    except IntegrityError:
+        # Created by a concurrent first message
+        return Conversation.objects.get(**lookup)
+
+
+def for_user(user_id):
+    """The user's conversations, either side"""
+    return Conversation.objects.filter(Q(user_a_id=user_id) | Q(user_b_id=user_id))
+
+
+def sides(user_id):
+    """The user's conversations as user_a and as user_b, each walkable in inbox order on its own index"""
+    return Conversation.objects.filter(user_a_id=user_id), Conversation.objects.filter(user_b_id=user_id)
+
+
+def thread(user_id, other_id, application=None):
+    """
+    Ids of the pair's conversations to read together: the one about
+    `application` plus their unscoped one, or all of them without an
+    application.
+    """
+    user_a, user_b = participants(user_id, other_id)
+    conversations = Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b)
+    if application is not None:
+        conversations = conversations.filter(Q(application=application) | Q(application__isnull=True))
+    return conversations.values('id')
+
+
+def unread_for(conversation, user_id):
+    return conversation.unread_a if conversation.user_a_id == _uuid(user_id) else conversation.unread_b
+
+
+def record(message):
+    """Make `message` the conversation's last message and count it unread for the recipient"""
+    if message.sender_id == message.recipient_id:
+        return
+    unread = f'unread_{_side(message.recipient_id, message.sender_id)}'
+    conversations = Conversation.objects.filter(pk=message.conversation_id)
+    # A message committed after a newer one only counts towards unread
+    updated = conversations.filter(last_message_at__lte=message.timestamp).update(
+        last_message_at=message.timestamp,
+        last_message_preview=message.text[:PREVIEW_LENGTH],
+        last_sender_id=message.sender_id,
+        **{unread: F(unread) + 1}
+    )
+    if not updated:
+        conversations.update(**{unread: F(unread) + 1})
+
+
+def _unread_count(reader, sender):
+    """Subquery counting a conversation's unread messages from `sender` to `reader` (field names)"""
+    watermark = MessageWatermark.objects.filter(
+        user_id=OuterRef(OuterRef(reader)),
+        peer_id=OuterRef(OuterRef(sender))
+    ).values('last_read_id')
+    unread = (
+        Message.objects
+        .filter(conversation=OuterRef('pk'), recipient_id=OuterRef(reader), is_read=False)
+        .filter(id__gt=Coalesce(Subquery(watermark), 0))
+        .order_by()
+        .values('conversation')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return Coalesce(Subquery(unread), 0)
+
+
+def recount_unread(reader_id, peer_id):
+    """Recount the reader's unread messages in their conversations with `peer_id`"""
+    user_a, user_b = participants(reader_id, peer_id)
+    if _side(reader_id, peer_id) == 'a':
+        field, counter = 'unread_a', _unread_count('user_a_id', 'user_b_id')
+    else:
+        field, counter = 'unread_b', _unread_count('user_b_id', 'user_a_id')
+    return Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b).update(**{field: counter})
+
+
+def refresh(conversations):
+    """Recompute the last message and both unread counters of `conversations` from their messages"""
+    last = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp', '-id')
+    conversations.filter(messages__isnull=True).update(
+        last_message_preview='',
+        last_sender=None,
+        unread_a=0,
+        unread_b=0,
+    )
+    return conversations.filter(messages__isnull=False).update(
+        last_message_at=Subquery(last.values('timestamp')[:1]),
+        last_message_preview=Subquery(last.annotate(preview=Substr('text', 1, PREVIEW_LENGTH)).values('preview')[:1]),
+        last_sender_id=Subquery(last.values('sender_id')[:1]),
+        unread_a=_unread_count('user_a_id', 'user_b_id'),
+        unread_b=_unread_count('user_b_id', 'user_a_id'),
+    )
+
+
+def rebuild_conversations():
+    """Attach messages without a conversation to their pair's unscoped one, then refresh every conversation"""
+    orphans = Message.objects.filter(conversation__isnull=True)
+    pairs = {
+        participants(sender, recipient)
+        for sender, recipient in orphans.values_list('sender_id', 'recipient_id').distinct()
+    }
+    with transaction.atomic():
+        Conversation.objects.bulk_create(
+            [Conversation(user_a_id=user_a, user_b_id=user_b) for user_a, user_b in pairs],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+        # The pair is stored lower id first: match both directions
+        for sender, recipient in (('sender', 'recipient'), ('recipient', 'sender')):
+            orphans.update(conversation=Subquery(
+                Conversation.objects.filter(
+                    user_a_id=OuterRef(sender),
+                    user_b_id=OuterRef(recipient),
+                    application__isnull=True
+                ).values('id')[:1]
+            ))
+        return refresh(Conversation.objects.all())
@@ -0,0 +1,144 @@
+# applications/services/daily_stats.py
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from applications.models.models import Application, ApplicationDailyStats
+from institutions.models import Program
+
+
+def day_of(application):
+    """The rollup date of an application, its local date applied"""
+    return timezone.localdate(application.date_applied)
+
+
+def bump(day, program_id, status, delta):
+    """Add `delta` to the (day, program, status) bucket"""
+    if not delta:
+        return
+    updated = ApplicationDailyStats.objects.filter(
+        date=day,
+        program_id=program_id,
+        status=status
+    ).update(count=F('count') + delta)
+    if not updated and delta > 0:
+        institution_id = (
+            Program.objects
+            .filter(pk=program_id)
+            .values_list('department__faculty__institution_id', flat=True)
+            .first()
+        )
+        bucket, created = ApplicationDailyStats.objects.get_or_create(
+            date=day,
+            program_id=program_id,
+            status=status,
+            defaults={'institution_id': institution_id, 'count': delta}
+        )
+        if not created:
+            ApplicationDailyStats.objects.filter(pk=bucket.pk).update(count=F('count') + delta)
+
+
+def apply_deltas(deltas):
+    """Add {(day, program_id, status): delta} to the buckets with a few bulk statements"""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    existing = {
+        (bucket.date, bucket.program_id, bucket.status): bucket
+        for bucket in ApplicationDailyStats.objects.select_for_update().filter(
+            date__in={day for day, _, _ in deltas},
+            program_id__in={program_id for _, program_id, _ in deltas},
+            status__in={status for _, _, status in deltas},
+        )
+    }
+    missing = [key for key, delta in deltas.items() if key not in existing and delta > 0]
+    institutions = dict(
+        Program.objects
+        .filter(pk__in={program_id for _, program_id, _ in missing})
+        .values_list('id', 'department__faculty__institution_id')
+    ) if missing else {}
+
+    changed = []
+    for key, delta in deltas.items():
+        if key in existing:
+            existing[key].count += delta
+            changed.append(existing[key])
+    ApplicationDailyStats.objects.bulk_update(changed, ['count'], batch_size=1000)
+    ApplicationDailyStats.objects.bulk_create([
+        ApplicationDailyStats(
+            date=day,
+            program_id=program_id,
+            institution_id=institutions[program_id],
+            status=status,
+            count=deltas[(day, program_id, status)]
+        )
+        for day, program_id, status in missing
+    ], batch_size=1000)
+
+
+def sync_institutions(programs):
+    """Copy the current institution onto the buckets of `programs` after a catalog move"""
+    ApplicationDailyStats.objects.filter(program__in=programs).update(
+        institution_id=Subquery(
+            Program.objects
+            .filter(pk=OuterRef('program_id'))
+            .values('department__faculty__institution_id')[:1]
+        )
+    )
+
+
+def rebuild_daily_stats():
+    """Recompute every bucket from the applications table"""
+    rows = (
+        Application.objects
+        .annotate(day=TruncDate('date_applied'))
+        .values('day', 'program_id', 'program__department__faculty__institution_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    buckets = [
+        ApplicationDailyStats(
+            date=row['day'],
+            program_id=row['program_id'],
+            institution_id=row['program__department__faculty__institution_id'],
+            status=row['status'],
+            count=row['count']
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ApplicationDailyStats.objects.all().delete()
+        ApplicationDailyStats.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
+
+
+def _buckets(institution_id=None):
+    buckets = ApplicationDailyStats.objects.order_by()
+    if institution_id is not None:
+        buckets = buckets.filter(institution_id=institution_id)
+    return buckets
+
+
+def status_counts(institution_id=None):
+    """{status: applications}, across all institutions unless one is given"""
+    return dict(_buckets(institution_id).values_list('status').annotate(total=Sum('count')))
+
+
+def monthly_trends(institution_id=None):
+    """[{'month', 'year', 'count'}] of applications by month applied, oldest first"""
+    # Grouping by the plain date column avoids a date function call per bucket
+    months = {}
+    days = _buckets(institution_id).values_list('date').annotate(total=Sum('count')).order_by('date')
+    for day, total in days:
+        months[(day.year, day.month)] = months.get((day.year, day.month), 0) + total
+    return [{'month': month, 'year': year, 'count': count} for (year, month), count in months.items()]
+
+
+def program_counts(institution_id=None):
+    """{program id: applications}"""
+    return dict(_buckets(institution_id).values_list('program_id').annotate(total=Sum('count')))
+
+
+def institution_counts():
+    """{institution id: applications}"""
+    return dict(_buckets().values_list('institution_id').annotate(total=Sum('count')))
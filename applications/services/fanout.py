@@ -0,0 +1,187 @@
+# applications/services/fanout.py
+"""
+Chunked fan-out of one in-app notification to many users.
+
+`start()` records a NotificationFanout job for a named audience (see
+AUDIENCES) and runs it in a background thread once the transaction commits.
+A run reads NOTIFICATION_FANOUT_CHUNK_SIZE recipient ids at a time with a
+keyset query on the user id. Each chunk's Notification rows are written
+with bulk_create in a short transaction, together with the job's cursor and
+progress. Nothing holds a lock for longer than one chunk, and a job that
+stops part way resumes after its cursor without notifying anyone twice.
+
+A RUNNING job that has not advanced for NOTIFICATION_FANOUT_STALL_SECONDS
+is taken over by the `resume_notification_fanouts` beat task. Each claim
+writes a new lease token, and every chunk advances the job only where its
+lease is still the run's own, so a run that was taken over stops before
+writing another chunk.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from applications.models.models import Notification, NotificationFanout
+from applications.services import live
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _institution_pending(institution_id):
+    """Students with a pending application at the institution"""
+    return User.objects.filter(
+        is_student=True,
+        applications__status='Pending',
+        applications__program__department__faculty__institution_id=institution_id
+    )
+
+
+def _department_applicants(department_id):
+    """Students who applied to a program of the department"""
+    return User.objects.filter(
+        is_student=True,
+        applications__program__department_id=department_id
+    )
+
+
+# Audience name -> function of the job's params returning a User queryset
+AUDIENCES = {
+    'institution_pending': _institution_pending,
+    'department_applicants': _department_applicants,
+}
+
+
+def recipient_ids(audience, params):
+    """Distinct user ids of an audience in id order, the order jobs walk them in"""
+    return AUDIENCES[audience](**params).order_by('id').values_list('id', flat=True).distinct()
+
+
+def start(audience, params, title, message, notification_type, created_by=None):
+    """Record a fan-out job and run it once the current transaction commits"""
+    job = NotificationFanout.objects.create(
+        audience=audience,
+        params=params,
+        title=title,
+        message=message,
+        notification_type=notification_type,
+        created_by=created_by,
+        total=recipient_ids(audience, params).count(),
+    )
+    if _setting('NOTIFICATION_FANOUT_ON_COMMIT', True):
+        transaction.on_commit(lambda: run_in_background(job.id))
+    return job
+
+
+class LeaseLost(Exception):
+    """Another run took the job over"""
+
+
+def _claim(job_id):
+    """Mark the job RUNNING if it is pending or stalled; the new lease token, or None if another run owns it"""
+    stalled = timezone.now() - timedelta(seconds=_setting('NOTIFICATION_FANOUT_STALL_SECONDS', 300))
+    token = uuid.uuid4().hex
+    claimed = (
+        NotificationFanout.objects
+        .filter(pk=job_id)
+        .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stalled))
+        .update(status='RUNNING', lease=token, updated_at=timezone.now())
+    )
+    return token if claimed else None
+
+
+def _update_leased(job_id, token, **fields):
+    """Write `fields` to the job while `token` still holds its lease; LeaseLost otherwise"""
+    updated = NotificationFanout.objects.filter(pk=job_id, lease=token).update(updated_at=timezone.now(), **fields)
+    if not updated:
+        raise LeaseLost(f'Notification fan-out {job_id} was taken over by another run')
+
+
+def run(job_id, chunk_size=None):
+    """
+    Write the job's remaining notifications chunk by chunk; returns the job,
+    or None if it was not claimed or another run took it over
+    """
+    token = _claim(job_id)
+    if token is None:
+        return None
+    chunk_size = chunk_size or _setting('NOTIFICATION_FANOUT_CHUNK_SIZE', 1000)
+    job = NotificationFanout.objects.get(pk=job_id)
+    ids = recipient_ids(job.audience, job.params)
+
+    try:
+        while True:
+            chunk = list((ids.filter(id__gt=job.cursor) if job.cursor else ids)[:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                # Fenced first, so a run that lost its lease writes nothing
+                _update_leased(job.pk, token, cursor=str(chunk[-1]), sent=job.sent + len(chunk))
+                notifications = Notification.objects.bulk_create([
+                    Notification(
+                        user_id=user_id,
+                        title=job.title,
+                        message=job.message,
+                        notification_type=job.notification_type,
+                    )
+                    for user_id in chunk
+                ], batch_size=chunk_size)
+                # bulk_create sends no post_save, so connected users are told here.
+                # Safe inside atomic() only because publishing waits for on_commit:
+                # a rolled-back chunk is never announced, and a retried one is
+                # announced once
+                live.publish_notifications(notifications)
+            job.cursor, job.sent = str(chunk[-1]), job.sent + len(chunk)
+        job.status, job.finished_at = 'DONE', timezone.now()
+        _update_leased(job.pk, token, status=job.status, finished_at=job.finished_at, lease='')
+    except LeaseLost as e:
+        logger.warning('%s, stopping', e)
+        return None
+    except Exception as e:
+        logger.exception('Notification fan-out %s failed', job.id)
+        job.status, job.error = 'FAILED', str(e)
+        try:
+            _update_leased(job.pk, token, status=job.status, error=job.error, lease='')
+        except LeaseLost:
+            return None
+    return job
+
+
+def resume(job_id):
+    """Run a FAILED job again from its cursor"""
+    NotificationFanout.objects.filter(pk=job_id, status='FAILED').update(status='PENDING', error='')
+    return run(job_id)
+
+
+def _run_thread(job_id):
+    try:
+        run(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_in_background(job_id):
+    threading.Thread(target=_run_thread, args=(job_id,), name='notification-fanout', daemon=True).start()
+
+
+@shared_task
+def resume_notification_fanouts():
+    """Run pending jobs and take over stalled ones; returns the ids that were run"""
+    stalled = timezone.now() - timedelta(seconds=_setting('NOTIFICATION_FANOUT_STALL_SECONDS', 300))
+    job_ids = list(
+        NotificationFanout.objects
+        .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stalled))
+        .order_by('created_at')
+        .values_list('id', flat=True)
+    )
+    return [job_id for job_id in job_ids if run(job_id) is not None]
@@ -0,0 +1,95 @@
+# applications/services/histogram.py
+from django.db import transaction
+from django.db.models import Count, F
+from applications.models.models import Application, ProgramPointsHistogram
+
+# Applications in these statuses no longer compete for a place
+INACTIVE_STATUSES = ['Withdrawn']
+
+
+def counts_in_histogram(status, points):
+    """Check whether an application with this status and points is counted"""
+    return points is not None and status not in INACTIVE_STATUSES
+
+
+def bump(program_id, points, delta):
+    """Add `delta` to the (program, points) bucket"""
+    if points is None or not delta:
+        return
+    updated = ProgramPointsHistogram.objects.filter(
+        program_id=program_id,
+        points=points
+    ).update(count=F('count') + delta)
+    if not updated and delta > 0:
+        bucket, created = ProgramPointsHistogram.objects.get_or_create(
+            program_id=program_id,
+            points=points,
+            defaults={'count': delta}
+        )
+        if not created:
+            ProgramPointsHistogram.objects.filter(pk=bucket.pk).update(count=F('count') + delta)
+
+
+def apply_deltas(deltas):
+    """Add {(program_id, points): delta} to the buckets with a few bulk statements"""
+    deltas = {key: delta for key, delta in deltas.items() if delta and key[1] is not None}
+    if not deltas:
+        return
+    existing = {
+        (bucket.program_id, bucket.points): bucket
+        for bucket in ProgramPointsHistogram.objects.select_for_update().filter(
+            program_id__in={program_id for program_id, _ in deltas},
+            points__in={points for _, points in deltas},
+        )
+    }
+    changed = []
+    for key, delta in deltas.items():
+        if key in existing:
+            existing[key].count += delta
+            changed.append(existing[key])
+    ProgramPointsHistogram.objects.bulk_update(changed, ['count'], batch_size=1000)
+    ProgramPointsHistogram.objects.bulk_create([
+        ProgramPointsHistogram(program_id=program_id, points=points, count=delta)
+        for (program_id, points), delta in deltas.items()
+        if (program_id, points) not in existing and delta > 0
+    ], batch_size=1000)
+
+
+def move_student(student_id, old_points, new_points):
+    """Move every active application of a student to a new points bucket"""
+    if old_points == new_points:
+        return
+    program_ids = list(
+        Application.objects
+        .filter(student_id=student_id)
+        .exclude(status__in=INACTIVE_STATUSES)
+        .values_list('program_id', flat=True)
+    )
+    with transaction.atomic():
+        for program_id in program_ids:
+            bump(program_id, old_points, -1)
+            bump(program_id, new_points, 1)
+
+
+def rebuild_histogram():
+    """Recompute the whole histogram from the applications table"""
+    rows = (
+        Application.objects
+        .filter(student__a_level_points__isnull=False)
+        .exclude(status__in=INACTIVE_STATUSES)
+        .values('program_id', 'student__a_level_points')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    buckets = [
+        ProgramPointsHistogram(
+            program_id=row['program_id'],
+            points=row['student__a_level_points'],
+            count=row['count']
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        ProgramPointsHistogram.objects.all().delete()
+        ProgramPointsHistogram.objects.bulk_create(buckets, batch_size=1000)
+    return len(buckets)
@@ -0,0 +1,48 @@
+# applications/services/live.py
+"""
+Live notification and message events for the SSE stream in
+applications/api/stream.py.
+
+Events go to the recipient's channel on university_platform.pubsub.broker
+once the creating transaction commits, serialized from the instances in
+memory without extra queries. Notification and Message post_save receivers
+publish single rows. Bulk writers such as the fan-out call
+`publish_notifications` themselves.
+"""
+from django.db import transaction
+from university_platform.pubsub import broker
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def _publish_on_commit(user_id, build_event):
+    """Build and publish the event after commit, if the user is connected to this process"""
+    channel = user_channel(user_id)
+    if broker.has_subscribers(channel):
+        event = build_event()
+        transaction.on_commit(lambda: broker.publish(channel, event))
+
+
+def notification_event(notification):
+    from applications.api.serializers.serializers import NotificationSerializer
+    return {'event': 'notification', 'id': notification.id, 'data': NotificationSerializer(notification).data}
+
+
+def publish_notification(notification):
+    _publish_on_commit(notification.user_id, lambda: notification_event(notification))
+
+
+def publish_notifications(notifications):
+    """Publish rows written with bulk_create"""
+    for notification in notifications:
+        publish_notification(notification)
+
+
+def publish_message(message):
+    from applications.api.serializers.serializers import MessageSerializer
+    _publish_on_commit(
+        message.recipient_id,
+        lambda: {'event': 'message', 'data': MessageSerializer(message).data}
+    )
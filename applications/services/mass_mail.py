@@ -0,0 +1,57 @@
+# applications/services/mass_mail.py
+"""
+One email to many recipients through the outbox.
+
+The template is rendered once into a Mailing, with Mailing.RECIPIENT_NAME
+where each recipient's name goes. Recipients are read as (id, email, name)
+rows, deduplicated by email, and queued as slim EmailOutbox rows with one
+bulk insert per MASS_MAIL_CHUNK_SIZE rows. Delivery is then the outbox's:
+one connection, batched, retried, and one bulk insert of delivery logs per
+batch.
+"""
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+from applications.models.models import EmailOutbox, Mailing
+from applications.services import outbox
+
+
+def queue_mailing(recipients, subject, template, context, actor=None, metadata=None, from_email=None):
+    """
+    Queue `template` for every distinct recipient in `recipients`, an iterable
+    of (user id, email, name). Returns the Mailing.
+    """
+    html_content = render_to_string(template, {**context, 'recipient_name': Mailing.RECIPIENT_NAME})
+    mailing = Mailing.objects.create(
+        subject=subject,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        body=strip_tags(html_content),
+        html_body=html_content,
+        actor=actor,
+        metadata=metadata or {},
+    )
+
+    chunk_size = getattr(settings, 'MASS_MAIL_CHUNK_SIZE', 1000)
+    seen, rows = set(), []
+    for user_id, email, name in recipients:
+        if not email or email.lower() in seen:
+            continue
+        seen.add(email.lower())
+        rows.append(EmailOutbox(
+            to=email,
+            from_email=mailing.from_email,
+            subject=subject,
+            mailing=mailing,
+            recipient_name=name or '',
+            actor=actor,
+            metadata={**mailing.metadata, 'mailing_id': mailing.id, 'user_id': str(user_id)},
+        ))
+        if len(rows) >= chunk_size:
+            outbox.enqueue_many(rows)
+            rows = []
+    if rows:
+        outbox.enqueue_many(rows)
+
+    mailing.recipients = len(seen)
+    mailing.save(update_fields=['recipients'])
+    return mailing
@@ -1,6 +1,7 @@
 # applications/services/notifications.py
 from django.contrib.auth import get_user_model
 from applications.models.models import Notification, Application
+from applications.services import fanout
 from django.utils import timezone
 from celery import shared_task
 
@@ -21,40 +22,28 @@ def send_notification(user, title, message, notification_type):
     
     # In a real app, you would also send email/push notifications here
 
-@shared_task
-def notify_students_of_new_program(program):
+def notify_students_of_new_program(program, created_by=None):
     """
-    Notify students who might be interested in a new program
+    Notify students who applied to the program's department of a new program
     """
-    # Get students who applied to similar programs or have matching criteria
-    students = User.objects.filter(
-        is_student=True,
-        applications__program__department=program.department
-    ).distinct()
-    
-    for student in students:
-        send_notification(
-            user=student,
-            title="New Program Available",
-            message=f"A new program {program.name} has been added that might interest you",
-            notification_type="PROGRAM_ADDED"
-        )
+    return fanout.start(
+        'department_applicants',
+        {'department_id': program.department_id},
+        title="New Program Available",
+        message=f"A new program {program.name} has been added that might interest you",
+        notification_type="PROGRAM_ADDED",
+        created_by=created_by
+    )
 
-@shared_task
-def notify_students_of_deadline(deadline):
+def notify_students_of_deadline(deadline, created_by=None):
     """
     Notify students with pending applications about a new deadline
     """
-    students = User.objects.filter(
-        is_student=True,
-        applications__status='Pending',
-        applications__program__department__faculty__institution=deadline.institution
-    ).distinct()
-    
-    for student in students:
-        send_notification(
-            user=student,
-            title="Important Deadline",
-            message=f"New deadline for {deadline.title}: {deadline.date}",
-            notification_type="DEADLINE"
-        )
\ No newline at end of file
+    return fanout.start(
+        'institution_pending',
+        {'institution_id': deadline.institution_id},
+        title="Important Deadline",
+        message=f"New deadline for {deadline.title}: {deadline.date}",
+        notification_type="DEADLINE",
+        created_by=created_by
+    )
@@ -0,0 +1,235 @@
+# applications/services/outbox.py
+"""
+Transactional email outbox.
+
+`enqueue()` renders a message into an EmailOutbox row in the caller's
+transaction, so an email exists exactly when the change it announces was
+committed and no SMTP work happens on the request path. `deliver()` drains
+due rows in batches of OUTBOX_BATCH_SIZE over one reused connection from
+`get_connection()`, so any EMAIL_BACKEND works (locmem in tests, a local
+SMTP sink in development). A failed message is retried after
+OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1), and marked FAILED after
+OUTBOX_MAX_ATTEMPTS attempts. Rows of a Mailing share its bodies and only
+store the recipient.
+
+Delivery runs in a background thread once the enqueuing transaction commits,
+and from the `deliver_outbox` celery beat task so retries and rows missed by a
+crashed process still go out. Several drains can run at once (one per worker
+process plus the beat task), so each batch is claimed before it is sent: a
+conditional UPDATE moves due rows to SENDING under the drain's token and
+leases them until `next_attempt_at`. A row claimed by another drain is not
+sent again, and a row left SENDING by a crashed drain is due once its lease
+of OUTBOX_LEASE_SECONDS runs out. The `cache.add` lock only saves a process
+from starting a second drain of its own.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+from applications.models.models import ActivityLog, EmailOutbox, Mailing
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY = 'applications:outbox:delivering'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def build(to, subject, template, context, actor=None, metadata=None, from_email=None, body=None):
+    """An unsaved EmailOutbox row with `template` rendered against `context`; `body` overrides the text part"""
+    html_content = render_to_string(template, context)
+    return EmailOutbox(
+        to=to,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body or strip_tags(html_content),
+        html_body=html_content,
+        actor=actor,
+        metadata=metadata or {},
+    )
+
+
+def enqueue(*args, **kwargs):
+    """Queue one email (arguments as for build) and deliver it once the transaction commits"""
+    return enqueue_many([build(*args, **kwargs)])[0]
+
+
+def enqueue_many(rows):
+    """Queue unsaved EmailOutbox rows with one bulk insert"""
+    rows = EmailOutbox.objects.bulk_create(rows, batch_size=1000)
+    if rows and _setting('OUTBOX_DELIVER_ON_COMMIT', True):
+        transaction.on_commit(deliver_in_background)
+    return rows
+
+
+def queue_depth():
+    """{status: count} of the outbox, with the number of PENDING rows already due"""
+    depth = dict(EmailOutbox.objects.values_list('status').annotate(count=Count('id')).order_by())
+    depth['due'] = EmailOutbox.objects.filter(status='PENDING', next_attempt_at__lte=timezone.now()).count()
+    return depth
+
+
+def _message(row, mailing=None):
+    body, html_body = row.body, row.html_body
+    if mailing is not None:
+        body = mailing.body.replace(Mailing.RECIPIENT_NAME, row.recipient_name)
+        html_body = mailing.html_body.replace(Mailing.RECIPIENT_NAME, escape(row.recipient_name))
+    email = EmailMultiAlternatives(
+        subject=row.subject,
+        body=body,
+        from_email=row.from_email,
+        to=[row.to],
+    )
+    if html_body:
+        email.attach_alternative(html_body, "text/html")
+    return email
+
+
+def _send(connection, row, mailing=None):
+    """Send one row; returns the error message, or None once sent"""
+    try:
+        connection.send_messages([_message(row, mailing)])
+        return None
+    except Exception as e:
+        # The connection may be broken; reopen it for the next message. Left
+        # closed, the backend would open and close one for every later send
+        try:
+            connection.close()
+            connection.open()
+        except Exception:
+            pass
+        return str(e) or e.__class__.__name__
+
+
+def _claim(token, size, last_id):
+    """
+    Lease up to `size` due rows after `last_id` to this drain. Returns the
+    ids looked at and the rows claimed, which exclude rows another drain
+    claimed in between.
+    """
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(status__in=['PENDING', 'SENDING'], next_attempt_at__lte=now)
+    ids = list(due.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:size])
+    if not ids:
+        return ids, []
+    # The due condition is checked again by the UPDATE itself
+    due.filter(id__in=ids).update(
+        status='SENDING',
+        claimed_by=token,
+        next_attempt_at=now + timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+    )
+    return ids, list(EmailOutbox.objects.filter(id__in=ids, status='SENDING', claimed_by=token).order_by('id'))
+
+
+def deliver(batch_size=None, limit=None):
+    """
+    Send due rows, oldest first, until none are left or `limit` rows were
+    attempted. Returns (sent, failed attempts).
+    """
+    batch_size = batch_size or _setting('OUTBOX_BATCH_SIZE', 100)
+    max_attempts = _setting('OUTBOX_MAX_ATTEMPTS', 5)
+    retry_seconds = _setting('OUTBOX_RETRY_SECONDS', 60)
+    token = uuid.uuid4().hex
+    sent = failed = 0
+    last_id = 0
+    # Bodies of the mailings seen in this drain, loaded once each
+    mailings = {}
+
+    with get_connection() as connection:
+        while limit is None or sent + failed < limit:
+            size = batch_size if limit is None else min(batch_size, limit - sent - failed)
+            # Rows retried in this drain are due later, so the id cursor only moves forward
+            ids, batch = _claim(token, size, last_id)
+            if not ids:
+                break
+            last_id = ids[-1]
+            if not batch:
+                continue
+            missing = {row.mailing_id for row in batch if row.mailing_id} - mailings.keys()
+            if missing:
+                mailings.update(Mailing.objects.in_bulk(missing))
+
+            logs = []
+            for row in batch:
+                error = _send(connection, row, mailings.get(row.mailing_id))
+                now = timezone.now()
+                row.attempts += 1
+                row.claimed_by = ''
+                if error is None:
+                    sent += 1
+                    row.status, row.sent_at, row.last_error = 'SENT', now, ''
+                    action, description = 'MESSAGE', f'Sent "{row.subject}" to {row.to}'
+                else:
+                    failed += 1
+                    row.last_error = error
+                    if row.attempts >= max_attempts:
+                        row.status = 'FAILED'
+                        action, description = 'ERROR', f'Failed to send "{row.subject}" to {row.to}'
+                    else:
+                        row.status = 'PENDING'
+                        row.next_attempt_at = now + timedelta(seconds=retry_seconds * 2 ** (row.attempts - 1))
+                        action = None
+                if action and row.actor_id:
+                    metadata = {**row.metadata, 'outbox_id': row.id}
+                    if error:
+                        metadata['error'] = error
+                    logs.append(ActivityLog(
+                        user_id=row.actor_id,
+                        action=action,
+                        description=description[:255],
+                        metadata=metadata
+                    ))
+
+            with transaction.atomic():
+                # Only record rows whose lease this drain still holds
+                held = set(
+                    EmailOutbox.objects.select_for_update()
+                    .filter(id__in=[row.id for row in batch], status='SENDING', claimed_by=token)
+                    .values_list('id', flat=True)
+                )
+                EmailOutbox.objects.bulk_update(
+                    [row for row in batch if row.id in held],
+                    ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'claimed_by']
+                )
+                ActivityLog.objects.bulk_create([log for log in logs if log.metadata['outbox_id'] in held])
+    return sent, failed
+
+
+def deliver_once(**kwargs):
+    """deliver() unless another drain holds the lock; returns None when skipped"""
+    if not cache.add(LOCK_KEY, True, _setting('OUTBOX_LOCK_SECONDS', 600)):
+        return None
+    try:
+        return deliver(**kwargs)
+    finally:
+        cache.delete(LOCK_KEY)
+
+
+def _deliver_thread():
+    try:
+        deliver_once()
+    except Exception:
+        logger.exception('Email outbox delivery failed')
+    finally:
+        close_old_connections()
+
+
+def deliver_in_background():
+    threading.Thread(target=_deliver_thread, name='email-outbox', daemon=True).start()
+
+
+@shared_task
+def deliver_outbox():
+    """Periodic drain of the outbox; also retries messages whose backoff has passed"""
+    return deliver_once()
@@ -19,6 +19,9 @@ class IsAdminForStatusChange(permissions.BasePermission):
     Only allow admins to change application status
     """
     def has_permission(self, request, view):
+        if view.action == 'bulk_transition':
+            # Enrollers are scoped to their institution by the view
+            return request.user.is_enroller or request.user.is_system_admin
         if view.action in ['approve', 'reject', 'defer', 'waitlist', 'withdraw']:
             return request.user.is_staff
         return True
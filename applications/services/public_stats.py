@@ -0,0 +1,162 @@
+# applications/services/public_stats.py
+"""
+Landing-page statistics served by the public `enrollment/stats/` endpoint.
+
+The aggregates scan the applications table, so they are computed off the
+request path and kept in the default cache. A request younger than
+PUBLIC_STATS_REFRESH_SECONDS is answered from the cache; an older one is
+still answered from the cache while one background thread recomputes it.
+`cache.add` on a lock key makes that refresh single-flight across threads
+and, with a shared cache, across processes. The `refresh_public_stats`
+task recomputes the entry on the same interval from celery beat.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Avg, Count, F
+from applications.models.models import Application
+from institutions.models import Institution, Program
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'applications:public_stats'
+LOCK_KEY = 'applications:public_stats:refreshing'
+
+_lock = threading.Lock()
+
+
+def refresh_interval():
+    return getattr(settings, 'PUBLIC_STATS_REFRESH_SECONDS', 300)
+
+
+def compute_stats():
+    today = datetime.now().date()
+    current_year_start = datetime(today.year, 1, 1).date()
+    last_year_start = datetime(today.year - 1, 1, 1).date()
+
+    # 1. Most popular programs (top 6)
+    popular_programs = list(
+        Program.objects.annotate(
+            applicant_count=Count('applications')
+        ).order_by('-applicant_count')[:6].values('name', 'applicant_count')
+    )
+
+    # Assign colors to programs for consistent chart display
+    colors = ['#0d9488', '#1a365d', '#0f766e', '#0d9488', '#1a365d', '#0f766e']
+    for i, program in enumerate(popular_programs):
+        program['fill'] = colors[i % len(colors)]
+
+    # 2. Total applicants count
+    total_applicants = Application.objects.count()
+
+    # 3. Applicant growth compared to last year
+    current_year_applicants = Application.objects.filter(
+        date_applied__gte=current_year_start
+    ).count()
+
+    last_year_applicants = Application.objects.filter(
+        date_applied__gte=last_year_start,
+        date_applied__lt=current_year_start
+    ).count()
+
+    applicant_growth = 0
+    if last_year_applicants > 0:
+        applicant_growth = round(
+            ((current_year_applicants - last_year_applicants) / last_year_applicants) * 100,
+            1
+        )
+
+    # 4. Total programs and universities
+    total_programs = Program.objects.count()
+    total_universities = Institution.objects.count()
+
+    avg_processing_time = Application.objects.filter(
+        status__in=['Approved', 'Rejected']
+    ).aggregate(
+        avg_days=Avg(
+            F('date_status_changed') - F('date_applied')
+        )
+    )['avg_days'] or timedelta(days=0)
+
+    if isinstance(avg_processing_time, timedelta):
+        avg_processing_time = avg_processing_time.days
+
+    last_year_processing = Application.objects.filter(
+        status__in=['Approved', 'Rejected'],
+        date_status_changed__gte=last_year_start,
+        date_status_changed__lt=current_year_start
+    ).aggregate(
+        avg_days=Avg(
+            F('date_status_changed') - F('date_applied')
+        )
+    )['avg_days'] or timedelta(days=0)
+
+    if isinstance(last_year_processing, timedelta):
+        last_year_processing = last_year_processing.days
+
+    processing_improvement = 0
+    if last_year_processing > 0:
+        processing_improvement = round(last_year_processing - avg_processing_time)
+
+    # 7. Application deadline, a placeholder until deadlines are exposed here
+    next_deadline = None
+
+    return {
+        'popular_programs': popular_programs,
+        'total_applicants': total_applicants,
+        'applicant_growth': applicant_growth,
+        'total_programs': total_programs,
+        'total_universities': total_universities,
+        'avg_processing_time': avg_processing_time,
+        'processing_improvement': processing_improvement,
+        'deadline': next_deadline.date if next_deadline else None,
+        'semester': next_deadline.semester if next_deadline else 'Fall Semester',
+        'last_updated': datetime.now().isoformat()
+    }
+
+
+def refresh():
+    """Recompute the stats and store them; returns the new cache entry"""
+    entry = {'data': compute_stats(), 'computed_at': time.time()}
+    cache.set(STATS_KEY, entry, timeout=None)
+    return entry
+
+
+def _refresh_in_thread():
+    try:
+        refresh()
+    except Exception:
+        logger.exception('Refreshing the public stats failed')
+    finally:
+        cache.delete(LOCK_KEY)
+        close_old_connections()
+
+
+def refresh_in_background():
+    """Start one refresh unless one is already running"""
+    # The lock expires on its own in case the refreshing process dies
+    if not cache.add(LOCK_KEY, True, timeout=refresh_interval()):
+        return
+    threading.Thread(target=_refresh_in_thread, daemon=True).start()
+
+
+def get_stats():
+    """The cached stats, recomputed in the background once they are stale"""
+    entry = cache.get(STATS_KEY)
+    if entry is None:
+        # Cold cache: one thread per process computes, the others wait for it
+        with _lock:
+            entry = cache.get(STATS_KEY) or refresh()
+    elif time.time() - entry['computed_at'] > refresh_interval():
+        refresh_in_background()
+    return entry['data']
+
+
+@shared_task
+def refresh_public_stats():
+    refresh()
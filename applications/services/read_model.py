@@ -0,0 +1,89 @@
+# applications/services/read_model.py
+from django.db import transaction
+from applications.models.models import Application, ApplicationReadModel
+
+# Read-model column -> lookup on Application that produces it
+PROJECTION = {
+    'institution_id': 'program__department__faculty__institution_id',
+    'institution_name': 'program__department__faculty__institution__name',
+    'faculty_id': 'program__department__faculty_id',
+    'faculty_name': 'program__department__faculty__name',
+    'department_id': 'program__department_id',
+    'department_name': 'program__department__name',
+    'program_id': 'program_id',
+    'program_name': 'program__name',
+    'program_code': 'program__code',
+    'student_id': 'student_id',
+    'student_name': 'student__name',
+    'student_username': 'student__username',
+    'student_email': 'student__email',
+    'student_points': 'student__a_level_points',
+    'status': 'status',
+    'date_applied': 'date_applied',
+    'date_updated': 'date_updated',
+    'date_status_changed': 'date_status_changed',
+}
+
+# Student columns that can be copied straight from a saved user
+STUDENT_FIELDS = {
+    'student_name': 'name',
+    'student_username': 'username',
+    'student_email': 'email',
+    'student_points': 'a_level_points',
+}
+
+
+def _rows(applications):
+    """Yield read-model rows for an Application queryset from one joined SELECT"""
+    values = applications.order_by().values('id', *PROJECTION.values())
+    for row in values.iterator(chunk_size=2000):
+        yield ApplicationReadModel(
+            application_id=row['id'],
+            **{column: row[lookup] for column, lookup in PROJECTION.items()}
+        )
+
+
+def _upsert(rows):
+    ApplicationReadModel.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['application'],
+        update_fields=list(PROJECTION),
+    )
+
+
+def sync_applications(applications, batch_size=1000):
+    """Insert or refresh the read-model rows of the given applications"""
+    synced, batch = 0, []
+    for row in _rows(applications):
+        batch.append(row)
+        if len(batch) == batch_size:
+            _upsert(batch)
+            synced += len(batch)
+            batch = []
+    if batch:
+        _upsert(batch)
+        synced += len(batch)
+    return synced
+
+
+def sync_application(application_id):
+    return sync_applications(Application.objects.filter(pk=application_id))
+
+
+def sync_student(user, update_fields=None):
+    """Copy a student's name, email and points onto their rows without joining"""
+    changes = {
+        column: getattr(user, field)
+        for column, field in STUDENT_FIELDS.items()
+        if update_fields is None or field in update_fields
+    }
+    if changes:
+        ApplicationReadModel.objects.filter(student_id=user.pk).update(**changes)
+
+
+def rebuild_read_model():
+    """Recompute every row from the applications table"""
+    with transaction.atomic():
+        ApplicationReadModel.objects.all().delete()
+        return sync_applications(Application.objects.all())
@@ -0,0 +1,112 @@
+# applications/services/read_state.py
+"""
+Read watermarks for notifications and messages.
+
+A notification or message counts as read when its own `is_read` flag is set
+(single items opened one by one) or its id is at or below the reader's
+watermark: NotificationWatermark per user, MessageWatermark per user and
+conversation partner. "Mark all read" moves the watermark with one upsert,
+which also inserts it the first time and never moves it backwards. Unread
+notifications are one range count over the partial `is_read=False` index
+above the watermark. Unread messages are summed from the Conversation
+counters, which are recounted whenever a message watermark moves.
+"""
+from django.db import connection
+from django.db.models import Case, Max, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from applications.models.models import Conversation, Message, MessageWatermark, Notification, NotificationWatermark
+from applications.services import conversations
+
+
+def _advance(model, lookup, up_to):
+    """
+    Raise the watermark row matching `lookup` to `up_to`, inserting it the
+    first time, with one upsert that never lowers it; returns the watermark in effect
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(name) for name in lookup] + [
+        model._meta.get_field('last_read_id'), model._meta.get_field('updated_at')
+    ]
+    values = [*lookup.values(), up_to, timezone.now()]
+    advanced = f'{table}.{quote("last_read_id")} < excluded.{quote("last_read_id")}'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({", ".join(quote(field.column) for field in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))}) '
+            f'ON CONFLICT ({", ".join(quote(field.column) for field in fields[:len(lookup)])}) DO UPDATE SET '
+            + ', '.join(
+                f'{quote(field.column)} = CASE WHEN {advanced} '
+                f'THEN excluded.{quote(field.column)} ELSE {table}.{quote(field.column)} END'
+                for field in fields[len(lookup):]
+            )
+            + f' RETURNING {quote("last_read_id")}',
+            [field.get_db_prep_value(value, connection) for field, value in zip(fields, values)]
+        )
+        return cursor.fetchone()[0]
+
+
+def notification_watermark(user_id):
+    return NotificationWatermark.objects.filter(user_id=user_id).values_list('last_read_id', flat=True).first() or 0
+
+
+def unread_notifications(user_id):
+    watermark = NotificationWatermark.objects.filter(user_id=user_id).values('last_read_id')
+    return Notification.objects.filter(
+        user_id=user_id,
+        is_read=False,
+        id__gt=Coalesce(Subquery(watermark), 0)
+    ).count()
+
+
+def mark_notifications_read(user_id, up_to=None):
+    """Everything up to `up_to` (default the newest notification) counts as read; None if there is nothing"""
+    last = Notification.objects.filter(user_id=user_id).aggregate(last=Max('id'))['last']
+    if last is None:
+        return None
+    # A watermark past the newest notification would hide notifications not created yet
+    up_to = last if up_to is None else min(up_to, last)
+    return _advance(NotificationWatermark, {'user_id': user_id}, up_to)
+
+
+def message_watermarks(user_id):
+    """{(reader id, sender id): last read id} for both directions of the user's conversations"""
+    return {
+        (user, peer): last_read_id
+        for user, peer, last_read_id in MessageWatermark.objects.filter(
+            Q(user_id=user_id) | Q(peer_id=user_id)
+        ).values_list('user_id', 'peer_id', 'last_read_id')
+    }
+
+
+def unread_messages(user_id, peer_id=None):
+    """Unread messages to the user, from one partner or from everyone, summed from the conversation counters"""
+    rows = conversations.for_user(user_id)
+    if peer_id is not None:
+        user_a, user_b = conversations.participants(user_id, peer_id)
+        rows = Conversation.objects.filter(user_a_id=user_a, user_b_id=user_b)
+    return rows.aggregate(unread=Coalesce(Sum(
+        Case(When(user_a_id=user_id, then='unread_a'), default='unread_b')
+    ), 0))['unread']
+
+
+def mark_messages_read(user_id, peer_id, up_to=None):
+    """Messages from `peer_id` up to `up_to` (default the newest) count as read; None if there are none"""
+    last = Message.objects.filter(recipient_id=user_id, sender_id=peer_id).aggregate(last=Max('id'))['last']
+    if last is None:
+        return None
+    # A watermark past the newest message would hide messages not sent yet
+    up_to = last if up_to is None else min(up_to, last)
+    last_read_id = _advance(MessageWatermark, {'user_id': user_id, 'peer_id': peer_id}, up_to)
+    conversations.recount_unread(user_id, peer_id)
+    return last_read_id
+
+
+def is_read(item, watermarks):
+    """Whether a Notification or Message counts as read given the watermarks in serializer context"""
+    if item.is_read:
+        return True
+    if isinstance(item, Notification):
+        return item.id <= watermarks.get(item.user_id, 0)
+    return item.id <= watermarks.get((item.recipient_id, item.sender_id), 0)
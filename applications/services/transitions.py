@@ -0,0 +1,111 @@
+# applications/services/transitions.py
+"""
+Status changes for many applications at once.
+
+Transitions are checked against Application.STATUS_TRANSITIONS in memory
+and written with one UPDATE per source status. Queryset updates send no
+signals, so the points histogram, daily stats and read model are adjusted
+here with a handful of bulk statements.
+"""
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.utils import timezone
+from applications.models.models import ActivityLog, Application, ApplicationReadModel
+from applications.services import daily_stats, histogram
+
+# ActivityLog action recorded for each target status
+LOG_ACTIONS = {
+    'Approved': 'APPROVED',
+    'Rejected': 'REJECTED',
+    'Deferred': 'REVIEWED',
+    'Waitlisted': 'REVIEWED',
+    'Withdrawn': 'REVIEWED',
+}
+
+
+class TransitionConflict(Exception):
+    """Some applications changed status while the transition was being applied"""
+
+
+def bulk_transition(applications, ids, new_status, actor, admin_notes=None, log_metadata=None):
+    """
+    Move the applications in `applications` (a queryset that scopes what
+    `actor` may change) with the given ids to `new_status`. `log_metadata`
+    is added to the metadata of every ActivityLog entry.
+
+    Returns (updated ids, [{'id', 'reason'}] for the ids that were skipped).
+    """
+    ids = list(dict.fromkeys(ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = {
+            row['id']: row
+            for row in applications.filter(pk__in=ids).select_for_update().order_by().values(
+                'id', 'status', 'program_id', 'program__name', 'student_id',
+                'student__a_level_points', 'date_applied'
+            )
+        }
+
+        skipped, by_source = [], defaultdict(list)
+        for pk in ids:
+            row = rows.get(pk)
+            if row is None:
+                skipped.append({'id': pk, 'reason': 'Application not found'})
+            elif new_status not in Application.STATUS_TRANSITIONS.get(row['status'], []):
+                skipped.append({'id': pk, 'reason': f"Cannot change status from {row['status']} to {new_status}"})
+            else:
+                by_source[row['status']].append(pk)
+
+        changes = {'status': new_status, 'date_status_changed': now, 'date_updated': now}
+        if admin_notes:
+            changes['admin_notes'] = admin_notes
+        for source, source_ids in by_source.items():
+            updated = Application.objects.filter(pk__in=source_ids, status=source).update(**changes)
+            if updated != len(source_ids):
+                raise TransitionConflict(f'{len(source_ids) - updated} applications changed status concurrently')
+
+        updated_ids = [pk for source_ids in by_source.values() for pk in source_ids]
+        moved = [rows[pk] for pk in updated_ids]
+        _update_derived_tables(moved, new_status, now)
+        ActivityLog.objects.bulk_create([
+            ActivityLog(
+                user=actor,
+                action=LOG_ACTIONS.get(new_status, 'REVIEWED'),
+                description=f"Changed application status from {row['status']} to {new_status}",
+                metadata={
+                    'application_id': row['id'],
+                    'old_status': row['status'],
+                    'new_status': new_status,
+                    'program': row['program__name'],
+                    'bulk': True,
+                    **(log_metadata or {}),
+                }
+            )
+            for row in moved
+        ], batch_size=1000)
+
+    return updated_ids, skipped
+
+
+def _update_derived_tables(rows, new_status, now):
+    """Apply what the Application post_save receivers would have done for each row"""
+    points_deltas, day_deltas = Counter(), Counter()
+    for row in rows:
+        points = row['student__a_level_points']
+        if histogram.counts_in_histogram(row['status'], points):
+            points_deltas[(row['program_id'], points)] -= 1
+        if histogram.counts_in_histogram(new_status, points):
+            points_deltas[(row['program_id'], points)] += 1
+        day = timezone.localdate(row['date_applied'])
+        day_deltas[(day, row['program_id'], row['status'])] -= 1
+        day_deltas[(day, row['program_id'], new_status)] += 1
+
+    histogram.apply_deltas(points_deltas)
+    daily_stats.apply_deltas(day_deltas)
+
+    ApplicationReadModel.objects.filter(application_id__in=[row['id'] for row in rows]).update(
+        status=new_status,
+        date_status_changed=now,
+        date_updated=now
+    )
@@ -0,0 +1,161 @@
+# applications/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from applications.models.models import Application, Conversation, Message, Notification
+from applications.services import conversations, daily_stats, histogram, live, read_model
+from institutions.models import Institution, Faculty, Department, Program
+
+User = get_user_model()
+
+# Marks a user whose stored points were not loaded in pre_save
+_UNKNOWN = object()
+
+
+def _student_points(application):
+    """Read the student's points without loading the whole user when possible"""
+    if Application.student.is_cached(application):
+        return application.student.a_level_points
+    return User.objects.filter(pk=application.student_id).values_list('a_level_points', flat=True).first()
+
+
+@receiver(pre_save, sender=Application)
+def remember_application_state(sender, instance, **kwargs):
+    """Remember the stored status and program so post_save can diff them"""
+    instance._stored_state = None
+    if not instance._state.adding and instance.pk:
+        # From the snapshot taken at load time (DirtyFieldsMixin), no query
+        instance._stored_state = {
+            'status': instance.original_value('status'),
+            'program_id': instance.original_value('program'),
+        }
+
+
+@receiver(post_save, sender=Application)
+def update_points_histogram(sender, instance, created, **kwargs):
+    """Keep ProgramPointsHistogram in sync with application changes"""
+    stored = getattr(instance, '_stored_state', None)
+    if not created and stored is None:
+        return
+    if stored and stored['status'] == instance.status and stored['program_id'] == instance.program_id:
+        return
+
+    points = _student_points(instance)
+    if stored and histogram.counts_in_histogram(stored['status'], points):
+        histogram.bump(stored['program_id'], points, -1)
+    if histogram.counts_in_histogram(instance.status, points):
+        histogram.bump(instance.program_id, points, 1)
+
+
+@receiver(post_save, sender=Application)
+def update_daily_stats(sender, instance, created, **kwargs):
+    """Keep ApplicationDailyStats in sync with application changes"""
+    stored = getattr(instance, '_stored_state', None)
+    if not created and stored is None:
+        return
+    if stored and stored['status'] == instance.status and stored['program_id'] == instance.program_id:
+        return
+
+    day = daily_stats.day_of(instance)
+    if stored:
+        daily_stats.bump(day, stored['program_id'], stored['status'], -1)
+    daily_stats.bump(day, instance.program_id, instance.status, 1)
+
+
+@receiver(post_save, sender=Application)
+def update_read_model(sender, instance, **kwargs):
+    read_model.sync_application(instance.pk)
+
+
+@receiver(post_delete, sender=Application)
+def remove_from_points_histogram(sender, instance, **kwargs):
+    points = _student_points(instance)
+    if histogram.counts_in_histogram(instance.status, points):
+        histogram.bump(instance.program_id, points, -1)
+
+
+@receiver(post_delete, sender=Application)
+def remove_from_daily_stats(sender, instance, **kwargs):
+    daily_stats.bump(daily_stats.day_of(instance), instance.program_id, instance.status, -1)
+
+
+@receiver(pre_save, sender=User)
+def remember_student_points(sender, instance, update_fields=None, **kwargs):
+    instance._stored_points = _UNKNOWN
+    if update_fields is not None and 'a_level_points' not in update_fields:
+        return
+    if not instance._state.adding and instance.has_changed('a_level_points'):
+        instance._stored_points = instance.original_value('a_level_points')
+
+
+@receiver(post_save, sender=User)
+def move_student_in_points_histogram(sender, instance, created, update_fields=None, **kwargs):
+    """Re-bucket the student's applications when their points change"""
+    stored_points = getattr(instance, '_stored_points', _UNKNOWN)
+    if created or stored_points is _UNKNOWN:
+        return
+    histogram.move_student(instance.pk, stored_points, instance.a_level_points)
+
+
+@receiver(post_save, sender=User)
+def update_student_read_model(sender, instance, created, update_fields=None, **kwargs):
+    if not created:
+        read_model.sync_student(instance, update_fields)
+
+
+@receiver(post_save, sender=Program)
+def update_program_read_model(sender, instance, created, **kwargs):
+    if not created:
+        read_model.sync_applications(Application.objects.filter(program_id=instance.pk))
+        daily_stats.sync_institutions(Program.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Department)
+def update_department_read_model(sender, instance, created, **kwargs):
+    if not created:
+        read_model.sync_applications(Application.objects.filter(program__department_id=instance.pk))
+        daily_stats.sync_institutions(Program.objects.filter(department_id=instance.pk))
+
+
+@receiver(post_save, sender=Faculty)
+def update_faculty_read_model(sender, instance, created, **kwargs):
+    if not created:
+        read_model.sync_applications(Application.objects.filter(program__department__faculty_id=instance.pk))
+        daily_stats.sync_institutions(Program.objects.filter(department__faculty_id=instance.pk))
+
+
+@receiver(post_save, sender=Institution)
+def update_institution_read_model(sender, instance, created, **kwargs):
+    if not created:
+        read_model.sync_applications(
+            Application.objects.filter(program__department__faculty__institution_id=instance.pk)
+        )
+
+
+@receiver(post_save, sender=Notification)
+def publish_new_notification(sender, instance, created, **kwargs):
+    if created:
+        live.publish_notification(instance)
+
+
+@receiver(pre_save, sender=Message)
+def assign_conversation(sender, instance, **kwargs):
+    if instance.conversation_id is None:
+        instance.conversation = conversations.for_pair(instance.sender_id, instance.recipient_id)
+
+
+@receiver(post_save, sender=Message)
+def update_conversation(sender, instance, created, **kwargs):
+    if created:
+        conversations.record(instance)
+
+
+@receiver(post_delete, sender=Message)
+def refresh_conversation(sender, instance, **kwargs):
+    conversations.refresh(Conversation.objects.filter(pk=instance.conversation_id))
+
+
+@receiver(post_save, sender=Message)
+def publish_new_message(sender, instance, created, **kwargs):
+    if created:
+        live.publish_message(instance)
@@ -1,3 +1,1096 @@
-from django.test import TestCase
+import re
+import time
+import uuid
+from datetime import date, timedelta
+from unittest import mock
+from urllib.parse import urlsplit
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from rest_framework.test import APIClient
+from applications.api import stream
+from applications.api.serializers.serializers import ApplicationListSerializer, ApplicationSerializer
+from applications.models.models import (
+    ActivityLog, Application, ApplicationDailyStats, ApplicationReadModel, Deadline, EmailOutbox, Mailing,
+    Message, MessageWatermark, Notification, NotificationFanout, ProgramPointsHistogram
+)
+from applications.services import (
+    admission_rules, conversations, daily_stats, fanout, histogram, live, mass_mail, outbox, public_stats,
+    read_model, read_state, transitions
+)
+from applications.services.emails import send_deadline_event
+from institutions.models import Department, Faculty, Institution, Program
+from university_platform import metrics
+from university_platform.pubsub import broker
+from university_platform.query_budget import (
+    QueryBudgetExceeded, QueryBudgetMiddleware, QueryInspector, assert_query_budget, assert_view_budget
+)
+from users.models.models import UserSettings
 
-# Create your tests here.
+User = get_user_model()
+
+
+def make_user(username, **fields):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        name=username.title(),
+        password='password',
+        **fields
+    )
+
+
+def make_program(institution_name, code, **fields):
+    institution = Institution.objects.create(name=institution_name, date_established=date(1955, 1, 1))
+    faculty = Faculty.objects.create(institution=institution, name='Science', code=f'{code}-SCI')
+    department = Department.objects.create(faculty=faculty, name='Computing')
+    return Program.objects.create(
+        department=department,
+        name=fields.pop('name', 'Computer Science'),
+        code=code,
+        min_points_required=fields.pop('min_points_required', 10),
+        total_enrollment=100,
+        start_date=date.today(),
+        end_date=date.today() + timedelta(days=365 * 4),
+        **fields
+    )
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('counted', is_student=True)
+
+    def lookups(self, times):
+        for _ in range(times):
+            User.objects.filter(pk=self.user.pk).exists()
+
+    def test_inspector_reports_repeated_shapes_as_n_plus_one(self):
+        inspector = QueryInspector(n_plus_one_threshold=3)
+        with inspector.capture():
+            self.lookups(2)
+        self.assertEqual(inspector.count, 2)
+        self.assertEqual(inspector.n_plus_one, [])
+
+        with inspector.capture():
+            self.lookups(1)
+            Notification.objects.filter(user=self.user).count()
+        self.assertEqual(inspector.count, 4)
+        (shape, times, stack), = inspector.n_plus_one
+        self.assertIn('users_user', shape)
+        self.assertEqual(times, 3)
+        self.assertTrue(any(frame.name == 'lookups' for frame in stack))
+
+    def test_inspector_groups_in_lists_of_any_length(self):
+        inspector = QueryInspector(n_plus_one_threshold=2)
+        with inspector.capture():
+            list(User.objects.filter(pk__in=[self.user.pk]))
+            list(User.objects.filter(pk__in=[self.user.pk, self.user.pk, self.user.pk]))
+        self.assertEqual(len(inspector.shapes), 1)
+        self.assertEqual(len(inspector.n_plus_one), 1)
+
+    def test_assert_query_budget(self):
+        with assert_query_budget(2):
+            self.lookups(2)
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_query_budget(1):
+                self.lookups(2)
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            with assert_query_budget(10):
+                self.lookups(5)
+        with assert_query_budget(10, allow_n_plus_one=True):
+            self.lookups(5)
+
+    def test_assert_view_budget_uses_the_declared_budget(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = assert_view_budget(client, '/api/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread': 0})
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'declares no query budget'):
+            assert_view_budget(client, '/api/deadlines/')
+
+    def run_middleware(self, path, queries):
+        def get_response(request):
+            self.lookups(queries)
+            return 'response'
+
+        middleware = QueryBudgetMiddleware(get_response)
+        request = RequestFactory().get(path)
+
+        def view(request):
+            middleware.process_view(request, resolve(path).func, (), {})
+            return get_response(request)
+
+        middleware.get_response = view
+        return middleware(request)
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=False)
+    def test_middleware_logs_requests_over_budget(self):
+        with self.assertLogs('university_platform.query_budget', 'WARNING') as logs:
+            self.assertEqual(self.run_middleware('/api/notifications/unread_count/', 2), 'response')
+        self.assertIn('[NotificationViewSet.unread_count]: 2 queries', logs.output[0])
+        self.assertIn('(budget 1)', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_STRICT=True)
+    def test_middleware_raises_in_strict_mode(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.run_middleware('/api/notifications/unread_count/', 2)
+        with self.assertNoLogs('university_platform.query_budget', 'WARNING'):
+            self.run_middleware('/api/notifications/unread_count/', 1)
+
+    @override_settings(QUERY_BUDGET_ENABLED=False)
+    def test_middleware_is_off_unless_enabled(self):
+        with self.assertNoLogs('university_platform.query_budget', 'WARNING'):
+            self.run_middleware('/api/notifications/unread_count/', 8)
+
+
+class ViewMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('measured', is_student=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def observed(self, label):
+        return REGISTRY.get_sample_value('drf_view_serializer_seconds_count', {'view': label}) or 0
+
+    def test_serializers_are_only_timed_inside_a_request(self):
+        self.assertFalse(issubclass(ApplicationSerializer, metrics.TimedDataMixin))
+        timed_class = metrics.timed(ApplicationSerializer)
+        self.assertIs(metrics.timed(timed_class), timed_class)
+        self.assertIs(metrics.timed(ApplicationSerializer), timed_class)
+        self.assertIsInstance(timed_class([], many=True), metrics.TimedDataMixin)
+        self.assertEqual(timed_class([], many=True).data, [])
+
+    def test_request_observes_its_serializer_time(self):
+        before = self.observed('NotificationViewSet.my_notifications')
+        self.client.get('/api/notifications/my_notifications/')
+        self.assertEqual(self.observed('NotificationViewSet.my_notifications'), before + 1)
+
+    def test_request_without_a_serializer_is_not_observed(self):
+        before = self.observed('NotificationViewSet.unread_count')
+        self.client.get('/api/notifications/unread_count/')
+        self.assertEqual(self.observed('NotificationViewSet.unread_count'), before)
+
+    def test_nested_blocks_count_once(self):
+        timer = metrics._local.timer = metrics.SerializerTimer()
+        try:
+            with metrics.serializing():
+                with metrics.serializing():
+                    self.assertEqual(timer.depth, 1)
+        finally:
+            metrics._local.timer = None
+        self.assertTrue(timer.used)
+        self.assertEqual(timer.depth, 0)
+
+
+class DirtyFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Tracked University', 'TRACK-CS')
+        cls.student = make_user('tracked', is_student=True, a_level_points=12)
+        cls.application = Application.objects.create(
+            student=cls.student, program=cls.program, personal_statement='Statement'
+        )
+
+    def updated_columns(self, application, **kwargs):
+        """Columns in the SET clause of the application UPDATE run by save()"""
+        with CaptureQueriesContext(connection) as queries:
+            application.save(**kwargs)
+        update, = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "applications_application"')
+        ]
+        return set(re.findall(r'"(\w+)" = ', update.split(' WHERE ')[0]))
+
+    def test_snapshot_answers_without_a_query(self):
+        application = Application.objects.get(pk=self.application.pk)
+        application.status = 'Approved'
+        with self.assertNumQueries(0):
+            self.assertTrue(application.has_changed('status'))
+            self.assertFalse(application.has_changed('program'))
+            self.assertEqual(application.original_value('status'), 'Pending')
+            self.assertEqual(application.dirty_fields(), ['status'])
+
+    def test_only_dirty_and_auto_now_fields_are_written(self):
+        application = Application.objects.get(pk=self.application.pk)
+        application.status = 'Approved'
+        self.assertEqual(self.updated_columns(application), {'status', 'date_status_changed', 'date_updated'})
+        self.assertFalse(application.has_changed('status'))
+        self.assertEqual(application.dirty_fields(), [])
+        self.assertEqual(self.updated_columns(application), {'date_updated'})
+
+    def test_explicit_update_fields_are_kept(self):
+        application = Application.objects.get(pk=self.application.pk)
+        application.personal_statement = 'Revised'
+        application.admin_notes = 'Not written'
+        self.assertEqual(self.updated_columns(application, update_fields=['personal_statement']),
+                         {'personal_statement'})
+        self.assertTrue(application.has_changed('admin_notes'))
+        self.assertFalse(application.has_changed('personal_statement'))
+
+    def test_subset_tracking_writes_every_column(self):
+        student = User.objects.get(pk=self.student.pk)
+        student.a_level_points = 14
+        self.assertTrue(student.has_changed('a_level_points'))
+        self.assertEqual(student.original_value('a_level_points'), 12)
+        with CaptureQueriesContext(connection) as queries:
+            student.save()
+        update, = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "users_user"')]
+        self.assertIn('"email" = ', update)
+        self.assertFalse(student.has_changed('a_level_points'))
+
+
+class PointsHistogramTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Histogram University', 'HIST-CS')
+        cls.other_program = make_program('Other Histogram University', 'HIST-SE')
+        cls.student = make_user('bucketed', is_student=True, a_level_points=12)
+
+    def buckets(self):
+        """{(program id, points): count} of the non-empty buckets"""
+        return {
+            (program_id, points): count
+            for program_id, points, count in ProgramPointsHistogram.objects.filter(count__gt=0)
+            .values_list('program_id', 'points', 'count')
+        }
+
+    def apply(self, **fields):
+        return Application.objects.create(
+            student=self.student, program=fields.pop('program', self.program), personal_statement='Statement', **fields
+        )
+
+    def test_new_application_is_counted(self):
+        self.apply()
+        make_user('peer', is_student=True, a_level_points=12).applications.create(
+            program=self.program, personal_statement='Statement'
+        )
+        self.assertEqual(self.buckets(), {(self.program.pk, 12): 2})
+
+    def test_status_change_keeps_the_bucket_until_withdrawn(self):
+        application = self.apply()
+        application.status = 'Approved'
+        application.save()
+        self.assertEqual(self.buckets(), {(self.program.pk, 12): 1})
+
+        application.status = 'Withdrawn'
+        application.save()
+        self.assertEqual(self.buckets(), {})
+
+    def test_program_change_and_delete_move_the_count(self):
+        application = self.apply()
+        application.program = self.other_program
+        application.save()
+        self.assertEqual(self.buckets(), {(self.other_program.pk, 12): 1})
+
+        application.delete()
+        self.assertEqual(self.buckets(), {})
+
+    def test_points_change_rebuckets_active_applications(self):
+        self.apply()
+        self.apply(program=self.other_program, status='Withdrawn')
+        self.student.a_level_points = 15
+        self.student.save()
+        self.assertEqual(self.buckets(), {(self.program.pk, 15): 1})
+
+    def test_incremental_counts_match_a_rebuild(self):
+        self.apply()
+        withdrawn = self.apply(program=self.other_program)
+        withdrawn.status = 'Withdrawn'
+        withdrawn.save()
+        maintained = self.buckets()
+        histogram.rebuild_histogram()
+        self.assertEqual(self.buckets(), maintained)
+
+
+class DailyStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Counted University', 'DAY-CS')
+        cls.other_program = make_program('Other Counted University', 'DAY-SE')
+        cls.admin = make_user('counter', is_system_admin=True, is_staff=True)
+
+    def apply(self, program=None):
+        return Application.objects.create(
+            student=make_user(f'daily{Application.objects.count()}', is_student=True),
+            program=program or self.program,
+            personal_statement='Statement'
+        )
+
+    def buckets(self):
+        """{(date, program id, institution id, status): count} of the non-empty buckets"""
+        return {
+            (day, program_id, institution_id, status): count
+            for day, program_id, institution_id, status, count in ApplicationDailyStats.objects.filter(count__gt=0)
+            .values_list('date', 'program_id', 'institution_id', 'status', 'count')
+        }
+
+    def assert_matches_rebuild(self):
+        maintained = self.buckets()
+        daily_stats.rebuild_daily_stats()
+        self.assertEqual(self.buckets(), maintained)
+
+    def test_saves_and_deletes_match_a_rebuild(self):
+        approved, moved, deleted = self.apply(), self.apply(), self.apply()
+        self.apply(self.other_program)
+        approved.status = 'Approved'
+        approved.save()
+        moved.program = self.other_program
+        moved.save()
+        deleted.delete()
+        self.assertEqual(daily_stats.status_counts(), {'Approved': 1, 'Pending': 2})
+        self.assertEqual(daily_stats.program_counts(), {self.program.pk: 1, self.other_program.pk: 2})
+        self.assert_matches_rebuild()
+
+    def test_bulk_transition_deltas_match_a_rebuild(self):
+        applications = [self.apply(), self.apply(), self.apply(self.other_program)]
+        approved = self.apply()
+        approved.status = 'Approved'
+        approved.save()
+        transitions.bulk_transition(
+            Application.objects.all(), [application.pk for application in applications] + [approved.pk],
+            'Rejected', self.admin
+        )
+        # Emptied buckets stay behind with a zero count
+        self.assertEqual(daily_stats.status_counts(), {'Approved': 1, 'Pending': 0, 'Rejected': 3})
+        self.assert_matches_rebuild()
+
+    def test_catalog_move_follows_the_institution(self):
+        self.apply()
+        self.program.department = self.other_program.department
+        self.program.save()
+        institution_id = self.other_program.department.faculty.institution_id
+        self.assertEqual(daily_stats.institution_counts(), {institution_id: 1})
+        self.assertEqual(daily_stats.status_counts(institution_id), {'Pending': 1})
+        self.assert_matches_rebuild()
+
+    def test_monthly_trends_sum_the_days(self):
+        self.apply()
+        self.apply(self.other_program)
+        today = timezone.localdate()
+        self.assertEqual(daily_stats.monthly_trends(), [{'month': today.month, 'year': today.year, 'count': 2}])
+
+
+@override_settings(PUBLIC_STATS_REFRESH_SECONDS=60)
+class PublicStatsTests(TestCase):
+    def setUp(self):
+        cache.delete_many([public_stats.STATS_KEY, public_stats.LOCK_KEY])
+        self.addCleanup(cache.delete_many, [public_stats.STATS_KEY, public_stats.LOCK_KEY])
+
+    def store(self, data, age):
+        cache.set(public_stats.STATS_KEY, {'data': data, 'computed_at': time.time() - age}, timeout=None)
+
+    def test_cold_cache_is_computed_once(self):
+        make_program('Public University', 'PUB-CS')
+        stats = public_stats.get_stats()
+        self.assertEqual((stats['total_programs'], stats['total_universities']), (1, 1))
+        with mock.patch.object(public_stats, 'compute_stats') as compute:
+            self.assertEqual(public_stats.get_stats(), stats)
+        compute.assert_not_called()
+
+    @mock.patch.object(public_stats.threading, 'Thread')
+    def test_fresh_entry_starts_no_refresh(self, thread):
+        self.store({'total_applicants': 1}, age=10)
+        self.assertEqual(public_stats.get_stats(), {'total_applicants': 1})
+        thread.assert_not_called()
+
+    @mock.patch.object(public_stats.threading, 'Thread')
+    def test_stale_entry_is_served_while_one_refresh_runs(self, thread):
+        self.store({'total_applicants': 1}, age=120)
+        self.assertEqual(public_stats.get_stats(), {'total_applicants': 1})
+        self.assertEqual(public_stats.get_stats(), {'total_applicants': 1})
+        thread.assert_called_once_with(target=public_stats._refresh_in_thread, daemon=True)
+        self.assertTrue(cache.get(public_stats.LOCK_KEY))
+
+        with mock.patch.object(public_stats, 'compute_stats', return_value={'total_applicants': 2}):
+            public_stats._refresh_in_thread()
+        self.assertIsNone(cache.get(public_stats.LOCK_KEY))
+        self.assertEqual(public_stats.get_stats(), {'total_applicants': 2})
+
+    def test_failed_refresh_releases_the_lock(self):
+        cache.add(public_stats.LOCK_KEY, True)
+        with mock.patch.object(public_stats, 'compute_stats', side_effect=RuntimeError('boom')):
+            with self.assertLogs('applications.services.public_stats', 'ERROR'):
+                public_stats._refresh_in_thread()
+        self.assertIsNone(cache.get(public_stats.LOCK_KEY))
+
+
+def follow(client, path):
+    """Ids of every page from `path` on, following `next`, and the number of pages"""
+    ids, pages = [], 0
+    while path:
+        response = client.get(path)
+        ids += [row['id'] for row in response.data['results']]
+        pages += 1
+        next_url = urlsplit(response.data['next'] or '')
+        path = f'{next_url.path}?{next_url.query}' if next_url.path else None
+    return ids, pages
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('paged', is_student=True)
+        Notification.objects.bulk_create([
+            Notification(user=cls.student, title=f'Update {i}', message='News', notification_type='MESSAGE')
+            for i in range(7)
+        ])
+        # Ties on the timestamp are broken by id
+        now = timezone.now()
+        ids = list(Notification.objects.order_by('id').values_list('id', flat=True))
+        Notification.objects.filter(id__in=ids[:4]).update(created_at=now - timedelta(hours=1))
+        Notification.objects.filter(id__in=ids[4:]).update(created_at=now)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_next_cursor_walks_every_row_once_newest_first(self):
+        expected = list(
+            Notification.objects.filter(user=self.student).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        ids, pages = follow(self.client, '/api/notifications/my_notifications/?page_size=2')
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 4)
+
+    def test_last_page_has_no_next(self):
+        response = self.client.get('/api/notifications/my_notifications/?page_size=7')
+        self.assertEqual(len(response.data['results']), 7)
+        self.assertIsNone(response.data['next'])
+
+    def test_page_size_is_capped(self):
+        Notification.objects.bulk_create([
+            Notification(user=self.student, title='Bulk', message='News', notification_type='MESSAGE')
+            for _ in range(100)
+        ])
+        response = self.client.get('/api/notifications/my_notifications/?page_size=1000')
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get('/api/notifications/my_notifications/?page_size=0')
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get('/api/notifications/my_notifications/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_ordering_parameter_reverses_the_walk(self):
+        program = make_program('Paged University', 'PAGE-CS')
+        applications = [
+            Application.objects.create(student=make_user(f'applicant{i}', is_student=True), program=program,
+                                       personal_statement='Statement')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(make_user('pager', is_system_admin=True, is_staff=True))
+        ids, _ = follow(self.client, '/api/applications/?ordering=date_applied&page_size=2')
+        self.assertEqual(ids, [application.pk for application in applications])
+        ids, _ = follow(self.client, '/api/applications/?page_size=2')
+        self.assertEqual(ids, [application.pk for application in reversed(applications)])
+
+
+class ApplicationReadModelTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Projected University', 'PROJ-CS')
+        cls.student = make_user('projected', is_student=True, a_level_points=11)
+        cls.application = Application.objects.create(
+            student=cls.student, program=cls.program, personal_statement='Statement'
+        )
+
+    def row(self):
+        return ApplicationReadModel.objects.get(application=self.application)
+
+    def test_new_application_is_projected(self):
+        row = self.row()
+        self.assertEqual(
+            (row.institution_name, row.faculty_name, row.department_name, row.program_name, row.program_code),
+            ('Projected University', 'Science', 'Computing', 'Computer Science', 'PROJ-CS')
+        )
+        self.assertEqual((row.student_id, row.student_name, row.student_points), (self.student.pk, 'Projected', 11))
+        self.assertEqual(row.status, 'Pending')
+
+    def test_status_change_is_copied(self):
+        self.application.status = 'Approved'
+        self.application.save()
+        row = self.row()
+        self.assertEqual(row.status, 'Approved')
+        self.assertEqual(row.date_status_changed, Application.objects.get(pk=self.application.pk).date_status_changed)
+
+    def test_student_changes_are_copied(self):
+        self.student.name = 'Renamed'
+        self.student.a_level_points = 14
+        self.student.save()
+        self.assertEqual((self.row().student_name, self.row().student_points), ('Renamed', 14))
+
+        self.student.name = 'Not Saved'
+        self.student.a_level_points = 9
+        self.student.save(update_fields=['a_level_points'])
+        self.assertEqual((self.row().student_name, self.row().student_points), ('Renamed', 9))
+
+    def test_catalog_renames_are_projected(self):
+        department = self.program.department
+        institution = department.faculty.institution
+        self.program.name = 'Computing Science'
+        self.program.save()
+        department.name = 'Informatics'
+        department.save()
+        department.faculty.name = 'Engineering'
+        department.faculty.save()
+        institution.name = 'Renamed University'
+        institution.save()
+        row = self.row()
+        self.assertEqual(
+            (row.institution_name, row.faculty_name, row.department_name, row.program_name),
+            ('Renamed University', 'Engineering', 'Informatics', 'Computing Science')
+        )
+
+    def test_deleted_application_leaves_no_row(self):
+        self.application.delete()
+        self.assertFalse(ApplicationReadModel.objects.exists())
+
+    def test_signals_match_a_rebuild(self):
+        Application.objects.create(
+            student=make_user('second', is_student=True), program=self.program, personal_statement='Statement'
+        )
+        self.student.name = 'Rebuilt'
+        self.student.save()
+        columns = ['application_id', *read_model.PROJECTION]
+        maintained = list(ApplicationReadModel.objects.order_by('application_id').values_list(*columns))
+        self.assertEqual(read_model.rebuild_read_model(), 2)
+        self.assertEqual(list(ApplicationReadModel.objects.order_by('application_id').values_list(*columns)), maintained)
+
+
+class ApplicationListSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Listed University', 'LIST-CS')
+        cls.admin = make_user('lister', is_system_admin=True, is_staff=True)
+
+    def apply(self, count):
+        for i in range(count):
+            application = Application.objects.create(
+                student=make_user(f'listed{Application.objects.count()}', is_student=True),
+                program=self.program,
+                personal_statement='Statement'
+            )
+            application.documents.create(file=f'documents/transcript{i}.pdf')
+
+    def serialize(self):
+        with CaptureQueriesContext(connection) as queries:
+            applications = ApplicationListSerializer.setup_eager_loading(Application.objects.order_by('id'))
+            data = ApplicationListSerializer(applications, many=True).data
+        return data, len(queries)
+
+    def test_query_count_is_the_same_for_one_and_many_rows(self):
+        self.apply(1)
+        with assert_query_budget(2):
+            _, one = self.serialize()
+        self.apply(9)
+        with assert_query_budget(2):
+            data, many = self.serialize()
+        self.assertEqual(one, many)
+        self.assertEqual(len(data), 10)
+
+    def test_same_fields_as_the_detail_serializer(self):
+        self.apply(1)
+        application = Application.objects.get()
+        listed = ApplicationListSerializer.setup_eager_loading(Application.objects.all()).get()
+        self.assertEqual(ApplicationListSerializer(listed).data, ApplicationSerializer(application).data)
+
+    def test_list_view_stays_within_budget_for_one_and_many_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.apply(1)
+        self.assertEqual(len(assert_view_budget(client, '/api/applications/').data['results']), 1)
+        self.apply(9)
+        self.assertEqual(len(assert_view_budget(client, '/api/applications/').data['results']), 10)
+
+
+@override_settings(OUTBOX_DELIVER_ON_COMMIT=False)
+class BulkTransitionScopeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Own University', 'OWN-CS')
+        cls.other_program = make_program('Other University', 'OTHER-CS')
+        cls.institution = cls.program.department.faculty.institution
+        student = make_user('student', is_student=True, a_level_points=12)
+        cls.own = Application.objects.create(student=student, program=cls.program, personal_statement='Own')
+        cls.other = Application.objects.create(student=student, program=cls.other_program, personal_statement='Other')
+
+    def post(self, user, ids, new_status='Approved'):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/applications/bulk-transition/', {'ids': ids, 'status': new_status}, format='json')
+
+    def test_enroller_only_moves_their_institutions_applications(self):
+        enroller = make_user('enroller', is_enroller=True, assigned_institution=self.institution)
+        response = self.post(enroller, [self.own.pk, self.other.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_ids'], [self.own.pk])
+        self.assertEqual(response.data['skipped'], [{'id': self.other.pk, 'reason': 'Application not found'}])
+        self.other.refresh_from_db()
+        self.assertEqual(self.other.status, 'Pending')
+
+    def test_enroller_without_institution_is_forbidden(self):
+        enroller = make_user('unassigned', is_enroller=True)
+        response = self.post(enroller, [self.own.pk])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Application.objects.exclude(status='Pending').exists())
+
+    def test_system_admin_moves_any_application(self):
+        admin = make_user('admin', is_system_admin=True)
+        response = self.post(admin, [self.own.pk, self.other.pk])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data['updated_ids']), sorted([self.own.pk, self.other.pk]))
+
+    def test_student_is_forbidden(self):
+        response = self.post(self.own.student, [self.own.pk])
+        self.assertEqual(response.status_code, 403)
+
+    def test_invalid_transitions_are_skipped_and_derived_tables_follow(self):
+        admin = make_user('admin', is_system_admin=True)
+        self.post(admin, [self.own.pk], 'Rejected')
+        response = self.post(admin, [self.own.pk, self.other.pk], 'Withdrawn')
+        self.assertEqual(response.data['updated_ids'], [self.other.pk])
+        self.assertEqual(
+            response.data['skipped'], [{'id': self.own.pk, 'reason': 'Cannot change status from Rejected to Withdrawn'}]
+        )
+        self.assertEqual(
+            dict(ApplicationReadModel.objects.values_list('application_id', 'status')),
+            {self.own.pk: 'Rejected', self.other.pk: 'Withdrawn'}
+        )
+        # The withdrawn application no longer competes for its place
+        self.assertEqual(
+            list(ProgramPointsHistogram.objects.filter(count__gt=0).values_list('program_id', 'points', 'count')),
+            [(self.program.pk, 12, 1)]
+        )
+        self.assertEqual(ActivityLog.objects.filter(metadata__bulk=True).count(), 2)
+
+
+@override_settings(OUTBOX_DELIVER_ON_COMMIT=False)
+class AdmissionRulesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Ruled University', 'RULE-CS')
+        cls.enroller = make_user(
+            'ruler', is_enroller=True, assigned_institution=cls.program.department.faculty.institution
+        )
+
+    def test_whitelisted_lookups_compile(self):
+        condition = admission_rules.compile_criteria({'a_level_points__lt': 5, 'student__province': 'Harare'})
+        self.assertEqual(
+            sorted(condition.children), [('student__a_level_points__lt', 5), ('student__province', 'Harare')]
+        )
+
+    def test_anything_else_is_rejected(self):
+        rejected = [
+            ['a_level_points'],
+            {'password__startswith': 'pbkdf2'},
+            {'student__is_system_admin': True},
+            {'program__department__name': 'Computing'},
+            {'a_level_points__regex': '.*'},
+            {'a_level_points__lt': 'many'},
+        ]
+        for criteria in rejected:
+            with self.subTest(criteria=criteria), self.assertRaises(admission_rules.InvalidCriteria):
+                admission_rules.compile_criteria(criteria)
+
+    def test_settings_with_unsupported_criteria_are_refused(self):
+        client = APIClient()
+        client.force_authenticate(self.enroller)
+        response = client.put(
+            '/auth/users/user-settings/', {'auto_reject_criteria': {'password__startswith': 'x'}}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unsupported field', str(response.data['auto_reject_criteria']))
+
+    def test_rules_decide_matching_pending_applications(self):
+        UserSettings.objects.create(user=self.enroller, auto_reject_criteria={'a_level_points__lt': 5})
+        weak = Application.objects.create(
+            student=make_user('weak', is_student=True, a_level_points=3), program=self.program,
+            personal_statement='Statement'
+        )
+        Application.objects.create(
+            student=make_user('strong', is_student=True, a_level_points=15), program=self.program,
+            personal_statement='Statement'
+        )
+        self.assertEqual(admission_rules.apply_rules(), {'Rejected': 1})
+        self.assertEqual(list(Application.objects.exclude(status='Pending').values_list('pk', flat=True)), [weak.pk])
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_stored_invalid_criteria_are_skipped_and_logged_once(self):
+        UserSettings.objects.create(user=self.enroller, auto_reject_criteria={'password__startswith': 'x'})
+        admission_rules._reported.clear()
+        with self.assertLogs('applications.services.admission_rules', 'WARNING') as logs:
+            self.assertEqual(admission_rules.load_rules(), [])
+            self.assertEqual(admission_rules.load_rules(), [])
+        self.assertEqual(len(logs.records), 1)
+
+
+@override_settings(OUTBOX_DELIVER_ON_COMMIT=False)
+class OutboxDeliveryTests(TestCase):
+    def setUp(self):
+        outbox.enqueue_many([
+            EmailOutbox(to=f'student{i}@example.com', from_email='noreply@example.com', subject='Update', body='Hello')
+            for i in range(5)
+        ])
+
+    def test_each_row_is_sent_once(self):
+        self.assertEqual(outbox.deliver(batch_size=2), (5, 0))
+        self.assertEqual(outbox.deliver(batch_size=2), (0, 0))
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), [f'student{i}@example.com' for i in range(5)])
+        self.assertFalse(EmailOutbox.objects.exclude(status='SENT').exists())
+
+    def test_rows_claimed_by_another_drain_are_skipped_until_their_lease_ends(self):
+        ids, claimed = outbox._claim('other-drain', 2, 0)
+        self.assertEqual(len(claimed), 2)
+
+        self.assertEqual(outbox.deliver(), (3, 0))
+        self.assertEqual(EmailOutbox.objects.filter(status='SENDING', claimed_by='other-drain').count(), 2)
+
+        # The other drain died: its rows are due again once the lease runs out
+        EmailOutbox.objects.filter(id__in=ids).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(outbox.deliver(), (2, 0))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(len({email.to[0] for email in mail.outbox}), 5)
+
+    def test_drain_that_lost_its_lease_does_not_record_the_row(self):
+        row = EmailOutbox.objects.order_by('id').first()
+
+        def send(connection, sent_row, mailing=None):
+            if sent_row.id == row.id:
+                # Another drain takes the row over while this one is sending it
+                EmailOutbox.objects.filter(id=row.id).update(claimed_by='other-drain')
+            return None
+
+        with mock.patch.object(outbox, '_send', side_effect=send):
+            self.assertEqual(outbox.deliver(), (5, 0))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.claimed_by), ('SENDING', 'other-drain'))
+
+    def test_new_application_queues_its_confirmation(self):
+        EmailOutbox.objects.all().delete()
+        program = make_program('Confirmed University', 'CONF-CS')
+        student = make_user('confirmed', is_student=True)
+        client = APIClient()
+        client.force_authenticate(student)
+        response = client.post('/api/applications/', {
+            'program_id': program.pk,
+            'institution_id': program.department.faculty.institution_id,
+            'personal_statement': 'Statement',
+        })
+        self.assertEqual(response.status_code, 201)
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.to, row.subject), ('confirmed@example.com', 'Application Received: Computer Science'))
+        self.assertIn('Confirmed University', row.html_body)
+        self.assertIn(f'/applications/{response.data["id"]}/', row.html_body)
+
+
+@override_settings(OUTBOX_DELIVER_ON_COMMIT=False, MASS_MAIL_CHUNK_SIZE=2)
+class MassMailTests(TestCase):
+    def test_recipients_are_deduplicated_by_email(self):
+        recipients = [
+            (1, 'ann@example.com', 'Ann'),
+            (2, 'ANN@example.com', 'Ann Again'),
+            (3, '', 'No Email'),
+            (4, 'bo@example.com', 'Bo'),
+            (5, 'cy@example.com', None),
+        ]
+        mailing = mass_mail.queue_mailing(recipients, 'Hello', 'emails/notifications.html', {'message': 'Hi'})
+        self.assertEqual(mailing.recipients, 3)
+        self.assertEqual(
+            list(EmailOutbox.objects.order_by('id').values_list('to', 'recipient_name')),
+            [('ann@example.com', 'Ann'), ('bo@example.com', 'Bo'), ('cy@example.com', '')]
+        )
+        self.assertEqual(EmailOutbox.objects.filter(mailing=mailing, body='', html_body='').count(), 3)
+
+    def test_placeholder_is_replaced_on_delivery(self):
+        mass_mail.queue_mailing(
+            [(1, 'ann@example.com', 'Ann <Admin>'), (2, 'bo@example.com', 'Bo')],
+            'Hello', 'emails/notifications.html', {'message': f'Dear {Mailing.RECIPIENT_NAME},'}
+        )
+        self.assertEqual(outbox.deliver(), (2, 0))
+        ann, bo = sorted(mail.outbox, key=lambda email: email.to[0])
+        self.assertIn('Dear Ann <Admin>,', ann.body)
+        self.assertIn('Ann &lt;Admin&gt;', ann.alternatives[0][0])
+        self.assertIn('Dear Bo,', bo.body)
+        self.assertNotIn(Mailing.RECIPIENT_NAME, bo.body + bo.alternatives[0][0])
+
+    def test_deadline_mails_each_open_applicant_once(self):
+        program = make_program('Deadline University', 'DEAD-CS')
+        second_program = Program.objects.create(
+            department=program.department, name='Data Science', code='DEAD-DS', min_points_required=10,
+            total_enrollment=50, start_date=program.start_date, end_date=program.end_date
+        )
+        twice = make_user('twice', is_student=True)
+        withdrawn = make_user('withdrawn', is_student=True)
+        for applied in (program, second_program):
+            Application.objects.create(student=twice, program=applied, personal_statement='Statement')
+        Application.objects.create(
+            student=withdrawn, program=program, personal_statement='Statement', status='Withdrawn'
+        )
+        deadline = Deadline.objects.create(
+            title='Final Call', institution=program.department.faculty.institution, date=date.today(),
+            semester='FALL'
+        )
+        mailing = send_deadline_event(deadline, make_user('announcer', is_enroller=True))
+        self.assertEqual(mailing.recipients, 1)
+        self.assertEqual(list(EmailOutbox.objects.values_list('to', flat=True)), ['twice@example.com'])
+
+
+@override_settings(NOTIFICATION_FANOUT_ON_COMMIT=False, NOTIFICATION_FANOUT_CHUNK_SIZE=2)
+class NotificationFanoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        program = make_program('Fanout University', 'FAN-CS')
+        cls.institution = program.department.faculty.institution
+        cls.students = [make_user(f'applicant{i}', is_student=True) for i in range(5)]
+        for student in cls.students:
+            Application.objects.create(student=student, program=program, personal_statement='Statement')
+
+    def start(self):
+        return fanout.start(
+            'institution_pending', {'institution_id': self.institution.pk},
+            'Reminder', 'Your application is under review', 'STATUS_CHANGE'
+        )
+
+    def test_resume_after_failure_notifies_each_user_once(self):
+        job = self.start()
+        publish = fanout.live.publish_notifications
+        calls = []
+
+        def fail_second_chunk(notifications):
+            calls.append(len(notifications))
+            if len(calls) == 2:
+                raise RuntimeError('broker down')
+            publish(notifications)
+
+        with mock.patch.object(fanout.live, 'publish_notifications', side_effect=fail_second_chunk), \
+                self.assertLogs('applications.services.fanout', 'ERROR'):
+            job = fanout.run(job.pk)
+        self.assertEqual((job.status, job.sent), ('FAILED', 2))
+        # The failed chunk was rolled back with its notifications
+        self.assertEqual(Notification.objects.filter(title='Reminder').count(), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.lease), ('FAILED', 2, ''))
+
+        job = fanout.resume(job.pk)
+        self.assertEqual((job.status, job.sent, job.total), ('DONE', 5, 5))
+        recipients = list(Notification.objects.filter(title='Reminder').values_list('user_id', flat=True))
+        self.assertEqual(sorted(recipients), sorted(student.pk for student in self.students))
+
+    def test_running_job_is_not_claimed_twice(self):
+        job = self.start()
+        NotificationFanout.objects.filter(pk=job.pk).update(status='RUNNING', updated_at=timezone.now())
+        self.assertIsNone(fanout.run(job.pk))
+        self.assertFalse(Notification.objects.filter(title='Reminder').exists())
+
+    def test_stalled_job_is_taken_over_with_a_new_lease(self):
+        job = self.start()
+        NotificationFanout.objects.filter(pk=job.pk).update(
+            status='RUNNING', lease='stalled-run', updated_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(fanout.resume_notification_fanouts(), [job.pk])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.lease), ('DONE', 5, ''))
+
+    def test_run_that_was_taken_over_stops_writing(self):
+        job = self.start()
+        publish = fanout.live.publish_notifications
+
+        def taken_over(notifications):
+            publish(notifications)
+            # Another worker decides this run stalled and claims the job
+            NotificationFanout.objects.filter(pk=job.pk).update(lease='other-run')
+
+        with mock.patch.object(fanout.live, 'publish_notifications', side_effect=taken_over), \
+                self.assertLogs('applications.services.fanout', 'WARNING') as logs:
+            self.assertIsNone(fanout.run(job.pk))
+        self.assertIn('taken over', logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.sent, job.lease), ('RUNNING', 2, 'other-run'))
+        self.assertEqual(Notification.objects.filter(title='Reminder').count(), 2)
+
+
+@override_settings(SSE_HEARTBEAT_SECONDS=0.01)
+class NotificationStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('streamed', is_student=True)
+        cls.ids = [
+            Notification.objects.create(
+                user=cls.student, title=f'Update {i}', message='News', notification_type='MESSAGE'
+            ).pk
+            for i in range(3)
+        ]
+
+    def read(self, since, count, during=None):
+        """The first `count` chunks of the stream; `during(subscription)` runs after the first one"""
+        channel = live.user_channel(self.student.pk)
+
+        async def consume():
+            events, chunks = stream._events(self.student, since), []
+            try:
+                async for chunk in events:
+                    chunks.append(chunk)
+                    if len(chunks) == 1 and during:
+                        subscription, = broker._subscribers[channel]
+                        during(subscription)
+                    if len(chunks) == count:
+                        break
+            finally:
+                await events.aclose()
+            return chunks
+
+        chunks = async_to_sync(consume)()
+        self.assertFalse(broker.has_subscribers(channel))
+        return chunks
+
+    def event_ids(self, chunks):
+        return [int(line[4:]) for chunk in chunks for line in chunk.splitlines() if line.startswith('id: ')]
+
+    def test_missed_notifications_are_replayed_before_live_events(self):
+        chunks = self.read(self.ids[0], 3)
+        self.assertEqual(chunks[0], 'retry: 5000\n\n')
+        self.assertEqual(self.event_ids(chunks), self.ids[1:])
+        self.assertIn('event: notification', chunks[1])
+
+    def test_live_events_already_replayed_are_skipped(self):
+        def publish(subscription):
+            channel = live.user_channel(self.student.pk)
+            broker.publish(channel, {'event': 'notification', 'id': self.ids[2], 'data': {}})
+            broker.publish(channel, {'event': 'notification', 'id': self.ids[2] + 1, 'data': {}})
+
+        chunks = self.read(self.ids[0], 4, during=publish)
+        self.assertEqual(self.event_ids(chunks), [*self.ids[1:], self.ids[2] + 1])
+
+    def test_cut_short_replay_asks_for_a_resync(self):
+        with mock.patch.object(stream, 'REPLAY_LIMIT', 2):
+            chunks = self.read(0, 4)
+        self.assertEqual(self.event_ids(chunks), self.ids[:2])
+        self.assertEqual(chunks[3], f'event: resync\ndata: {{"since": {self.ids[1]}}}\n\n')
+
+    def test_lagged_subscription_asks_for_a_resync(self):
+        def lag(subscription):
+            subscription.lagged = True
+
+        chunks = self.read(None, 3, during=lag)
+        self.assertEqual(chunks[1], 'event: resync\ndata: {"since": 0}\n\n')
+        self.assertEqual(chunks[2], ': keepalive\n\n')
+
+    def test_stream_that_never_starts_does_not_subscribe(self):
+        stream._events(self.student, None)
+        self.assertFalse(broker.has_subscribers(live.user_channel(self.student.pk)))
+
+    def test_wsgi_requests_are_told_to_poll(self):
+        self.assertEqual(self.client.get('/api/notifications/stream/').status_code, 503)
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = make_user('reader', is_student=True)
+        cls.enroller = make_user('writer', is_enroller=True)
+        cls.other = make_user('bystander', is_student=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def send(self, sender, recipient, count=1):
+        return [Message.objects.create(sender=sender, recipient=recipient, text='Hello') for _ in range(count)]
+
+    def notify(self, count=1):
+        return [
+            Notification.objects.create(user=self.student, title='Update', message='News', notification_type='MESSAGE')
+            for _ in range(count)
+        ]
+
+    def mark_read(self, **data):
+        return assert_view_budget(
+            self.client, '/api/messages/mark_read/', method='post', data={'peer': str(self.enroller.pk), **data},
+            format='json'
+        )
+
+    def test_notification_watermark_is_clamped_to_the_newest_notification(self):
+        newest = self.notify(3)[-1]
+        self.assertEqual(read_state.mark_notifications_read(self.student.pk, up_to=10 ** 9), newest.pk)
+        self.assertEqual(read_state.unread_notifications(self.student.pk), 0)
+
+        self.notify()
+        response = assert_view_budget(self.client, '/api/notifications/unread_count/')
+        self.assertEqual(response.data, {'unread': 1})
+
+    def test_watermark_never_moves_backwards(self):
+        first, second = self.notify(2)
+        response = assert_view_budget(self.client, '/api/notifications/mark_all_as_read/', method='post')
+        self.assertEqual(response.data['last_read_id'], second.pk)
+        self.assertEqual(read_state.mark_notifications_read(self.student.pk, up_to=first.pk), second.pk)
+        self.assertEqual(read_state.notification_watermark(self.student.pk), second.pk)
+
+    def test_message_counters_follow_sends_and_reads(self):
+        messages = self.send(self.enroller, self.student, 3)
+        self.send(self.other, self.student)
+        self.send(self.student, self.enroller)
+
+        response = assert_view_budget(self.client, '/api/messages/unread_count/')
+        self.assertEqual(response.data, {'unread': 4})
+        self.assertEqual(read_state.unread_messages(self.student.pk, self.enroller.pk), 3)
+        self.assertEqual(read_state.unread_messages(self.enroller.pk), 1)
+
+        # The first mark inserts the watermark row within the same budget
+        response = self.mark_read(up_to=messages[1].pk)
+        self.assertEqual(response.data['last_read_id'], messages[1].pk)
+        self.assertEqual(read_state.unread_messages(self.student.pk, self.enroller.pk), 1)
+        self.assertEqual(read_state.unread_messages(self.student.pk), 2)
+
+        self.send(self.enroller, self.student)
+        response = self.mark_read()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(read_state.unread_messages(self.student.pk, self.enroller.pk), 0)
+        self.assertEqual(read_state.unread_messages(self.student.pk), 1)
+
+        # An older id leaves the watermark where it is
+        response = self.mark_read(up_to=messages[0].pk)
+        self.assertGreater(response.data['last_read_id'], messages[0].pk)
+        self.assertEqual(MessageWatermark.objects.get(user=self.student).last_read_id, response.data['last_read_id'])
+
+    def test_counters_match_a_full_refresh(self):
+        self.send(self.enroller, self.student, 2)
+        self.send(self.student, self.enroller)
+        read_state.mark_messages_read(self.enroller.pk, self.student.pk)
+        before = {row.pk: (row.unread_a, row.unread_b) for row in conversations.for_user(self.student.pk)}
+        conversations.refresh(conversations.for_user(self.student.pk))
+        after = {row.pk: (row.unread_a, row.unread_b) for row in conversations.for_user(self.student.pk)}
+        self.assertEqual(before, after)
+
+    def test_inbox_pages_both_sides_newest_first(self):
+        # Partners with the lowest and highest ids, so the student is user_b
+        # of some conversations and user_a of the others
+        for i, prefix in enumerate(['00000000', 'ffffffff', '00000001', 'fffffffe']):
+            partner = make_user(f'partner{i}', id=uuid.UUID(f'{prefix}-0000-4000-8000-000000000000'), is_enroller=True)
+            self.send(partner, self.student)
+        self.assertEqual([side.count() for side in conversations.sides(self.student.pk)], [2, 2])
+
+        seen, path = [], '/api/messages/inbox/?page_size=3'
+        while path:
+            response = assert_view_budget(self.client, path)
+            seen += [row['id'] for row in response.data['results']]
+            next_url = urlsplit(response.data['next'] or '')
+            path = f'{next_url.path}?{next_url.query}' if next_url.path else None
+        expected = list(
+            conversations.for_user(self.student.pk).order_by('-last_message_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+        with assert_query_budget(1):
+            self.assertEqual(read_state.unread_messages(self.student.pk), 4)
@@ -8,5 +8,5 @@ export function cn(...inputs: ClassValue[]) {
 
 export const fetchUserActivities = async () => {
   const response = await axios.get('/api/applications/my_activities/');
-  return response.data;
+  return response.data.results;
 };
\ No newline at end of file
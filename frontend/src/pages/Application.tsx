@@ -117,7 +117,7 @@ const ApplicationPage: React.FC<ApplicationPageProps> = ({ onSuccess, onCancel }
     const fetchExistingApplications = async () => {
         try {
             const response = await axios.get('/api/applications/my_applications/');
-            setExistingApplications(response.data);
+            setExistingApplications(response.data.results);
         } catch (error) {
             console.error('Error fetching existing applications:', error);
         }
@@ -87,31 +87,18 @@ const EnrollerDashboard = () => {
       setError(null);
       const token = localStorage.getItem('authToken');
 
-      const params = {
-        page_size: 1000,
-      };
-
-      if (user?.assigned_institution) {
-        params['program__department__faculty__institution'] = user.assigned_institution;
-      }
-
-      const response = await axios.get('/api/applications/', {
+      // Counts come from the server-side rollup, not from a page of applications
+      const response = await axios.get('/api/enrollment/dashboard/', {
         headers: { 'Authorization': `Bearer ${token}` },
-        params,
         timeout: 10000
       });
 
-      const apps = Array.isArray(response.data) ? response.data :
-        Array.isArray(response.data.results) ? response.data.results : [];
-
       const stats = {
-        total_applicants: apps.length,
-        pending_review: apps.filter(app => app.status === 'Pending').length,
-        approved: apps.filter(app => app.status === 'Approved').length,
-        rejected: apps.filter(app => app.status === 'Rejected').length,
-        waitlisted: apps.filter(app => app.status === 'Waitlisted').length,
-        deferred: apps.filter(app => app.status === 'Deferred').length,
-        applications: apps
+        total_applicants: response.data.stats.total_applications,
+        pending_review: response.data.stats.pending_review,
+        approved: response.data.stats.approved,
+        rejected: response.data.stats.rejected,
+        pending_applications: response.data.pending_applications
       };
 
       setDashboardData(stats);
@@ -600,14 +587,12 @@ const EnrollerDashboard = () => {
                   <CardContent>
                     {dashboardData?.pending_review > 0 ? (
                       <div className="divide-y">
-                        {dashboardData.applications
-                          .filter(app => app.status === 'Pending')
-                          .slice(0, 5)
+                        {dashboardData.pending_applications
                           .map((application) => (
                             <div key={application.id} className="py-4 flex justify-between items-center hover:bg-gray-50 transition-colors duration-200">
                               <div>
-                                <p className="font-medium">{application.student?.username || 'Unknown Student'}</p>
-                                <p className="text-sm text-gray-500">Applied for {application.program?.name || 'Unknown Program'}</p>
+                                <p className="font-medium">{application.student_name || 'Unknown Student'}</p>
+                                <p className="text-sm text-gray-500">Applied for {application.program_name || 'Unknown Program'}</p>
                                 <p className="text-xs text-gray-400">
                                   {new Date(application.date_applied).toLocaleDateString()}
                                 </p>
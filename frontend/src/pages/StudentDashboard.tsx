@@ -154,7 +154,7 @@ const StudentDashboard = () => {
       const response = await axios.get(`/api/applications/my_applications/`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
-      setApplications(response.data);
+      setApplications(response.data.results);
       setError(null);
     } catch (err) {
       console.error('Error fetching applications:', err);
@@ -170,7 +170,7 @@ const StudentDashboard = () => {
       const response = await axios.get(`/api/notifications/my_notifications/`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
-      setNotifications(response.data);
+      setNotifications(response.data.results);
     } catch (err) {
       console.error('Error fetching notifications:', err);
     }
@@ -208,7 +208,7 @@ const StudentDashboard = () => {
       const response = await axios.get(`/api/messages/`, {
         headers: { 'Authorization': `Bearer ${token}` }
       });
-      setMessages(response.data);
+      setMessages(response.data.results);
     } catch (err) {
       console.error('Error fetching messages:', err);
     }
@@ -108,7 +108,7 @@ export const fetchUserApplications = async () => {
     try {
         // !!! CRITICAL FIX: Add '/api/' prefix here based on your backend logs (404 was for without /api/)
         const response = await axios.get(`${API_BASE_URL}/api/applications/my_applications/`, { headers: getAuthHeaders() });
-        return response.data;
+        return response.data.results;
     } catch (error) {
         console.error('Error fetching user applications:', error);
         throw error;
@@ -119,7 +119,7 @@ export const fetchUserActivities = async () => {
     try {//Complete Your Profile
         // Assuming this also needs authentication.
         const response = await axios.get(`${API_BASE_URL}/api/applications/my_activities/`, { headers: getAuthHeaders() });
-        return response.data;
+        return response.data.results;
     } catch (error) {
         console.error('Error fetching user activities:', error);
         throw error;
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core.signals import request_finished, request_started
 
 
 class InstituitionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'institutions'
+
+    def ready(self):
+        from institutions import signals  # noqa: F401
+        from institutions.catalog import finish_request, start_request
+        request_started.connect(start_request, dispatch_uid='catalog_version_start')
+        request_finished.connect(finish_request, dispatch_uid='catalog_version_finish')
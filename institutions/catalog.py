@@ -0,0 +1,96 @@
+# institutions/catalog.py
+"""
+In-process cache of the Institution -> Faculty -> Department -> Program tree.
+
+The tree is loaded with four queries and every object carries its parent and
+its prefetched children, so serializers can walk it in either direction
+without touching the database. The version counter is the single
+CatalogVersion row, bumped by institutions/signals.py whenever a catalog row
+changes. It lives in the database rather than the (per-process) default
+cache so every worker sees a bump: a request reads it once with a primary
+key lookup (outside requests, every call does) and rebuilds the tree when
+it is newer than the cached one.
+Objects in the tree are shared between requests and must not be modified.
+"""
+import threading
+from asgiref.local import Local
+from django.db.models import F, prefetch_related_objects
+from institutions.models import CatalogVersion, Institution
+
+VERSION_PK = 1
+
+_lock = threading.Lock()
+_tree = None
+# The version read by the current request, if any
+_request = Local()
+
+
+class CatalogTree:
+    def __init__(self, version, institutions):
+        self.version = version
+        self.institutions = tuple(institutions)
+        self.institution_by_id = {institution.pk: institution for institution in self.institutions}
+        self.faculties = {}
+        self.departments = {}
+        self.programs = {}
+        for institution in self.institutions:
+            for faculty in institution.faculties.all():
+                self.faculties[faculty.pk] = faculty
+                for department in faculty.departments.all():
+                    self.departments[department.pk] = department
+                    for program in department.programs.all():
+                        self.programs[program.pk] = program
+        self.program_list = tuple(self.programs[pk] for pk in sorted(self.programs))
+
+    def institution_faculties(self, institution_id):
+        institution = self.institution_by_id.get(institution_id)
+        return list(institution.faculties.all()) if institution else []
+
+    def select_programs(self, program_ids):
+        """Programs for `program_ids`, in that order, skipping unknown ids"""
+        return [self.programs[pk] for pk in program_ids if pk in self.programs]
+
+
+def start_request(**kwargs):
+    """request_started receiver"""
+    _request.active, _request.version = True, None
+
+
+def finish_request(**kwargs):
+    """request_finished receiver"""
+    _request.active, _request.version = False, None
+
+
+def current_version():
+    version = getattr(_request, 'version', None)
+    if version is None:
+        version = CatalogVersion.objects.filter(pk=VERSION_PK).values_list('version', flat=True).first() or 1
+        if getattr(_request, 'active', False):
+            _request.version = version
+    return version
+
+
+def bump_version():
+    """Invalidate every process's tree"""
+    _request.version = None
+    if not CatalogVersion.objects.filter(pk=VERSION_PK).update(version=F('version') + 1):
+        CatalogVersion.objects.bulk_create([CatalogVersion(pk=VERSION_PK, version=2)], ignore_conflicts=True)
+
+
+def build_tree(version):
+    institutions = list(Institution.objects.order_by('pk'))
+    prefetch_related_objects(institutions, 'faculties__departments__programs')
+    return CatalogTree(version, institutions)
+
+
+def get_catalog():
+    """Return the tree for the current version, rebuilding it if it is stale"""
+    global _tree
+    version = current_version()
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+    with _lock:
+        if _tree is None or _tree.version != version:
+            _tree = build_tree(version)
+        return _tree
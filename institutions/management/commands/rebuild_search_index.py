@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from institutions.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over programs, departments, faculties and institutions'
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The catalog search index requires SQLite with FTS5')
+        try:
+            documents = rebuild_index()
+        except OperationalError as e:
+            raise CommandError(f'Could not build the search index: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Indexed {documents} programs'))
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.7 on 2026-10-17 08:31
+
+from django.db import migrations, OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite only; other databases keep using icontains lookups
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from institutions.search import create_index, populate_index
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            create_index(cursor)
+        except OperationalError:
+            return
+        populate_index(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from institutions.search import SEARCH_TABLE
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('institutions', '0005_institution_date_established_institution_mission_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -58,3 +58,15 @@ class Program(models.Model):
     @property
     def institution_name(self):
         return self.department.faculty.name
+
+
+class CatalogVersion(models.Model):
+    """
+    Single row counting catalog changes. Every process compares its cached
+    catalog tree (institutions/catalog.py) against it, so a bump in one
+    worker invalidates the trees of all of them.
+    """
+    version = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"Catalog version {self.version}"
@@ -0,0 +1,196 @@
+# institutions/search.py
+"""
+SQLite FTS5 index over the program catalog.
+
+Every program is indexed as one document together with the names of its
+department, faculty and institution, so a single MATCH covers all four
+levels of the catalog. The index is kept in sync by institutions/signals.py
+and can be rebuilt with `manage.py rebuild_search_index`.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_TABLE = 'institutions_program_search'
+
+# Column weights for bm25(): program name, description, department, faculty, institution
+RANK_WEIGHTS = (10.0, 2.0, 5.0, 3.0, 5.0)
+
+_SELECT_DOCUMENTS = """
+    SELECT p.id, p.name, COALESCE(p.description, ''), d.name, f.name, i.name
+    FROM institutions_program p
+    INNER JOIN institutions_department d ON d.id = p.department_id
+    INNER JOIN institutions_faculty f ON f.id = d.faculty_id
+    INNER JOIN institutions_institution i ON i.id = f.institution_id
+"""
+
+_available = None
+
+
+def create_index(cursor):
+    """Create the FTS5 table. Raises OperationalError if FTS5 is not compiled in."""
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+        "program_name, description, department, faculty, institution, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', %s)",
+        [f'bm25({weights})']
+    )
+
+
+def search_available():
+    """Check once per process whether the FTS5 index exists on this database"""
+    global _available
+    if _available is None:
+        _available = (
+            connection.vendor == 'sqlite'
+            and SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _available
+
+
+def _reindex(where='', params=None):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {SEARCH_TABLE}"
+            f"(rowid, program_name, description, department, faculty, institution) "
+            f"{_SELECT_DOCUMENTS} {where}",
+            params or []
+        )
+
+
+def index_program(program_id):
+    _reindex('WHERE p.id = %s', [program_id])
+
+
+def index_department(department_id):
+    _reindex('WHERE d.id = %s', [department_id])
+
+
+def index_faculty(faculty_id):
+    _reindex('WHERE f.id = %s', [faculty_id])
+
+
+def index_institution(institution_id):
+    _reindex('WHERE i.id = %s', [institution_id])
+
+
+def remove_program(program_id):
+    if not search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [program_id])
+
+
+def populate_index(cursor):
+    """Drop every document and re-index the whole catalog in one statement"""
+    cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    cursor.execute(
+        f"INSERT INTO {SEARCH_TABLE}"
+        f"(rowid, program_name, description, department, faculty, institution) "
+        f"{_SELECT_DOCUMENTS}"
+    )
+    cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def rebuild_index():
+    """Create the index if needed, re-index the catalog and return the document count"""
+    global _available
+    with connection.cursor() as cursor:
+        create_index(cursor)
+        populate_index(cursor)
+        cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+        count = cursor.fetchone()[0]
+    _available = True
+    return count
+
+
+def build_match(terms, column=None):
+    """
+    Turn free text into an FTS5 MATCH expression: every word becomes a quoted
+    prefix token, words of one term are ANDed and separate terms are ORed.
+    """
+    if isinstance(terms, str):
+        terms = [terms]
+    clauses = []
+    for term in terms:
+        words = re.findall(r'\w+', term.lower())
+        if not words:
+            continue
+        phrase = ' '.join(f'"{word}"*' for word in words)
+        clauses.append(f'{column} : ({phrase})' if column else f'({phrase})')
+    return ' OR '.join(clauses)
+
+
+def search_programs(queryset, match, ranked=True):
+    """
+    Restrict a Program queryset to documents matching `match`, best match
+    first when `ranked` is set.
+    """
+    if not match:
+        return queryset
+    queryset = queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[
+            f'{SEARCH_TABLE}.rowid = institutions_program.id',
+            f'{SEARCH_TABLE} MATCH %s',
+        ],
+        params=[match],
+    )
+    if ranked:
+        queryset = queryset.extra(order_by=[f'{SEARCH_TABLE}.rank'])
+    return queryset
+
+
+class CatalogSearchFilter(BaseFilterBackend):
+    """
+    Filter programs through the FTS index. `search` matches every indexed
+    column; the legacy `*__icontains` parameters match a single column.
+    Falls back to plain icontains lookups when the index is unavailable.
+    """
+    search_param = 'search'
+    column_params = {
+        'name__icontains': 'program_name',
+        'department__name__icontains': 'department',
+        'department__faculty__institution__name__icontains': 'institution',
+    }
+
+    def is_filtering(self, request):
+        params = request.query_params
+        return any(params.get(param, '').strip() for param in [self.search_param, *self.column_params])
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        search = params.get(self.search_param, '').strip()
+        column_terms = {
+            param: params[param].strip()
+            for param in self.column_params
+            if params.get(param, '').strip()
+        }
+        if not search and not column_terms:
+            return queryset
+
+        if not search_available():
+            return self._fallback(queryset, search, column_terms)
+
+        clauses = [build_match(search)] if search else []
+        clauses += [
+            build_match(term, self.column_params[param])
+            for param, term in column_terms.items()
+        ]
+        clauses = [clause for clause in clauses if clause]
+        if not clauses:
+            return queryset.none()
+        match = ' AND '.join(f'({clause})' for clause in clauses)
+        return search_programs(queryset, match)
+
+    def _fallback(self, queryset, search, column_terms):
+        if search:
+            queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
+        return queryset.filter(**column_terms)
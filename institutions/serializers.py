@@ -1,6 +1,7 @@
 # serializers.py
 from rest_framework import serializers
 from .models import Institution, Faculty, Department, Program
+from .catalog import get_catalog
 from rest_framework.permissions import IsAuthenticated
 from django.utils import timezone
 from datetime import timedelta
@@ -27,8 +28,8 @@ class PublicProgramSerializer(serializers.ModelSerializer):
                 'requirements', 'start_date', 'end_date', 'total_enrollment',
                 'department']
     def get_department(self, obj):
-        department_ob = Department.objects.get(id=obj.department.id)
-        return MinimalDepartmentSerializer(department_ob).data
+        department = get_catalog().departments.get(obj.department_id)
+        return MinimalDepartmentSerializer(department).data if department else None
 
 
 
@@ -49,6 +50,11 @@ class ProgramSectionSerializer(serializers.ModelSerializer):
         ]
         depth = 2  # This will include nested department, faculty, and institution data
 
+    def to_representation(self, instance):
+        # Walk the cached catalog tree so the nested department/faculty cost no queries
+        instance = get_catalog().programs.get(instance.pk, instance)
+        return super().to_representation(instance)
+
     def get_category(self, obj):
         # You might want to add a category field to your Program model
         # or determine it based on department name
@@ -138,12 +144,16 @@ class FacultyCreateSerializer(serializers.ModelSerializer):
 
 class InstitutionSerializer(serializers.ModelSerializer):
     permission_classes = [IsAuthenticated]
-    faculties = FacultySerializer(many=True, read_only=True)  # Nested serializer for faculties
+    faculties = serializers.SerializerMethodField()  # Nested faculties from the catalog tree
 
     class Meta:
         model = Institution
         fields = '__all__'
 
+    def get_faculties(self, obj):
+        faculties = get_catalog().institution_faculties(obj.pk)
+        return FacultySerializer(faculties, many=True, context=self.context).data
+
 class MinimalProgramSerializer(serializers.ModelSerializer):
     class Meta:
         model = Program
@@ -0,0 +1,44 @@
+# institutions/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from institutions.models import Institution, Faculty, Department, Program
+from institutions import catalog, search, snapshots
+
+
+@receiver(post_save, sender=Program)
+def index_program(sender, instance, **kwargs):
+    search.index_program(instance.pk)
+
+
+@receiver(post_delete, sender=Program)
+def unindex_program(sender, instance, **kwargs):
+    search.remove_program(instance.pk)
+
+
+@receiver(post_save, sender=Department)
+def index_department_programs(sender, instance, created, **kwargs):
+    if not created:
+        search.index_department(instance.pk)
+
+
+@receiver(post_save, sender=Faculty)
+def index_faculty_programs(sender, instance, created, **kwargs):
+    if not created:
+        search.index_faculty(instance.pk)
+
+
+@receiver(post_save, sender=Institution)
+def index_institution_programs(sender, instance, created, **kwargs):
+    if not created:
+        search.index_institution(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Institution)
+@receiver([post_save, post_delete], sender=Faculty)
+@receiver([post_save, post_delete], sender=Department)
+@receiver([post_save, post_delete], sender=Program)
+def invalidate_catalog(sender, **kwargs):
+    # After commit, so no process caches a tree built before the change is visible
+    transaction.on_commit(catalog.bump_version)
+    transaction.on_commit(snapshots.rebuild_all_in_background)
@@ -0,0 +1,150 @@
+# institutions/snapshots.py
+"""
+Pre-rendered JSON snapshots of the anonymous catalog endpoints.
+
+Each snapshot is rendered once per catalog version (and day, since
+`is_new` depends on the date) and kept as identity, gzip and, when the
+`brotli` package is installed, brotli bytes with a strong ETag per
+encoding. A request for a stale snapshot is answered from the previous
+render while a background thread builds the new one. Renders of one
+snapshot are serialized, so concurrent cold requests wait for a single
+render instead of each running their own.
+"""
+import gzip
+import hashlib
+import threading
+from collections import namedtuple
+from django.db import close_old_connections
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from institutions.catalog import current_version, get_catalog
+from institutions.serializers import InstitutionMinimalSerializer, ProgramSectionSerializer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+Snapshot = namedtuple('Snapshot', ['key', 'etag', 'bodies'])
+
+_lock = threading.Lock()
+_snapshots = {}
+_rebuilding = set()
+
+
+def _program_section_data():
+    return ProgramSectionSerializer(get_catalog().program_list, many=True).data
+
+
+def _institution_data():
+    return InstitutionMinimalSerializer(get_catalog().institutions, many=True).data
+
+
+BUILDERS = {
+    'programs': _program_section_data,
+    'institutions': _institution_data,
+}
+
+# Held while a snapshot is rendered, one per snapshot
+_render_locks = {name: threading.Lock() for name in BUILDERS}
+
+
+def _current_key():
+    return (current_version(), timezone.localdate())
+
+
+def render(name, key):
+    body = JSONRenderer().render(BUILDERS[name]())
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body)
+    return Snapshot(key, digest, bodies)
+
+
+def _rebuild(name, key):
+    try:
+        with _render_locks[name]:
+            snapshot = render(name, key)
+            with _lock:
+                _snapshots[name] = snapshot
+    finally:
+        with _lock:
+            _rebuilding.discard(name)
+
+
+def _rebuild_in_thread(name, key):
+    try:
+        _rebuild(name, key)
+    finally:
+        close_old_connections()
+
+
+def rebuild_in_background(name, key=None):
+    """Start one rebuild thread for `name` unless one is already running"""
+    with _lock:
+        if name in _rebuilding:
+            return
+        _rebuilding.add(name)
+    key = key or _current_key()
+    threading.Thread(target=_rebuild_in_thread, args=(name, key), daemon=True).start()
+
+
+def rebuild_all_in_background():
+    for name in BUILDERS:
+        rebuild_in_background(name)
+
+
+def get_snapshot(name):
+    key = _current_key()
+    snapshot = _snapshots.get(name)
+    if snapshot is not None and snapshot.key == key:
+        return snapshot
+    if snapshot is not None:
+        # Serve the previous render while the new one is built
+        rebuild_in_background(name, key)
+        return snapshot
+    with _render_locks[name]:
+        # Another request may have rendered it while this one waited
+        snapshot = _snapshots.get(name)
+        if snapshot is not None:
+            return snapshot
+        snapshot = render(name, key)
+        with _lock:
+            _snapshots[name] = snapshot
+        return snapshot
+
+
+def _accepted_encodings(request):
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def snapshot_response(request, name):
+    """Serve a snapshot in the best accepted encoding, or 304 if the client has it"""
+    snapshot = get_snapshot(name)
+    accepted = _accepted_encodings(request)
+    encoding = next(
+        (coding for coding in ('br', 'gzip') if coding in accepted and coding in snapshot.bodies),
+        'identity'
+    )
+    etag = f'"{snapshot.etag}"' if encoding == 'identity' else f'"{snapshot.etag}-{encoding}"'
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+    if if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(snapshot.bodies[encoding], content_type='application/json')
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
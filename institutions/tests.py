@@ -1,3 +1,180 @@
-from django.test import TestCase
+import gzip
+import threading
+import time
+from unittest import mock
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+from applications.tests import make_program
+from institutions import catalog, search, snapshots
+from institutions.models import Program
 
-# Create your tests here.
+
+def search_request(**params):
+    return Request(RequestFactory().get('/', params))
+
+
+class CatalogSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.computing = make_program('Harare Institute of Technology', 'HIT-CS', name='Computer Science')
+        cls.nursing = make_program('Midlands State University', 'MSU-NS', name='Nursing Science',
+                                   description='Clinical practice and community health')
+
+    def filtered(self, **params):
+        return set(
+            search.CatalogSearchFilter().filter_queryset(search_request(**params), Program.objects.all(), None)
+            .values_list('code', flat=True)
+        )
+
+    def test_build_match_quotes_prefix_tokens(self):
+        self.assertEqual(search.build_match('comp sci'), '("comp"* "sci"*)')
+        self.assertEqual(search.build_match(['nurs', 'it'], 'program_name'),
+                         'program_name : ("nurs"*) OR program_name : ("it"*)')
+        self.assertEqual(search.build_match('"); DROP'), '("drop"*)')
+
+    def test_prefix_match_covers_every_catalog_level(self):
+        self.assertTrue(search.search_available())
+        self.assertEqual(self.filtered(search='computer'), {'HIT-CS'})
+        # Both programs sit in a Computing department of a Science faculty
+        self.assertEqual(self.filtered(search='comput'), {'HIT-CS', 'MSU-NS'})
+        self.assertEqual(self.filtered(search='midland'), {'MSU-NS'})
+        self.assertEqual(self.filtered(search='clinic'), {'MSU-NS'})
+        self.assertEqual(self.filtered(department__faculty__institution__name__icontains='harare tech'), {'HIT-CS'})
+        self.assertEqual(self.filtered(search='scien', name__icontains='nur'), {'MSU-NS'})
+        self.assertEqual(self.filtered(search='nursing computer'), set())
+        self.assertEqual(self.filtered(search='?!'), set())
+
+    def test_index_follows_catalog_changes(self):
+        institution = self.nursing.department.faculty.institution
+        institution.name = 'Great Zimbabwe University'
+        institution.save()
+        self.assertEqual(self.filtered(search='zimbabwe'), {'MSU-NS'})
+        self.assertEqual(self.filtered(search='midland'), set())
+
+        self.computing.delete()
+        self.assertEqual(self.filtered(search='computer'), set())
+
+    def test_icontains_fallback_without_the_index(self):
+        with mock.patch.object(search, 'search_available', return_value=False):
+            self.assertEqual(self.filtered(search='puter'), {'HIT-CS'})
+            self.assertEqual(self.filtered(search='community'), {'MSU-NS'})
+            self.assertEqual(self.filtered(department__faculty__institution__name__icontains='midlands'), {'MSU-NS'})
+            # No prefix tokens here: the whole term is one substring
+            self.assertEqual(self.filtered(search='comp sci'), set())
+
+
+@mock.patch('institutions.snapshots.rebuild_all_in_background')
+class CatalogVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Versioned University', 'VER-CS')
+
+    def setUp(self):
+        # Version numbers restart with every test's rolled back transaction
+        catalog._tree = None
+
+    def tearDown(self):
+        catalog.finish_request()
+
+    def test_change_bumps_the_version_on_commit(self, rebuild):
+        version = catalog.current_version()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.program.name = 'Data Science'
+            self.program.save()
+            self.assertEqual(catalog.current_version(), version)
+        self.assertTrue(callbacks)
+        self.assertEqual(catalog.current_version(), version + 1)
+        rebuild.assert_called_once_with()
+
+    def test_tree_is_rebuilt_only_after_a_bump(self, rebuild):
+        self.assertEqual(catalog.get_catalog().programs[self.program.pk].name, 'Computer Science')
+        with self.assertNumQueries(1):
+            tree = catalog.get_catalog()
+        self.assertIs(catalog.get_catalog(), tree)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.name = 'Data Science'
+            self.program.save()
+        rebuilt = catalog.get_catalog()
+        self.assertIsNot(rebuilt, tree)
+        self.assertEqual(rebuilt.programs[self.program.pk].name, 'Data Science')
+
+    def test_request_reads_the_version_once_until_bumped(self, rebuild):
+        catalog.start_request()
+        version = catalog.current_version()
+        with self.assertNumQueries(0):
+            catalog.current_version()
+        catalog.bump_version()
+        self.assertEqual(catalog.current_version(), version + 1)
+        catalog.finish_request()
+        with self.assertNumQueries(1):
+            catalog.current_version()
+
+
+class SnapshotResponseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_program('Snapshot University', 'SNAP-CS')
+
+    def setUp(self):
+        catalog._tree = None
+        snapshots._snapshots.clear()
+
+    def get(self, encoding='', etag=None):
+        headers = {'HTTP_ACCEPT_ENCODING': encoding}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        return self.client.get('/api/all-program-details/', **headers)
+
+    def test_each_encoding_has_its_own_etag(self):
+        plain = self.get()
+        compressed = self.get('gzip, deflate')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(compressed['ETag'], plain['ETag'][:-1] + '-gzip"')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(plain.json()[0]['code'], 'SNAP-CS')
+        for response in (plain, compressed):
+            self.assertIn('Accept-Encoding', response['Vary'])
+            self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_not_modified_only_for_the_same_encoding(self):
+        plain, compressed = self.get(), self.get('gzip')
+        self.assertEqual(self.get(etag=plain['ETag']).status_code, 304)
+        self.assertEqual(self.get('gzip', etag=compressed['ETag']).status_code, 304)
+        self.assertEqual(self.get('gzip', etag=plain['ETag']).status_code, 200)
+        self.assertEqual(self.get(etag=compressed['ETag']).status_code, 200)
+        self.assertEqual(self.get('gzip', etag=f'"other", {compressed["ETag"]}').status_code, 304)
+
+    def test_refused_encoding_is_not_used(self):
+        response = self.get('gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+
+    @mock.patch('institutions.snapshots.rebuild_in_background')
+    def test_stale_snapshot_is_served_while_rebuilding(self, rebuild):
+        first = snapshots.get_snapshot('programs')
+        catalog.bump_version()
+        self.assertIs(snapshots.get_snapshot('programs'), first)
+        rebuild.assert_called_once_with('programs', snapshots._current_key())
+
+    @mock.patch('institutions.snapshots._current_key', return_value=(1, None))
+    def test_concurrent_cold_requests_render_once(self, current_key):
+        renders = []
+
+        def slow_render(name, key):
+            renders.append(name)
+            time.sleep(0.05)
+            return snapshots.Snapshot(key, 'etag', {'identity': b'[]'})
+
+        with mock.patch('institutions.snapshots.render', side_effect=slow_render):
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(snapshots.get_snapshot('programs')))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(renders, ['programs'])
+        self.assertEqual(len(set(map(id, results))), 1)
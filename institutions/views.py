@@ -24,26 +24,45 @@ from datetime import datetime, timedelta
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+import logging
 import random
 from rest_framework import viewsets, status
+from recommendations.services.engine import recommend_alternatives
+from institutions.search import CatalogSearchFilter
+from institutions.catalog import get_catalog
+from applications.services import daily_stats
+from institutions.snapshots import snapshot_response
+from university_platform.metrics import SerializerMetricsMixin, timed
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
-class InstitutionsViewSet(viewsets.ModelViewSet):
+class InstitutionsViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Institution.objects.all()
     serializer_class = InstitutionSerializer
+    # Four queries only when the catalog tree is rebuilt
+    query_budgets = {'list': 5}
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_serializer(get_catalog().institutions, many=True)
+        return Response(serializer.data)
 
-class InstitutionViewSet(viewsets.ModelViewSet):
+class InstitutionViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Institution.objects.all()
     serializer_class = InstitutionMinimalSerializer
     permission_classes = [AllowAny]  # This should make it public
     authentication_classes = []
+    query_budgets = {'list': 4, 'retrieve': 1}
     
     def get_permissions(self):
         if self.action in ['retrieve', 'list']:
             return [AllowAny()]
         return super().get_permissions()
 
+    def list(self, request, *args, **kwargs):
+        return snapshot_response(request, 'institutions')
+
 class FacultyViewSet(viewsets.ModelViewSet):
     queryset = Faculty.objects.all()
 
@@ -62,25 +81,24 @@ class DepartmentViewSet(viewsets.ModelViewSet):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def public_programs(request):
-    programs = Program.objects.all().select_related('department__faculty__institution')
-    serializer = ProgramSectionSerializer(programs, many=True)
-    return Response(serializer.data)
+    return snapshot_response(request, 'programs')
 
-class ProgramSectionViewSet(viewsets.ModelViewSet):
+class ProgramSectionViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Program.objects.all().select_related('department__faculty__institution')
     serializer_class = ProgramSectionSerializer
     permission_classes = [AllowAny]  # This should make it public
     authentication_classes = []
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        'department__name': ['icontains'],
-        'department__faculty__institution__name': ['icontains'],
-        'name': ['icontains'],
-    }
+    # Supports ?search= plus the name/department/institution __icontains params
+    filter_backends = [CatalogSearchFilter]
+    query_budgets = {'list': 5}
     def list(self, request, *args, **kwargs):
-        print("DEBUG: Entering list endpoint")  # Add debug print
-        print(f"DEBUG: User: {request.user}, Authenticated: {request.user.is_authenticated}")
-        return super().list(request, *args, **kwargs)
+        logger.debug("Program list: user %s, authenticated %s", request.user, request.user.is_authenticated)
+        if not CatalogSearchFilter().is_filtering(request):
+            return snapshot_response(request, 'programs')
+        # Only the matching ids come from the database, the programs from the catalog tree
+        program_ids = self.filter_queryset(Program.objects.all()).values_list('id', flat=True)
+        serializer = self.get_serializer(get_catalog().select_programs(program_ids), many=True)
+        return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
     def categories(self, request):
@@ -92,13 +110,14 @@ class ProgramSectionViewSet(viewsets.ModelViewSet):
         ]
         return Response(categories)
 
-class ProgramViewSet(viewsets.ModelViewSet):
+class ProgramViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Program.objects.all()
     serializer_class = ProgramSerializer
+    query_budgets = {'list': 2, 'retrieve': 2, 'requirements': 2, 'recommendations': 6}
     @action(detail=True, methods=['get'])
     def requirements(self, request, pk=None):
         program = self.get_object()
-        serializer = ProgramRequirementsSerializer(program)
+        serializer = timed(ProgramRequirementsSerializer)(program)
         return Response(serializer.data)
     @action(detail=True, methods=['get'], url_path='recommendations')
     def recommendations(self, request, pk=None):
@@ -117,78 +136,12 @@ class ProgramViewSet(viewsets.ModelViewSet):
             return Response({"error": "Program not found"}, status=404)
         
     def calculate_recommendations(self, student_points, current_program, department_id=None):
-        # Get all applications for the current program
-        current_program_apps = Application.objects.filter(
-            program=current_program
-        ).exclude(student__a_level_points__isnull=True)
-        
-        # Calculate acceptance probability for current program
-        current_stats = self.calculate_program_stats(current_program, student_points, current_program_apps)
-        
-        # Find alternative programs
+        faculty = None
         if department_id:
-            department = Department.objects.get(id=department_id)
-            alternative_programs = Program.objects.filter(
-                department__faculty=department.faculty
-            ).exclude(id=current_program.id)
-        else:
-            alternative_programs = Program.objects.filter(
-                department__faculty=current_program.department.faculty
-            ).exclude(id=current_program.id)
-        
-        # Calculate stats for alternative programs
-        alternatives = []
-        for program in alternative_programs:
-            program_apps = Application.objects.filter(
-                program=program
-            ).exclude(student__a_level_points__isnull=True)
-            
-            stats = self.calculate_program_stats(program, student_points, program_apps)
-            alternatives.append(stats)
-        
-        # Sort alternatives by acceptance probability (highest first)
-        alternatives.sort(key=lambda x: x['acceptance_probability'], reverse=True)
-        
-        return {
-            'current_program': current_stats,
-            'alternatives': alternatives[:5]  # Return top 5 alternatives
-        }
+            department = Department.objects.select_related('faculty').get(id=department_id)
+            faculty = department.faculty
 
-    def calculate_program_stats(self, program, student_points, applications):
-        # Calculate basic statistics
-        total_applicants = applications.count()
-        higher_points = applications.filter(student__a_level_points__gt=student_points).count()
-        same_points = applications.filter(student__a_level_points=student_points).count()
-        lower_points = applications.filter(student__a_level_points__lt=student_points).count()
-        
-        # Calculate acceptance probability
-        if total_applicants == 0:
-            acceptance_prob = 0.7 if student_points >= program.min_points_required else 0.3
-        else:
-            if student_points > program.min_points_required:
-                acceptance_prob = 0.8 - (0.3 * (higher_points / total_applicants))
-            elif student_points == program.min_points_required:
-                acceptance_prob = 0.5
-            else:
-                acceptance_prob = 0.3 * (1 - (higher_points / total_applicants))
-            
-            # Ensure probability stays within bounds
-            acceptance_prob = max(0.1, min(0.9, acceptance_prob))
-        
-        return {
-            'program_id': program.id,
-            'program_name': program.name,
-            'program_code': program.code,
-            'institution': program.department.faculty.institution.name,
-            'min_points_required': program.min_points_required,
-            'student_points': student_points,
-            'total_applicants': total_applicants,
-            'applicants_with_higher_points': higher_points,
-            'applicants_with_same_points': same_points,
-            'applicants_with_lower_points': lower_points,
-            'acceptance_probability': round(acceptance_prob, 2),
-            'required_subjects': program.requirements
-        }
+        return recommend_alternatives(current_program, student_points, faculty=faculty)
 
 class InstitutionProgramsView(APIView):
     def get(self, request, institution_id):
@@ -208,8 +161,9 @@ class InstitutionNameProgramsView(APIView):
         return Response(serializer.data)
 
 
-class ProgramDetailsViewSet(viewsets.ModelViewSet):
+class ProgramDetailsViewSet(SerializerMetricsMixin, viewsets.ModelViewSet):
     queryset = Program.objects.all()
+    query_budgets = {'list': 2, 'retrieve': 2, 'stats': 9}
     
     def get_serializer_class(self):
         # Use public serializer for unauthenticated requests
@@ -309,47 +263,40 @@ class UniversityAdminViewSet(viewsets.ViewSet):
         if not institution_id:
             return Response({"error": "No institution assigned"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Application trends by month
-        trends = (
-            Application.objects
-            .filter(program__department__faculty__institution_id=institution_id)
-            .annotate(month=ExtractMonth('date_applied'), year=ExtractYear('date_applied'))
-            .values('month', 'year')
-            .annotate(count=Count('id'))
-            .order_by('year', 'month')
-        )
-
-        # Status distribution
-        status_dist = (
-            Application.objects
-            .filter(program__department__faculty__institution_id=institution_id)
-            .values('status')
-            .annotate(count=Count('id'))
-        )
+        # Every count comes from the daily rollup, names from the catalog tree
+        catalog = get_catalog()
+        program_counts = daily_stats.program_counts(institution_id)
+        faculties = catalog.institution_faculties(institution_id)
+        programs = [
+            program
+            for faculty in faculties
+            for department in faculty.departments.all()
+            for program in department.programs.all()
+        ]
 
         # Program popularity
-        program_popularity = (
-            Program.objects
-            .filter(department__faculty__institution_id=institution_id)
-            .annotate(applications_count=Count('applications'))
-            .order_by('-applications_count')[:5]
-            .values('name', 'applications_count')
-        )
+        program_popularity = [
+            {'name': program.name, 'applications_count': program_counts.get(program.pk, 0)}
+            for program in sorted(programs, key=lambda program: -program_counts.get(program.pk, 0))[:5]
+        ]
 
         # Faculty distribution
-        faculty_dist = (
-            Faculty.objects
-            .filter(institution_id=institution_id)
-            .annotate(applications_count=Count('departments__programs__applications'))
-            .order_by('-applications_count')
-            .values('name', 'applications_count')
+        faculty_counts = {faculty.pk: 0 for faculty in faculties}
+        for program in programs:
+            faculty_counts[program.department.faculty_id] += program_counts.get(program.pk, 0)
+        faculty_dist = sorted(
+            ({'name': faculty.name, 'applications_count': faculty_counts[faculty.pk]} for faculty in faculties),
+            key=lambda row: -row['applications_count']
         )
 
         return Response({
-            'application_trends': list(trends),
-            'status_distribution': list(status_dist),
-            'program_popularity': list(program_popularity),
-            'faculty_distribution': list(faculty_dist),
+            'application_trends': daily_stats.monthly_trends(institution_id),
+            'status_distribution': [
+                {'status': application_status, 'count': count}
+                for application_status, count in daily_stats.status_counts(institution_id).items()
+            ],
+            'program_popularity': program_popularity,
+            'faculty_distribution': faculty_dist,
         })
 
     @action(detail=False, methods=['post'])
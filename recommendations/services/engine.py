@@ -0,0 +1,139 @@
+# recommendations/services/engine.py
+from collections import namedtuple
+from django.db.models import Q
+from applications.models.models import ProgramPointsHistogram
+from institutions.models import Program
+
+# Applicant point distribution of one program relative to a student's points
+PointDistribution = namedtuple('PointDistribution', ['total', 'higher', 'same', 'lower'])
+
+EMPTY_DISTRIBUTION = PointDistribution(0, 0, 0, 0)
+
+
+def point_distributions(program_ids, student_points):
+    """
+    Get the applicant point distribution for every program in `program_ids`.
+
+    Reads the pre-aggregated ProgramPointsHistogram buckets (a few dozen
+    integers per program) and folds them around `student_points` in memory.
+    Returns a dict of program id -> PointDistribution. Programs without any
+    scored applicants are missing from the dict.
+    """
+    buckets = (
+        ProgramPointsHistogram.objects
+        .filter(program_id__in=program_ids, count__gt=0)
+        .values_list('program_id', 'points', 'count')
+    )
+    counts = {}
+    for program_id, points, count in buckets:
+        higher, same, lower = counts.get(program_id, (0, 0, 0))
+        if points > student_points:
+            higher += count
+        elif points == student_points:
+            same += count
+        else:
+            lower += count
+        counts[program_id] = (higher, same, lower)
+
+    return {
+        program_id: PointDistribution(higher + same + lower, higher, same, lower)
+        for program_id, (higher, same, lower) in counts.items()
+    }
+
+
+def acceptance_probability(student_points, min_points_required, distribution, penalize_shortfall=False):
+    """
+    Estimate the chance of acceptance from the program's minimum points and
+    the share of applicants with more points than the student.
+    """
+    total_applicants = distribution.total
+    if total_applicants == 0:
+        return 0.7 if student_points >= min_points_required else 0.3
+
+    higher_share = distribution.higher / total_applicants
+    if student_points > min_points_required:
+        acceptance_prob = 0.8 - (0.3 * higher_share)
+    elif student_points == min_points_required:
+        acceptance_prob = 0.5
+    else:
+        acceptance_prob = 0.3 * (1 - higher_share)
+        if penalize_shortfall and student_points < min_points_required - 2:
+            acceptance_prob = max(0.05, acceptance_prob * 0.5)
+
+    # Ensure probability stays within bounds
+    return max(0.1, min(0.9, acceptance_prob))
+
+
+def program_stats(program, student_points, distribution, penalize_shortfall=False):
+    """Build the recommendation payload for a single program"""
+    acceptance_prob = acceptance_probability(
+        student_points, program.min_points_required, distribution, penalize_shortfall
+    )
+    department = program.department
+    faculty = department.faculty if department else None
+    institution = faculty.institution if faculty else None
+
+    return {
+        'program_id': program.id,
+        'program_name': program.name,
+        'program_code': program.code,
+        'institution': institution.name if institution else 'N/A',
+        'min_points_required': program.min_points_required,
+        'student_points': student_points,
+        'total_applicants': distribution.total,
+        'applicants_with_higher_points': distribution.higher,
+        'applicants_with_same_points': distribution.same,
+        'applicants_with_lower_points': distribution.lower,
+        'acceptance_probability': round(acceptance_prob, 2),
+        'required_subjects': program.requirements
+    }
+
+
+def score_programs(programs, student_points, penalize_shortfall=False):
+    """
+    Score every program in `programs` for a student with `student_points`.
+
+    The point distributions for the whole candidate set are fetched in one
+    query, so the cost stays flat no matter how many programs are scored.
+    Results are sorted by acceptance probability, highest first.
+    """
+    programs = list(programs.select_related('department__faculty__institution'))
+    distributions = point_distributions([program.id for program in programs], student_points)
+
+    scored = [
+        program_stats(
+            program,
+            student_points,
+            distributions.get(program.id, EMPTY_DISTRIBUTION),
+            penalize_shortfall
+        )
+        for program in programs
+    ]
+    scored.sort(key=lambda x: x['acceptance_probability'], reverse=True)
+    return scored
+
+
+def recommend_alternatives(current_program, student_points, faculty=None, limit=5):
+    """
+    Score the current program together with the other programs of its
+    faculty (or of `faculty`) and return the current program stats plus
+    the top `limit` alternatives.
+    """
+    faculty = faculty or current_program.department.faculty
+    candidates = Program.objects.filter(
+        Q(department__faculty=faculty) | Q(id=current_program.id)
+    )
+    scored = score_programs(candidates, student_points)
+
+    current_stats = None
+    alternatives = []
+    for stats in scored:
+        if stats['program_id'] == current_program.id:
+            current_stats = stats
+        else:
+            alternatives.append(stats)
+
+    return {
+        'current_program': current_stats,
+        'alternatives': alternatives[:limit]
+    }
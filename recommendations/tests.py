@@ -1,3 +1,79 @@
 from django.test import TestCase
+from applications.models.models import Application
+from applications.tests import make_program, make_user
+from institutions.models import Program
+from recommendations.services.engine import (
+    EMPTY_DISTRIBUTION, PointDistribution, acceptance_probability, point_distributions, recommend_alternatives,
+    score_programs
+)
+from university_platform.query_budget import assert_query_budget
 
-# Create your tests here.
+
+class AcceptanceProbabilityTests(TestCase):
+    def test_without_applicants_only_the_minimum_counts(self):
+        self.assertEqual(acceptance_probability(12, 10, EMPTY_DISTRIBUTION), 0.7)
+        self.assertEqual(acceptance_probability(8, 10, EMPTY_DISTRIBUTION), 0.3)
+
+    def test_share_of_stronger_applicants_lowers_the_chance(self):
+        distribution = PointDistribution(total=4, higher=2, same=1, lower=1)
+        self.assertAlmostEqual(acceptance_probability(12, 10, distribution), 0.65)
+        self.assertEqual(acceptance_probability(10, 10, distribution), 0.5)
+        self.assertAlmostEqual(acceptance_probability(9, 10, distribution), 0.15)
+
+    def test_result_is_clamped_and_shortfall_penalized(self):
+        everyone_higher = PointDistribution(total=3, higher=3, same=0, lower=0)
+        self.assertEqual(acceptance_probability(5, 10, everyone_higher), 0.1)
+        nobody_higher = PointDistribution(total=3, higher=0, same=0, lower=3)
+        self.assertAlmostEqual(acceptance_probability(9, 10, nobody_higher, penalize_shortfall=True), 0.3)
+        self.assertAlmostEqual(acceptance_probability(5, 10, nobody_higher, penalize_shortfall=True), 0.15)
+
+
+class ScoreProgramsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.program = make_program('Engine University', 'ENG-CS')
+        cls.sibling = Program.objects.create(
+            department=cls.program.department,
+            name='Software Engineering',
+            code='ENG-SE',
+            min_points_required=14,
+            total_enrollment=50,
+            start_date=cls.program.start_date,
+            end_date=cls.program.end_date,
+        )
+        for i, points in enumerate([8, 10, 12, 12]):
+            student = make_user(f'scored{i}', is_student=True, a_level_points=points)
+            Application.objects.create(student=student, program=cls.program, personal_statement='Statement')
+
+    def test_distribution_is_folded_around_the_student(self):
+        distributions = point_distributions([self.program.pk, self.sibling.pk], 10)
+        self.assertEqual(distributions, {self.program.pk: PointDistribution(total=4, higher=2, same=1, lower=1)})
+
+    def test_withdrawn_applications_do_not_compete(self):
+        application = Application.objects.get(student__a_level_points=10)
+        application.status = 'Withdrawn'
+        application.save()
+        self.assertEqual(point_distributions([self.program.pk], 10)[self.program.pk].total, 3)
+
+    def test_scores_sorted_by_probability(self):
+        scored = score_programs(Program.objects.filter(department=self.program.department), 11)
+        self.assertEqual([stats['program_code'] for stats in scored], ['ENG-CS', 'ENG-SE'])
+        first, second = scored
+        self.assertEqual(first['acceptance_probability'], 0.65)
+        self.assertEqual(first['institution'], 'Engine University')
+        self.assertEqual(
+            (first['total_applicants'], first['applicants_with_higher_points'], first['applicants_with_lower_points']),
+            (4, 2, 2)
+        )
+        self.assertEqual((second['total_applicants'], second['acceptance_probability']), (0, 0.3))
+
+    def test_query_count_does_not_grow_with_the_candidates(self):
+        with assert_query_budget(2):
+            score_programs(Program.objects.filter(pk=self.program.pk), 10)
+        with assert_query_budget(2):
+            score_programs(Program.objects.all(), 10)
+
+    def test_alternatives_exclude_the_current_program(self):
+        result = recommend_alternatives(self.sibling, 11)
+        self.assertEqual(result['current_program']['program_code'], 'ENG-SE')
+        self.assertEqual([stats['program_code'] for stats in result['alternatives']], ['ENG-CS'])
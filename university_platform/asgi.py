@@ -11,6 +11,11 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from university_platform import system_sampler
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'university_platform.settings')
 
 application = get_asgi_application()
+
+# Only server processes sample host metrics
+system_sampler.enable()
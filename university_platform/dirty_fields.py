@@ -0,0 +1,119 @@
+# university_platform/dirty_fields.py
+"""
+Field snapshots on model instances, so saves can tell what changed without
+reading the row again.
+
+DirtyFieldsMixin records the value of each tracked field when an instance
+is loaded from the database, and again after every save or refresh.
+`has_changed()`, `original_value()` and `dirty_fields()` compare against
+that snapshot. Models that track every concrete field (the default) save
+existing rows with `update_fields` set to the dirty fields plus any
+`auto_now` fields; models tracking a subset still save every column.
+"""
+import copy
+
+
+class DirtyFieldsMixin:
+    # Names of the fields to snapshot; empty tracks every concrete field
+    tracked_fields = ()
+
+    # {attname: value} as stored in the database, None until loaded or saved
+    _field_snapshot = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    @classmethod
+    def _tracked_attnames(cls):
+        if cls.tracked_fields:
+            return [cls._meta.get_field(name).attname for name in cls.tracked_fields]
+        return [field.attname for field in cls._meta.concrete_fields]
+
+    def snapshot_fields(self, attnames=None):
+        """Record the current values of `attnames` (default all tracked fields) as stored"""
+        snapshot = {} if attnames is None or self._field_snapshot is None else self._field_snapshot
+        tracked = self._tracked_attnames()
+        for attname in tracked if attnames is None else attnames:
+            # Deferred fields are not in __dict__ and are left out until loaded
+            if attname in tracked and attname in self.__dict__:
+                value = self.__dict__[attname]
+                snapshot[attname] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        self._field_snapshot = snapshot
+
+    @property
+    def is_tracked(self):
+        return self._field_snapshot is not None
+
+    def original_value(self, name):
+        """The value of `name` as last loaded or saved"""
+        attname = self._meta.get_field(name).attname
+        if self._field_snapshot is not None and attname in self._field_snapshot:
+            return self._field_snapshot[attname]
+        if self.pk is None or self._state.adding:
+            return None
+        # Deferred, untracked, or an instance that was not loaded from the database
+        return type(self)._base_manager.filter(pk=self.pk).values_list(attname, flat=True).first()
+
+    def has_changed(self, name):
+        attname = self._meta.get_field(name).attname
+        if attname not in self.__dict__:
+            return False
+        if self._state.adding:
+            return True
+        return self.__dict__[attname] != self.original_value(name)
+
+    def dirty_fields(self):
+        """Names of the concrete fields that differ from the snapshot; every field if untracked"""
+        fields = self._meta.concrete_fields
+        if self._field_snapshot is None or self._state.adding:
+            return [field.name for field in fields]
+        snapshot = self._field_snapshot
+        return [
+            field.name for field in fields
+            if field.attname in self.__dict__ and (
+                field.attname not in snapshot or snapshot[field.attname] != self.__dict__[field.attname]
+            )
+        ]
+
+    def unchanged_fields(self):
+        """
+        Fields that need no revalidation in full_clean(exclude=...): unchanged,
+        and not unique together with a changed field.
+        """
+        changed = set(self.dirty_fields())
+        for together in self._meta.unique_together:
+            if changed.intersection(together):
+                changed.update(together)
+        return [field.name for field in self._meta.concrete_fields if field.name not in changed]
+
+    def save(self, *args, **kwargs):
+        if (
+            not args
+            and kwargs.get('update_fields') is None
+            and not kwargs.get('force_insert')
+            and not self.tracked_fields
+            and self.is_tracked
+            and not self._state.adding
+        ):
+            auto_now = [
+                field.name for field in self._meta.concrete_fields
+                if getattr(field, 'auto_now', False)
+            ]
+            dirty = self.dirty_fields()
+            kwargs['update_fields'] = dirty + [name for name in auto_now if name not in dirty]
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self.snapshot_fields(
+            None if update_fields is None
+            else [self._meta.get_field(name).attname for name in update_fields]
+        )
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_fields(
+            None if fields is None
+            else [self._meta.get_field(name).attname for name in fields]
+        )
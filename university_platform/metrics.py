@@ -0,0 +1,123 @@
+# university_platform/metrics.py
+"""
+Prometheus histograms per view action, exported on the existing /p/ endpoint.
+
+ViewMetricsMiddleware observes for every routed request, labelled
+`ViewSet.action`: the number of queries, the DB wall time, the time spent
+building serializer.data (outermost serializer only) and the response size.
+Serialization is timed explicitly: views with SerializerMetricsMixin time the
+serializers from get_serializer(), and views that build one directly use
+timed(SerializerClass) or wrap .data in serializing(). Requests that time no
+serializer are left out of the serializer histogram.
+Queries are only counted and timed here; shape tracking and stack capture
+stay in QueryBudgetMiddleware behind QUERY_BUDGET_ENABLED.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from prometheus_client import Histogram
+from rest_framework.serializers import ListSerializer
+from university_platform.query_budget import QueryCounter, view_label
+
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 233, float('inf'))
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float('inf'))
+
+view_queries = Histogram(
+    'drf_view_queries', 'Database queries per request', ['view'], buckets=QUERY_BUCKETS
+)
+view_db_seconds = Histogram(
+    'drf_view_db_seconds', 'Database wall time per request', ['view'], buckets=SECONDS_BUCKETS
+)
+view_serializer_seconds = Histogram(
+    'drf_view_serializer_seconds', 'Time spent in serializer.data per request', ['view'], buckets=SECONDS_BUCKETS
+)
+view_response_bytes = Histogram(
+    'drf_view_response_bytes', 'Response body size', ['view'], buckets=BYTES_BUCKETS
+)
+
+_local = threading.local()
+# serializer class -> its timed subclass
+_timed_classes = {}
+
+
+class SerializerTimer:
+    def __init__(self):
+        self.depth = 0
+        self.seconds = 0.0
+        self.used = False
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed time as serialization of the current request; nested blocks count once"""
+    timer = getattr(_local, 'timer', None)
+    if timer is None or timer.depth:
+        yield
+        return
+    timer.depth += 1
+    timer.used = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.depth -= 1
+        timer.seconds += time.perf_counter() - start
+
+
+class TimedDataMixin:
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+
+def timed(serializer_class):
+    """Subclass of `serializer_class` whose .data, and its many=True list's .data, is timed"""
+    if issubclass(serializer_class, TimedDataMixin):
+        return serializer_class
+    timed_class = _timed_classes.get(serializer_class)
+    if timed_class is None:
+        attrs = {'__module__': serializer_class.__module__, '__qualname__': serializer_class.__qualname__}
+        if not issubclass(serializer_class, ListSerializer):
+            meta = getattr(serializer_class, 'Meta', None)
+            list_class = getattr(meta, 'list_serializer_class', ListSerializer)
+            attrs['Meta'] = type('Meta', (meta,) if meta else (), {'list_serializer_class': timed(list_class)})
+        timed_class = type(serializer_class.__name__, (TimedDataMixin, serializer_class), attrs)
+        _timed_classes[serializer_class] = timed_class
+    return timed_class
+
+
+class SerializerMetricsMixin:
+    """View mixin: serializers built through get_serializer() are timed"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = timed(self.get_serializer_class())
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
+
+
+class ViewMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        timer = _local.timer = SerializerTimer()
+        try:
+            with counter.capture():
+                response = self.get_response(request)
+        finally:
+            _local.timer = None
+        label = getattr(request, 'metrics_view', None)
+        if label is not None:
+            view_queries.labels(label).observe(counter.count)
+            view_db_seconds.labels(label).observe(counter.duration)
+            if timer.used:
+                view_serializer_seconds.labels(label).observe(timer.seconds)
+            if not response.streaming:
+                view_response_bytes.labels(label).observe(len(response.content))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_label(view_func, request.method)
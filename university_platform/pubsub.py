@@ -0,0 +1,80 @@
+# university_platform/pubsub.py
+"""
+In-process publish/subscribe between sync code and async consumers.
+
+Async views subscribe to a channel from the event loop and await events on
+a bounded asyncio.Queue. Any thread may publish. Events are handed to each
+subscriber's loop with `call_soon_threadsafe`, and publishing to a channel
+nobody listens on is one dict lookup. A subscriber that falls more than
+`maxsize` events behind stops receiving and is flagged `lagged`, so it can
+resynchronise from the database.
+
+Only subscribers in the same process see an event. Deployments with several
+ASGI worker processes need clients to fall back to polling.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    def __init__(self, broker, channel, loop, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def _put(self, event):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.lagged = True
+
+    async def get(self, timeout=None):
+        """The next event; asyncio.TimeoutError after `timeout` seconds without one"""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, maxsize=100):
+        """Subscribe the running event loop to `channel`"""
+        subscription = Subscription(self, channel, asyncio.get_running_loop(), maxsize)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def has_subscribers(self, channel):
+        return channel in self._subscribers
+
+    def publish(self, channel, event):
+        """Deliver `event` to the channel's subscribers; returns how many there were"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+
+broker = Broker()
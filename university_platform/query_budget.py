@@ -0,0 +1,181 @@
+# university_platform/query_budget.py
+"""
+Query budgets per DRF viewset action and an N+1 detector.
+
+Viewsets declare `query_budgets = {'list': 4, 'retrieve': 3}`. While
+QUERY_BUDGET_ENABLED is on (it defaults to DEBUG), QueryBudgetMiddleware
+counts the queries and DB time of every request. It logs a warning when
+an action goes over its budget, or raises QueryBudgetExceeded when
+QUERY_BUDGET_STRICT is set. Any query shape repeated
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD times is reported as an N+1, with the
+project frames of the call stack that issued it.
+
+Tests use `assert_query_budget(max_queries)` around any block, or
+`assert_view_budget(client, path)` to hold a request to the budget
+declared on the view it resolves to.
+"""
+import logging
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger(__name__)
+
+# Placeholder lists differ with the number of ids, not with the call site
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _project_stack():
+    """Call stack frames that belong to this project, innermost last"""
+    root = str(settings.BASE_DIR)
+    return [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(root) and frame.filename != __file__
+    ]
+
+
+class QueryCounter:
+    """Count the queries run on all connections while active and their wall time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.record(sql)
+
+    def record(self, sql):
+        pass
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class QueryInspector(QueryCounter):
+    """QueryCounter that also tracks query shapes and the stacks of repeats, for development"""
+
+    def __init__(self, n_plus_one_threshold=None):
+        super().__init__()
+        self.n_plus_one_threshold = n_plus_one_threshold or _setting('QUERY_BUDGET_N_PLUS_ONE_THRESHOLD', 5)
+        self.shapes = Counter()
+        self.stacks = {}
+
+    def record(self, sql):
+        shape = IN_LIST.sub('IN (...)', sql)
+        self.shapes[shape] += 1
+        # Keep the stack of the second occurrence, the first repeat
+        if self.shapes[shape] == 2:
+            self.stacks[shape] = _project_stack()
+
+    @property
+    def n_plus_one(self):
+        """[(sql shape, times, stack)] for shapes repeated past the threshold"""
+        return [
+            (shape, times, self.stacks.get(shape, []))
+            for shape, times in self.shapes.most_common()
+            if times >= self.n_plus_one_threshold
+        ]
+
+    def report(self, label, budget=None):
+        lines = [f'{label}: {self.count} queries in {self.duration * 1000:.1f}ms'
+                 + (f' (budget {budget})' if budget is not None else '')]
+        for shape, times, stack in self.n_plus_one:
+            lines.append(f'  N+1: {times}x {shape[:200]}')
+            lines.extend(f'    {frame.filename}:{frame.lineno} in {frame.name}' for frame in stack[-6:])
+        return '\n'.join(lines)
+
+
+def view_action(view_func, method):
+    """Return (view class or None, action) for a resolved callback"""
+    cls = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    return cls, actions.get(method.lower(), method.lower())
+
+
+def view_label(view_func, method):
+    """`ViewSet.action` for DRF views, the function name otherwise"""
+    cls, action = view_action(view_func, method)
+    if cls is None:
+        return getattr(view_func, '__name__', repr(view_func))
+    return f'{cls.__name__}.{action}'
+
+
+def view_budget(view_func, method):
+    """Return (label, budget) for a resolved DRF viewset callback, or (label, None)"""
+    cls, action = view_action(view_func, method)
+    budgets = getattr(cls, 'query_budgets', None) or {}
+    return view_label(view_func, method), budgets.get(action)
+
+
+class QueryBudgetMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = _setting('QUERY_BUDGET_ENABLED', settings.DEBUG)
+        self.strict = _setting('QUERY_BUDGET_STRICT', False)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        inspector = QueryInspector()
+        request.query_inspector = inspector
+        with inspector.capture():
+            response = self.get_response(request)
+        self.check(request, inspector)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'query_inspector'):
+            request.query_budget = view_budget(view_func, request.method)
+
+    def check(self, request, inspector):
+        label, budget = getattr(request, 'query_budget', (request.path, None))
+        over_budget = budget is not None and inspector.count > budget
+        if not over_budget and not inspector.n_plus_one:
+            return
+        report = inspector.report(f'{request.method} {request.path} [{label}]', budget)
+        if over_budget and self.strict:
+            raise QueryBudgetExceeded(report)
+        logger.warning(report)
+
+
+@contextmanager
+def assert_query_budget(max_queries, allow_n_plus_one=False, label='block'):
+    """Fail with the query report if the block runs more than `max_queries` queries or an N+1"""
+    inspector = QueryInspector()
+    with inspector.capture():
+        yield inspector
+    if inspector.count > max_queries or (inspector.n_plus_one and not allow_n_plus_one):
+        raise QueryBudgetExceeded(inspector.report(label, max_queries))
+
+
+def assert_view_budget(client, path, method='get', allow_n_plus_one=False, **kwargs):
+    """Issue a test-client request and fail if it exceeds its view's declared budget"""
+    label, budget = view_budget(resolve(path.split('?', 1)[0]).func, method)
+    if budget is None:
+        raise QueryBudgetExceeded(f'{label} declares no query budget')
+    with assert_query_budget(budget, allow_n_plus_one, label=f'{method.upper()} {path} [{label}]'):
+        response = getattr(client, method.lower())(path, **kwargs)
+    return response
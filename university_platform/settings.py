@@ -68,9 +68,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'university_platform.query_budget.QueryBudgetMiddleware',
+    'university_platform.metrics.ViewMetricsMiddleware',
     'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
+# Query budgets declared per viewset action (see university_platform/query_budget.py)
+QUERY_BUDGET_ENABLED = DEBUG
+QUERY_BUDGET_STRICT = False
+QUERY_BUDGET_N_PLUS_ONE_THRESHOLD = 5
+
+# Background system metrics sampler (see university_platform/system_sampler.py)
+SYSTEM_METRICS_INTERVAL = 5
+SYSTEM_METRICS_HISTORY = 24 * 3600
+
 ROOT_URLCONF = 'university_platform.urls'
 
 TEMPLATES = [
@@ -99,6 +110,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction begins, so writers queue on
+            # the busy timeout instead of failing with "database is locked" when
+            # a background thread (e.g. the email outbox) writes at the same time
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -177,6 +195,51 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Africa/Harare'
 
+# Public landing-page stats (see applications/services/public_stats.py)
+PUBLIC_STATS_REFRESH_SECONDS = 300
+# Enroller admission rules sweep (see applications/services/admission_rules.py)
+ADMISSION_RULES_SWEEP_SECONDS = 600
+# Absolute links in emails sent outside a request
+SITE_URL = 'http://localhost:8000'
+# Email outbox delivery (see applications/services/outbox.py)
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_SECONDS = 60
+OUTBOX_DELIVERY_SECONDS = 30
+# How long a drain may hold a claimed batch before another drain may take it over
+OUTBOX_LEASE_SECONDS = 300
+# Outbox rows per bulk insert when queueing a mailing (applications/services/mass_mail.py)
+MASS_MAIL_CHUNK_SIZE = 1000
+# Keepalive comment interval of the notification SSE stream (applications/api/stream.py)
+SSE_HEARTBEAT_SECONDS = 15
+# In-app notification fan-out (see applications/services/fanout.py)
+NOTIFICATION_FANOUT_CHUNK_SIZE = 1000
+NOTIFICATION_FANOUT_STALL_SECONDS = 300
+CELERY_IMPORTS = [
+    'applications.services.public_stats',
+    'applications.services.admission_rules',
+    'applications.services.outbox',
+    'applications.services.fanout',
+]
+CELERY_BEAT_SCHEDULE = {
+    'refresh-public-stats': {
+        'task': 'applications.services.public_stats.refresh_public_stats',
+        'schedule': PUBLIC_STATS_REFRESH_SECONDS,
+    },
+    'sweep-pending-applications': {
+        'task': 'applications.services.admission_rules.sweep_pending_applications',
+        'schedule': ADMISSION_RULES_SWEEP_SECONDS,
+    },
+    'deliver-outbox': {
+        'task': 'applications.services.outbox.deliver_outbox',
+        'schedule': OUTBOX_DELIVERY_SECONDS,
+    },
+    'resume-notification-fanouts': {
+        'task': 'applications.services.fanout.resume_notification_fanouts',
+        'schedule': NOTIFICATION_FANOUT_STALL_SECONDS,
+    },
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -0,0 +1,200 @@
+# university_platform/system_sampler.py
+"""
+Background sampler of host and process metrics with an in-memory history.
+
+A daemon thread records CPU, memory, disk, database file size and this
+process's RSS every SYSTEM_METRICS_INTERVAL seconds into a ring buffer of
+`array('d')` columns sized for SYSTEM_METRICS_HISTORY seconds, so reading
+the metrics never waits on psutil. Each worker process samples on its own.
+Only the server entrypoints (wsgi.py, asgi.py) call enable(); the thread is
+then started on the first request the process handles, so forked workers
+start their own. Management commands and tests never enable it, and the
+sampler has no reading there.
+"""
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+import psutil
+from django.conf import settings
+from django.core.signals import request_started
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'timestamp',
+    'cpu_percent',
+    'memory_percent',
+    'memory_used',
+    'disk_percent',
+    'disk_used',
+    'database_size',
+    'process_rss',
+)
+
+WINDOW = re.compile(r'^(\d+)([smhd])$')
+WINDOW_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RingBuffer:
+    """Fixed number of samples kept as float columns, the oldest overwritten first"""
+
+    def __init__(self, fields, capacity):
+        self.fields = fields
+        self.capacity = capacity
+        self.columns = {field: array('d', bytes(8 * capacity)) for field in fields}
+        self.start = 0
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def append(self, sample):
+        with self.lock:
+            index = (self.start + self.size) % self.capacity
+            for field in self.fields:
+                self.columns[field][index] = sample[field]
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self.start = (self.start + 1) % self.capacity
+
+    def _column(self, field, first, last):
+        """Logical rows [first, last) of a column, oldest first"""
+        column = self.columns[field]
+        begin, end = self.start + first, self.start + last
+        if end <= self.capacity:
+            return column[begin:end]
+        if begin >= self.capacity:
+            return column[begin - self.capacity:end - self.capacity]
+        return column[begin:] + column[:end - self.capacity]
+
+    def latest(self):
+        with self.lock:
+            if not self.size:
+                return None
+            index = (self.start + self.size - 1) % self.capacity
+            return {field: self.columns[field][index] for field in self.fields}
+
+    def since(self, timestamp):
+        """{field: array} of the samples taken at or after `timestamp`"""
+        with self.lock:
+            timestamps = self._column('timestamp', 0, self.size)
+            first = bisect.bisect_left(timestamps, timestamp)
+            return {field: self._column(field, first, self.size) for field in self.fields}
+
+
+class SystemSampler:
+    def __init__(self, interval=None, history=None):
+        self.interval = interval or _setting('SYSTEM_METRICS_INTERVAL', 5)
+        history = history or _setting('SYSTEM_METRICS_HISTORY', 24 * 3600)
+        self.buffer = RingBuffer(FIELDS, max(int(history // self.interval), 1))
+        self.process = psutil.Process(os.getpid())
+        self.database_path = str(settings.DATABASES['default']['NAME'])
+        # Fixed for the life of the host
+        self.memory_total = psutil.virtual_memory().total
+        self.disk_total = psutil.disk_usage('/').total
+        self.boot_time = psutil.boot_time()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def sample(self):
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        try:
+            database_size = os.path.getsize(self.database_path)
+        except OSError:
+            database_size = 0
+        return {
+            'timestamp': time.time(),
+            # Percentage since the previous call, so this never blocks
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'memory_percent': memory.percent,
+            'memory_used': memory.used,
+            'disk_percent': disk.percent,
+            'disk_used': disk.used,
+            'database_size': database_size,
+            'process_rss': self.process.memory_info().rss,
+        }
+
+    def record(self):
+        """Take and store one sample; a failure is logged and leaves a gap"""
+        try:
+            self.buffer.append(self.sample())
+        except Exception:
+            logger.exception('Sampling system metrics failed')
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.record()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                # A first reading right away; its CPU figure starts the measurement
+                self.record()
+                self._thread = threading.Thread(target=self._run, name='system-sampler', daemon=True)
+                self._thread.start()
+
+    def latest(self):
+        """The newest sample, or None if the sampler was never started"""
+        return self.buffer.latest()
+
+    def history(self, seconds, points=120):
+        """Mean of each field over at most `points` equal buckets covering the last `seconds`"""
+        columns = self.buffer.since(time.time() - seconds)
+        count = len(columns['timestamp'])
+        if not count:
+            return []
+        step = max(count / points, 1)
+        rows = []
+        for bucket in range(min(points, count)):
+            first, last = int(bucket * step), int((bucket + 1) * step)
+            if last <= first:
+                continue
+            rows.append({
+                field: sum(columns[field][first:last]) / (last - first)
+                for field in FIELDS
+            })
+        return rows
+
+
+def parse_window(value, default='1h'):
+    """Seconds in a window such as `90s`, `15m`, `1h` or `7d`; ValueError if malformed"""
+    match = WINDOW.match((value or default).strip().lower())
+    if not match:
+        raise ValueError(f'Invalid window {value!r}, expected a number followed by s, m, h or d')
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    """This process's sampler; reading it does not start it"""
+    global _sampler
+    # A forked worker does not inherit the parent's thread, so it gets its own sampler
+    if _sampler is None or _sampler.process.pid != os.getpid():
+        with _sampler_lock:
+            if _sampler is None or _sampler.process.pid != os.getpid():
+                _sampler = SystemSampler()
+    return _sampler
+
+
+def start_on_request(sender, **kwargs):
+    """request_started receiver connected by enable()"""
+    get_sampler().start()
+
+
+def enable():
+    """Sample in this process and its forked workers from their first request on"""
+    request_started.connect(start_on_request, dispatch_uid='system_sampler')
@@ -11,6 +11,11 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from university_platform import system_sampler
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'university_platform.settings')
 
 application = get_wsgi_application()
+
+# Only server processes sample host metrics
+system_sampler.enable()
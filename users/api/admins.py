@@ -6,12 +6,17 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db.models import Count, Q
 from django.db.models.functions import ExtractMonth, ExtractYear
 from datetime import datetime, timedelta
-import psutil
 import platform
 import os
+import time
+import django
 from django.conf import settings
+from collections import Counter
 from applications.models.models import Application, ActivityLog
+from applications.services import daily_stats
+from institutions.catalog import get_catalog
 from institutions.models import Institution
+from university_platform.system_sampler import get_sampler, parse_window
 #import get_user model
 from django.contrib.auth import get_user_model
 User =get_user_model()
@@ -34,24 +39,24 @@ class SystemAdminViewSet(viewsets.ViewSet):
         )
 
         # Application trends by month
-        application_trends = (
-            Application.objects
-            .annotate(month=ExtractMonth('date_applied'), year=ExtractYear('date_applied'))
-            .values('month', 'year')
-            .annotate(count=Count('id'))
-            .order_by('year', 'month')
-        )
+        application_trends = daily_stats.monthly_trends()
 
-        # Institution statistics
-        institution_stats = (
-            Institution.objects
-            .annotate(
-                num_programs=Count('faculties__departments__programs', distinct=True),
-                num_applications=Count('faculties__departments__programs__applications', distinct=True)
-            )
-            .order_by('-num_applications')[:5]
-            .values('name', 'num_programs', 'num_applications')
+        # Institution statistics, counts from the daily rollup and the catalog tree
+        catalog = get_catalog()
+        institution_counts = daily_stats.institution_counts()
+        program_totals = Counter(
+            program.department.faculty.institution_id for program in catalog.program_list
         )
+        institution_stats = [
+            {
+                'name': institution.name,
+                'num_programs': program_totals[institution.pk],
+                'num_applications': institution_counts.get(institution.pk, 0),
+            }
+            for institution in sorted(
+                catalog.institutions, key=lambda institution: -institution_counts.get(institution.pk, 0)
+            )[:5]
+        ]
 
         # Recent activities
         recent_activities = (
@@ -66,61 +71,73 @@ class SystemAdminViewSet(viewsets.ViewSet):
                 'total_users': total_users,
                 'user_distribution': list(user_distribution),
             },
-            'application_trends': list(application_trends),
-            'institution_stats': list(institution_stats),
+            'application_trends': application_trends,
+            'institution_stats': institution_stats,
             'recent_activities': list(recent_activities),
         })
 
     @action(detail=False, methods=['get'])
     def system_metrics(self, request):
-        """Get real-time system metrics"""
+        """Get the latest system metrics and their history over ?window= (default 1h)"""
         if not request.user.is_system_admin:
             return Response({"error": "Unauthorized"}, status=status.HTTP_403_FORBIDDEN)
 
-        # CPU usage
-        cpu_usage = psutil.cpu_percent(interval=1)
-        
-        # Memory usage
-        memory = psutil.virtual_memory()
-        memory_usage = memory.percent
-        memory_total = round(memory.total / (1024 ** 3), 2)  # in GB
-        memory_used = round(memory.used / (1024 ** 3), 2)
-        
-        # Disk usage
-        disk = psutil.disk_usage('/')
-        disk_usage = disk.percent
-        disk_total = round(disk.total / (1024 ** 3), 2)
-        disk_used = round(disk.used / (1024 ** 3), 2)
-        
+        try:
+            window = parse_window(request.query_params.get('window'))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Read from the background sampler, nothing here waits on psutil
+        sampler = get_sampler()
+        latest = sampler.latest()
+        if latest is None:
+            return Response(
+                {"error": "System metrics are only sampled in server processes"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
         # System info
         system_info = {
             'os': platform.system(),
             'os_version': platform.release(),
             'python_version': platform.python_version(),
-            'django_version': '3.2',  # Update with your Django version
+            'django_version': django.get_version(),
             'server_time': datetime.now().isoformat(),
-            'uptime': str(timedelta(seconds=int(psutil.boot_time())) if hasattr(psutil, 'boot_time') else 'N/A')
+            'uptime': str(timedelta(seconds=int(time.time() - sampler.boot_time))),
+            'pid': os.getpid(),
         }
-        
-        # Database size (approximate)
-        db_path = settings.DATABASES['default']['NAME']
-        db_size = os.path.getsize(db_path) if os.path.exists(db_path) else 0
-        db_size_mb = round(db_size / (1024 ** 2), 2)
 
         return Response({
-            'cpu_usage': cpu_usage,
+            'cpu_usage': latest['cpu_percent'],
             'memory': {
-                'usage': memory_usage,
-                'total': memory_total,
-                'used': memory_used,
+                'usage': latest['memory_percent'],
+                'total': round(sampler.memory_total / (1024 ** 3), 2),  # in GB
+                'used': round(latest['memory_used'] / (1024 ** 3), 2),
             },
             'disk': {
-                'usage': disk_usage,
-                'total': disk_total,
-                'used': disk_used,
+                'usage': latest['disk_percent'],
+                'total': round(sampler.disk_total / (1024 ** 3), 2),
+                'used': round(latest['disk_used'] / (1024 ** 3), 2),
             },
-            'database_size_mb': db_size_mb,
+            'database_size_mb': round(latest['database_size'] / (1024 ** 2), 2),
+            'process_rss_mb': round(latest['process_rss'] / (1024 ** 2), 2),
+            'sampled_at': datetime.fromtimestamp(latest['timestamp']).isoformat(),
             'system_info': system_info,
+            'history': {
+                'window_seconds': window,
+                'interval_seconds': sampler.interval,
+                'points': [
+                    {
+                        'time': datetime.fromtimestamp(point['timestamp']).isoformat(),
+                        'cpu_usage': round(point['cpu_percent'], 1),
+                        'memory_usage': round(point['memory_percent'], 1),
+                        'disk_usage': round(point['disk_percent'], 1),
+                        'database_size_mb': round(point['database_size'] / (1024 ** 2), 2),
+                        'process_rss_mb': round(point['process_rss'] / (1024 ** 2), 2),
+                    }
+                    for point in sampler.history(window)
+                ],
+            },
         })
 
     @action(detail=False, methods=['post'])
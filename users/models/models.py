@@ -1,15 +1,19 @@
 # users/models.py
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 import uuid
 from institutions.models import Institution 
+from university_platform.dirty_fields import DirtyFieldsMixin
 
-class User(AbstractUser):
+class User(DirtyFieldsMixin, AbstractUser):
     """
     Core user model focused on authentication and basic user data.
     Additional profile data can be stored in a separate Profile model if needed.
     """
+    # Points feed the application histograms, applications/signals.py diffs them
+    tracked_fields = ('a_level_points',)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     email = models.EmailField(unique=True)
     name = models.CharField(max_length=255)
@@ -70,7 +74,9 @@ class User(AbstractUser):
         if self.is_enroller:
             self.is_student = False
             self.is_university_admin = False
-        super().save(*args, **kwargs)
+        # Keep derived tables maintained by signals in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def update_last_active(self):
         """Update the last active timestamp"""
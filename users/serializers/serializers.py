@@ -5,6 +5,7 @@ from institutions.models import Program
 import os
 from django.utils import timezone
 from institutions.serializers import MinimalProgramSerializer
+from applications.services.admission_rules import InvalidCriteria, compile_criteria
 User = get_user_model()
 
 # 🔹 User Serializer (For fetching user data)
@@ -48,6 +49,19 @@ class UserSettingsSerializer(serializers.ModelSerializer):
             'auto_reject_criteria': {'required': False},
             'advanced_preferences': {'required': False},
         }
+
+    def validate_auto_review_criteria(self, value):
+        return self._validate_criteria(value)
+
+    def validate_auto_reject_criteria(self, value):
+        return self._validate_criteria(value)
+
+    def _validate_criteria(self, value):
+        try:
+            compile_criteria(value)
+        except InvalidCriteria as e:
+            raise serializers.ValidationError(str(e))
+        return value
 # Assuming you 
 # 🔹 Register Serializer (For user sign-up)
 class RegisterSerializer(serializers.ModelSerializer):
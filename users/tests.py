@@ -1,3 +1,57 @@
+from unittest import mock
+from django.core.signals import request_started
 from django.test import TestCase
+from rest_framework.test import APIClient
+from applications.tests import make_user
+from university_platform import system_sampler
 
-# Create your tests here.
+
+class StopSampling(Exception):
+    pass
+
+
+class SystemSamplerTests(TestCase):
+    def setUp(self):
+        self.addCleanup(request_started.disconnect, dispatch_uid='system_sampler')
+        self.sampler = system_sampler.SystemSampler(interval=1, history=3)
+
+    def sample(self, timestamp):
+        return dict.fromkeys(system_sampler.FIELDS, 1.0) | {'timestamp': timestamp}
+
+    def test_ring_buffer_keeps_the_newest_samples(self):
+        for timestamp in range(5):
+            self.sampler.buffer.append(self.sample(timestamp))
+        self.assertEqual(self.sampler.latest()['timestamp'], 4)
+        self.assertEqual(list(self.sampler.buffer.since(0)['timestamp']), [2, 3, 4])
+        self.assertEqual(list(self.sampler.buffer.since(3.5)['timestamp']), [4])
+
+    def test_failed_sample_is_logged_and_sampling_continues(self):
+        samples = [OSError('disk gone'), self.sample(1)]
+        # The third wait ends the loop
+        waits = [None, None, StopSampling()]
+        with mock.patch.object(self.sampler, 'sample', side_effect=samples), \
+                mock.patch.object(system_sampler.time, 'sleep', side_effect=waits):
+            with self.assertLogs('university_platform.system_sampler', 'ERROR') as logs, \
+                    self.assertRaises(StopSampling):
+                self.sampler._run()
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(self.sampler.latest()['timestamp'], 1)
+
+    def test_requests_do_not_sample_until_enabled(self):
+        with mock.patch.object(system_sampler.SystemSampler, 'start') as start:
+            self.client.get('/api/deadlines/')
+            start.assert_not_called()
+            system_sampler.enable()
+            self.client.get('/api/deadlines/')
+            start.assert_called_once_with()
+
+    def test_metrics_endpoint_reads_the_sampler(self):
+        client = APIClient()
+        client.force_authenticate(make_user('operator', is_system_admin=True))
+        with mock.patch('users.api.admins.get_sampler', return_value=self.sampler):
+            response = client.get('/api/system-admin/system_metrics/')
+            self.assertEqual(response.status_code, 503)
+            self.sampler.buffer.append(self.sample(system_sampler.time.time()))
+            self.assertEqual(client.get('/api/system-admin/system_metrics/').status_code, 200)
+            response = client.get('/api/system-admin/system_metrics/?window=bad')
+            self.assertEqual(response.status_code, 400)